@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    Compares the REST channel codecs on typical READALL pages.
+
+    Usage: python -m benchmarks.bench_codecs [--page-sizes 50,500] [--repeat 20]
+
+    Any additional JSON implementation installed (ujson, simplejson) is benchmarked too.
+"""
+import argparse
+import importlib
+import timeit
+
+from garuda.channels.rest.codecs import GAJSONCodec, GAMsgpackCodec
+
+from tests.tstdk import v1_0 as tstdk
+
+
+def make_page(page_size):
+    """
+    """
+    page = []
+
+    for index in range(page_size):
+        enterprise = tstdk.GAEnterprise(id='%024x' % index, name='enterprise %d' % index, description='the enterprise number %d' % index, zipcode=94000 + index)
+        enterprise.owner = 'owner-identifier'
+        enterprise.parent_type = 'root'
+        enterprise.parent_id = 'root-identifier'
+        enterprise.creation_date = 1470000000.0 + index
+        enterprise.last_updated_date = 1470000000.0 + index
+        page.append(enterprise.to_dict())
+
+    return page
+
+
+def available_codecs():
+    """
+    """
+    codecs = [('json', GAJSONCodec()), ('msgpack', GAMsgpackCodec())]
+
+    for module_name in ('simplejson', 'ujson'):
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            continue
+
+        codecs.append((module_name, GAJSONCodec(dumps=module.dumps, loads=module.loads)))
+
+    return codecs
+
+
+def run(page_sizes, repeat):
+    """
+    """
+    print '%-12s %8s %12s %12s %12s' % ('codec', 'page', 'size (B)', 'encode (ms)', 'decode (ms)')
+
+    for page_size in page_sizes:
+        page = make_page(page_size)
+
+        for name, codec in available_codecs():
+            body = codec.encode(page)
+            encode_time = min(timeit.repeat(lambda: codec.encode(page), number=1, repeat=repeat)) * 1000
+            decode_time = min(timeit.repeat(lambda: codec.decode(body), number=1, repeat=repeat)) * 1000
+
+            print '%-12s %8d %12d %12.3f %12.3f' % (name, page_size, len(body), encode_time, decode_time)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Garuda codecs benchmark')
+
+    parser.add_argument('--page-sizes',
+                        dest='page_sizes',
+                        help='comma separated list of page sizes',
+                        default='50,500',
+                        type=str)
+
+    parser.add_argument('--repeat',
+                        dest='repeat',
+                        help='number of runs per measure',
+                        default=20,
+                        type=int)
+
+    args = parser.parse_args()
+
+    run(page_sizes=[int(size) for size in args.page_sizes.split(',')], repeat=args.repeat)
@@ -51,7 +51,7 @@ class Garuda(object):
     """
 
     def __init__(self, sdks_info, redis_info, channels=[], plugins=[], additional_controller_classes=[], additional_master_controller_classes=[],
-                 log_level=logging.INFO, log_handler=None, runloop=True, banner=True, debug=False):
+                 log_level=logging.INFO, log_handler=None, runloop=True, banner=True, debug=False, push_options=None):
         """ Initializes Garuda.
 
         """
@@ -65,6 +65,7 @@ class Garuda(object):
         self._sdk_library = GASDKLibrary()
         self._channels = channels
         self._debug = debug
+        self._push_options = push_options
         self._additional_controller_classes = additional_controller_classes
         self._additional_master_controller_classes = additional_master_controller_classes
 
@@ -106,7 +107,8 @@ class Garuda(object):
                                                          logic_plugins=self._logic_plugins,
                                                          authentication_plugins=self._authentication_plugins,
                                                          storage_plugins=self._storage_plugins,
-                                                         permission_plugins=self._permission_plugins)
+                                                         permission_plugins=self._permission_plugins,
+                                                         push_options=self._push_options)
 
         self._master_core = GACoreController(garuda_uuid=self._uuid,
                                              redis_info=self._redis_info,
@@ -114,7 +116,8 @@ class Garuda(object):
                                              additional_controller_classes=self._additional_master_controller_classes,
                                              authentication_plugins=self._authentication_plugins,
                                              storage_plugins=self._storage_plugins,
-                                             permission_plugins=self._permission_plugins)
+                                             permission_plugins=self._permission_plugins,
+                                             push_options=self._push_options)
 
     def _init_debug_mode(self):
         """
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
-__all__ = ['GAFalconChannel']
+__all__ = ['GAFalconChannel', 'GASSEChannel']
 
 from .falcon_channel import GAFalconChannel
+from .sse_channel import GASSEChannel
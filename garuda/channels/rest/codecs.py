@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+import json
+import msgpack
+
+
+class GACodec(object):
+    """ Encodes and decodes HTTP bodies for one content type
+
+        Codecs setting streams to True encode lists item by item in encode_iterator, so that READALL
+        responses can be streamed with them. The channel does not stream with the other codecs.
+    """
+
+    content_type = None
+    streams = False
+
+    def encode(self, data):
+        """
+        """
+        raise NotImplementedError('%s must implement encode method' % self)
+
+    def decode(self, data):
+        """
+        """
+        raise NotImplementedError('%s must implement decode method' % self)
+
+    def encode_iterator(self, items):
+        """ Encodes the given items as a list. Codecs that do not stream hold all the items in memory
+        """
+        yield self.encode(list(items))
+
+
+class GAJSONCodec(GACodec):
+    """ JSON codec. A faster implementation can be plugged by giving its dumps and loads functions
+
+        Example:
+            GAJSONCodec(dumps=ujson.dumps, loads=ujson.loads)
+    """
+
+    content_type = 'application/json'
+    streams = True
+
+    def __init__(self, dumps=json.dumps, loads=json.loads):
+        """
+        """
+        self._dumps = dumps
+        self._loads = loads
+
+    def encode(self, data):
+        """
+        """
+        return self._dumps(data)
+
+    def decode(self, data):
+        """
+        """
+        return self._loads(data)
+
+    def encode_iterator(self, items):
+        """ Encodes the given items as a JSON array, one chunk per item
+        """
+        yield '['
+
+        separator = ''
+
+        for item in items:
+            yield separator + self._dumps(item)
+            separator = ','
+
+        yield ']'
+
+
+class GAMsgpackCodec(GACodec):
+    """ MessagePack codec. It does not stream, as a MessagePack array starts with its number of items
+    """
+
+    content_type = 'application/x-msgpack'
+
+    def encode(self, data):
+        """
+        """
+        return msgpack.packb(data)
+
+    def decode(self, data):
+        """
+        """
+        return msgpack.unpackb(data)
+
+
+class GACodecRegistry(object):
+    """ Registry of the codecs supported by a channel, and Accept/Content-Type negotiation
+    """
+
+    def __init__(self, codecs=None, default_content_type=GAJSONCodec.content_type):
+        """
+        """
+        self._codecs = {}
+        self._default_content_type = default_content_type
+
+        for codec in codecs if codecs is not None else [GAJSONCodec(), GAMsgpackCodec()]:
+            self.register_codec(codec)
+
+    @property
+    def default_codec(self):
+        """
+        """
+        return self._codecs[self._default_content_type]
+
+    @property
+    def content_types(self):
+        """
+        """
+        return self._codecs.keys()
+
+    def register_codec(self, codec):
+        """ Registers the given codec, replacing any codec previously registered for the same content type
+        """
+        self._codecs[codec.content_type] = codec
+
+    def unregister_codec(self, content_type):
+        """
+        """
+        if content_type in self._codecs:
+            del self._codecs[content_type]
+
+    def codec_for_content_type(self, content_type):
+        """ Returns the codec to decode a body of the given Content-Type, or the default codec
+        """
+        if content_type:
+            content_type = content_type.split(';')[0].strip().lower()
+
+            if content_type in self._codecs:
+                return self._codecs[content_type]
+
+        return self.default_codec
+
+    def codec_for_accept(self, accept):
+        """ Returns the preferred codec according to the given Accept header, or the default codec
+        """
+        if not accept:
+            return self.default_codec
+
+        candidates = []
+
+        for position, media_range in enumerate(accept.split(',')):
+            parameters = media_range.split(';')
+            content_type = parameters[0].strip().lower()
+            quality = 1.0
+
+            for parameter in parameters[1:]:
+                name, _, value = parameter.partition('=')
+
+                if name.strip() == 'q':
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+
+            if quality > 0 and content_type in self._codecs:
+                candidates.append((-quality, position, content_type))
+
+        if not len(candidates):
+            return self.default_codec
+
+        return self._codecs[min(candidates)[2]]
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+import zlib
+
+
+class GACompressor(object):
+    """ Negotiates and applies gzip or deflate compression of HTTP bodies
+
+        Bodies smaller than threshold bytes are sent as is. Streamed bodies have an unknown size,
+        and are always compressed when the client accepts it.
+    """
+
+    ENCODING_GZIP = 'gzip'
+    ENCODING_DEFLATE = 'deflate'
+
+    SUPPORTED_ENCODINGS = [ENCODING_GZIP, ENCODING_DEFLATE]
+
+    def __init__(self, threshold=1024, level=6):
+        """
+        """
+        self._threshold = threshold
+        self._level = level
+
+    @property
+    def threshold(self):
+        """
+        """
+        return self._threshold
+
+    @property
+    def level(self):
+        """
+        """
+        return self._level
+
+    def encoding_for_accept_encoding(self, accept_encoding):
+        """ Returns the preferred supported encoding according to the given Accept-Encoding header, or None
+        """
+        if not accept_encoding:
+            return None
+
+        candidates = []
+
+        for coding in accept_encoding.split(','):
+            parameters = coding.split(';')
+            name = parameters[0].strip().lower()
+            quality = 1.0
+
+            for parameter in parameters[1:]:
+                key, _, value = parameter.partition('=')
+
+                if key.strip() == 'q':
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+
+            if quality <= 0:
+                continue
+
+            if name == '*':
+                name = self.ENCODING_GZIP
+
+            if name in self.SUPPORTED_ENCODINGS:
+                candidates.append((-quality, self.SUPPORTED_ENCODINGS.index(name), name))
+
+        if not len(candidates):
+            return None
+
+        return min(candidates)[2]
+
+    def should_compress(self, body):
+        """
+        """
+        return body is not None and len(body) >= self._threshold
+
+    def compress(self, body, encoding):
+        """
+        """
+        compressor = self._compressor(encoding)
+        return compressor.compress(self._to_bytes(body)) + compressor.flush()
+
+    def compress_iterator(self, chunks, encoding):
+        """ Compresses the given chunks on the fly
+        """
+        compressor = self._compressor(encoding)
+
+        for chunk in chunks:
+            data = compressor.compress(self._to_bytes(chunk))
+
+            if data:
+                yield data
+
+        yield compressor.flush()
+
+    # Utilities
+
+    def _to_bytes(self, data):
+        """
+        """
+        return data.encode('utf-8') if isinstance(data, unicode) else data
+
+    def _compressor(self, encoding):
+        """
+        """
+        if encoding == self.ENCODING_GZIP:
+            return zlib.compressobj(self._level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+        return zlib.compressobj(self._level, zlib.DEFLATED, zlib.MAX_WBITS)
@@ -1,19 +1,23 @@
 # -*- coding: utf-8 -*-
 
-import json
 import logging
 import falcon
 import time
-import multiprocessing
 from gunicorn.app.base import BaseApplication
 from base64 import urlsafe_b64decode
+from email.utils import formatdate, parsedate_tz, mktime_tz
+from collections import Iterator
 
-from garuda.core.lib import GASDKLibrary
-from garuda.core.models import GAError, GAPluginManifest, GAPushNotification, GARequest, GAResponseSuccess
+from garuda.core.lib import GASDKLibrary, GATimings
+from garuda.core.models import GAError, GAPluginManifest, GAPushNotification, GARequest, GAResponseSuccess, GAResponseFailure
 from garuda.core.channels import GAChannel
 
 from .constants import RESTConstants
+from .codecs import GACodecRegistry
+from .compression import GACompressor
 from .parser import GAPathParser
+from .route_table import GARouteTable
+from .workers import GAWorkersTuner
 
 logger = logging.getLogger('garuda.comm.rest')
 
@@ -22,26 +26,39 @@ class GAFalconChannel(GAChannel):  # pragma: no cover
     """
     """
 
-    def __init__(self, ssl_certificate='', ssl_key='', host='0.0.0.0', port=2000, push_timeout=60):
+    def __init__(self, ssl_certificate='', ssl_key='', host='0.0.0.0', port=2000, push_timeout=60, stream_readall=False, codecs=None, compression_threshold=None, compression_level=6, batch_max_size=100, server_timing=False,
+                 number_of_workers=None, auto_tune_workers=False, worker_connections=1000, keepalive=2, backlog=2048, max_requests=5000, max_requests_jitter=500, timeout=None, unix_socket=None,
+                 push_linger=0, push_max_events=100, trusted_proxies=None):
         """
         """
         super(GAFalconChannel, self).__init__()
 
         self._host = host
         self._port = port
+        self._unix_socket = unix_socket
+        self._ssl_certificate = ssl_certificate
+        self._ssl_key = ssl_key
         self._push_timeout = push_timeout
-        self._number_of_workers = (multiprocessing.cpu_count() * 2) + 1
+        self._push_linger = push_linger
+        self._push_max_events = push_max_events
+        self._stream_readall = stream_readall
+        self._trusted_proxies = set(trusted_proxies or [])
+        self._batch_max_size = batch_max_size
+        self._server_timing = server_timing
+        self._codecs = GACodecRegistry(codecs=codecs)
+        self._compressor = GACompressor(threshold=compression_threshold, level=compression_level) if compression_threshold is not None else None
+        self._route_table = None
+        self._number_of_workers = number_of_workers
+        self._auto_tune_workers = auto_tune_workers
+        self._worker_connections = worker_connections
+        self._keepalive = keepalive
+        self._backlog = backlog
+        self._max_requests = max_requests
+        self._max_requests_jitter = max_requests_jitter
+        self._timeout = timeout if timeout is not None else push_timeout + 20
         self._falcon = falcon.API()
         self._falcon.add_sink(self._handle_requests)
-        self._server = GAGUnicorn(app=self._falcon,
-                                  host=self._host,
-                                  port=self._port,
-                                  ssl_certificate=ssl_certificate,
-                                  ssl_key=ssl_key,
-                                  number_of_workers=self._number_of_workers,
-                                  timeout=push_timeout + 20,
-                                  worker_init=self._worker_init,
-                                  worker_exit=self._worker_exit)
+        self._server = None
 
     def _worker_init(self, worker):
         """
@@ -62,11 +79,37 @@ class GAFalconChannel(GAChannel):  # pragma: no cover
     def run(self):
         """
         """
-        self._api_prefix = GASDKLibrary().get_sdk('default').SDKInfo.api_prefix()
+        sdk = GASDKLibrary().get_sdk('default')
+        self._api_prefix = sdk.SDKInfo.api_prefix()
+        self._route_table = GARouteTable(sdk=sdk)
 
-        logger.info("Listening to inbound connection on %s:%d" % (self._host, self._port))
+        number_of_workers = self._number_of_workers
 
-        logger.info("Starting gunicorn with %s workers" % self._number_of_workers)
+        if number_of_workers is None:
+            number_of_workers = GAWorkersTuner().number_of_workers() if self._auto_tune_workers else GAWorkersTuner.default_number_of_workers()
+
+        self._server = GAGUnicorn(app=self._falcon,
+                                  host=self._host,
+                                  port=self._port,
+                                  ssl_certificate=self._ssl_certificate,
+                                  ssl_key=self._ssl_key,
+                                  number_of_workers=number_of_workers,
+                                  timeout=self._timeout,
+                                  worker_init=self._worker_init,
+                                  worker_exit=self._worker_exit,
+                                  worker_connections=self._worker_connections,
+                                  keepalive=self._keepalive,
+                                  backlog=self._backlog,
+                                  max_requests=self._max_requests,
+                                  max_requests_jitter=self._max_requests_jitter,
+                                  unix_socket=self._unix_socket)
+
+        if self._unix_socket:
+            logger.info("Listening to inbound connection on unix:%s" % self._unix_socket)
+        else:
+            logger.info("Listening to inbound connection on %s:%d" % (self._host, self._port))
+
+        logger.info("Starting gunicorn with %s workers" % number_of_workers)
 
         try:
             self._server.run()
@@ -76,15 +119,36 @@ class GAFalconChannel(GAChannel):  # pragma: no cover
     def _handle_requests(self, http_request, http_response):
         """
         """
-        parser = GAPathParser()
-        parser.parse(path=http_request.path, url_prefix="%s/" % self._api_prefix)
+        parser = GAPathParser(route_table=self._route_table)
+        resources = parser.parse(path=http_request.path, url_prefix="%s/" % self._api_prefix)
+        codec = self._codecs.codec_for_accept(http_request.get_header('ACCEPT'))
 
-        if parser.resources[0].name == 'event':
-            self._handle_event_request(http_request, http_response)
+        if not self._route_table.is_valid_route(resources):
+            error = GAError(type=GAError.TYPE_NOTFOUND,
+                            title='Resource not found',
+                            description='Could not find any resource matching path %s' % http_request.path)
+
+            self._update_http_response(http_response=http_response, action=GARequest.ACTION_READ, ga_response=GAResponseFailure(content=[error]), codec=codec)
+            return
+
+        timings = GATimings(enabled=self._server_timing)
+
+        if resources[0].name == 'event':
+            self._handle_event_request(http_request, http_response, codec)
+        elif resources[0].name == 'batch':
+            with timings.measure('total'):
+                self._handle_batch_request(http_request, http_response, codec, timings)
         else:
-            self._handle_model_request(http_request, http_response)
+            with timings.measure('total'):
+                self._handle_model_request(http_request, http_response, resources, codec, timings)
+
+        if timings.enabled:
+            self._set_server_timing_headers(http_request=http_request, http_response=http_response, timings=timings)
+
+        if self._compressor:
+            self._compress_http_response(http_request=http_request, http_response=http_response)
 
-    def _handle_model_request(self, http_request, http_response):
+    def _handle_model_request(self, http_request, http_response, resources, codec, timings):
         """
         """
         method = http_request.method.upper()
@@ -99,12 +163,11 @@ class GAFalconChannel(GAChannel):  # pragma: no cover
         filter = self._extract_filter(http_request.headers)
         page, page_size = self._extract_paging(http_request.headers)
         order_by = self._extract_ordering(http_request.headers)
+        if_none_match, if_modified_since = self._extract_conditions(http_request.method, http_request.headers)
 
         logger.debug('> %s %s from %s' % (http_request.method, http_request.path, http_request.host))
         # logger.debug(json.dumps(content, indent=4))
 
-        parser = GAPathParser()
-        resources = parser.parse(path=http_request.path, url_prefix="%s/" % self._api_prefix)
         action = self._determine_action(http_request.method, resources)
 
         ga_request = GARequest(action=action,
@@ -117,6 +180,11 @@ class GAFalconChannel(GAChannel):  # pragma: no cover
                                page=page,
                                page_size=page_size,
                                order_by=order_by,
+                               stream=self._stream_readall and codec.streams and action == GARequest.ACTION_READALL,
+                               if_none_match=if_none_match,
+                               if_modified_since=if_modified_since,
+                               timings=timings,
+                               client_address=self._extract_client_address(http_request),
                                channel=self)
 
         ga_response = self.core_controller.execute_model_request(request=ga_request)
@@ -124,9 +192,10 @@ class GAFalconChannel(GAChannel):  # pragma: no cover
         logger.debug('< %s %s to %s' % (http_request.method, http_request.path, http_request.host))
         # logger.debug(json.dumps(content, indent=4))
 
-        self._update_http_response(http_response=http_response, action=action, ga_response=ga_response)
+        with timings.measure('encode'):
+            self._update_http_response(http_response=http_response, action=action, ga_response=ga_response, codec=codec)
 
-    def _handle_event_request(self, http_request, http_response):
+    def _handle_event_request(self, http_request, http_response, codec):
         """
         """
         method = http_request.method.upper()
@@ -151,40 +220,142 @@ class GAFalconChannel(GAChannel):  # pragma: no cover
         session, ga_response_failure = self.core_controller.execute_events_request(request=ga_request)
 
         if ga_response_failure:
-            self._update_http_response(http_response=http_response, action=GARequest.ACTION_READ, ga_response=ga_response_failure)
+            self._update_http_response(http_response=http_response, action=GARequest.ACTION_READ, ga_response=ga_response_failure, codec=codec)
             return
 
         self.core_controller.sessions_controller.set_session_listening_status(session=session, status=True)
 
-        events = []
-        # event = self.core_controller.push_controller.get_next_event(session=session, timeout=self._push_timeout)
-        # events.append(event)
-        while True:
+        events = self.core_controller.push_controller.wait_for_events(session=session, timeout=self._push_timeout, max_events=self._push_max_events, linger=self._push_linger)
 
-            event = self.core_controller.push_controller.get_next_event(session=session, timeout=self._push_timeout)
+        ga_notification = GAPushNotification(events=events)
+        logger.info('< %s %s events to %s' % (http_request.method, http_request.path, http_request.host))
+        self._update_events_response(http_response=http_response, ga_notification=ga_notification, codec=codec)
 
-            # timeout expired and nothing to pop
-            if not event:
-                break
+        self.core_controller.sessions_controller.set_session_listening_status(session=session, status=False)
 
-            events.append(event)
+    def _handle_batch_request(self, http_request, http_response, codec, timings):
+        """ Executes a list of sub requests under a single session resolution
 
-            if len(events) >= 100:
-                break
+            The body is a list of items like {"method": "POST", "path": "/enterprises", "body": {...}, "headers": {...}}.
+            The response is the list of the {"status": code, "body": content} of every item, in the same order.
+        """
+        method = http_request.method.upper()
 
-            if self.core_controller.push_controller.is_event_queue_empty(session=session):
+        if method == RESTConstants.HTTP_OPTIONS:
+            self._update_options_response(http_response=http_response)
+            return
 
-                time.sleep(0.3)
+        if method != RESTConstants.HTTP_POST:
+            error = GAError(type=GAError.TYPE_NOTALLOWED,
+                            title='Method not allowed',
+                            description='Batch requests must be sent with POST')
 
-                # if this is still empty, we send back the info
-                if self.core_controller.push_controller.is_event_queue_empty(session=session):
-                    break
+            self._update_http_response(http_response=http_response, action=GARequest.ACTION_BATCH, ga_response=GAResponseFailure(content=[error]), codec=codec)
+            return
 
-        ga_notification = GAPushNotification(events=events)
-        logger.info('< %s %s events to %s' % (http_request.method, http_request.path, http_request.host))
-        self._update_events_response(http_response=http_response, ga_notification=ga_notification)
+        content = self._extract_content(http_request)
 
-        self.core_controller.sessions_controller.set_session_listening_status(session=session, status=False)
+        if not isinstance(content, list) or len(content) > self._batch_max_size:
+            error = GAError(type=GAError.TYPE_INVALID,
+                            title='Invalid batch',
+                            description='Batch requests must contain a list of at most %d items' % self._batch_max_size)
+
+            self._update_http_response(http_response=http_response, action=GARequest.ACTION_BATCH, ga_response=GAResponseFailure(content=[error]), codec=codec)
+            return
+
+        username, token = self._extract_auth(http_request.headers)
+
+        logger.debug('> %s %s from %s (%d items)' % (http_request.method, http_request.path, http_request.host, len(content)))
+
+        ga_request = GARequest(action=GARequest.ACTION_BATCH,
+                               username=username,
+                               token=token,
+                               timings=timings,
+                               channel=self)
+
+        actions = []
+        sub_requests = []
+        results = []
+
+        for item in content:
+            action, sub_request, ga_response_failure = self._make_batch_sub_request(item=item, username=username, token=token, timings=timings)
+            actions.append(action)
+            results.append(ga_response_failure)
+
+            if sub_request:
+                sub_requests.append(sub_request)
+
+        ga_responses, ga_response_failure = self.core_controller.execute_batch_request(request=ga_request, sub_requests=sub_requests)
+
+        if ga_response_failure:
+            self._update_http_response(http_response=http_response, action=GARequest.ACTION_BATCH, ga_response=ga_response_failure, codec=codec)
+            return
+
+        ga_responses = iter(ga_responses)
+        items = []
+
+        for action, ga_response in zip(actions, results):
+
+            if ga_response is None:
+                ga_response = next(ga_responses)
+
+            if isinstance(ga_response, GAResponseSuccess):
+                code, body = self._convert_content(action, ga_response)
+            else:
+                code, body = self._convert_errors(action, ga_response)
+
+            items.append({'status': int(code.split(' ')[0]), 'body': body})
+
+        logger.debug('< %s %s to %s' % (http_request.method, http_request.path, http_request.host))
+
+        with timings.measure('encode'):
+            http_response.body = codec.encode(items)
+
+        http_response.status = falcon.HTTP_200
+        http_response.content_type = codec.content_type
+
+        self._set_cors_headers(http_response=http_response)
+
+    def _make_batch_sub_request(self, item, username, token, timings):
+        """ Returns the action, the GARequest and None for a valid batch item, or the action, None and a GAResponseFailure
+        """
+        method = str(item.get('method', '')).upper() if isinstance(item, dict) else ''
+        path = item.get('path', '') if isinstance(item, dict) else ''
+
+        if method not in (RESTConstants.HTTP_GET, RESTConstants.HTTP_HEAD, RESTConstants.HTTP_POST, RESTConstants.HTTP_PUT, RESTConstants.HTTP_DELETE):
+            error = GAError(type=GAError.TYPE_NOTALLOWED,
+                            title='Method not allowed',
+                            description='Method %s is not allowed in a batch' % method)
+
+            return (GARequest.ACTION_READ, None, GAResponseFailure(content=[error]))
+
+        parser = GAPathParser(route_table=self._route_table)
+        resources = parser.parse(path=path, url_prefix="%s/" % self._api_prefix)
+
+        if not self._route_table.is_valid_route(resources) or resources[0].name in ('event', 'batch'):
+            error = GAError(type=GAError.TYPE_NOTFOUND,
+                            title='Resource not found',
+                            description='Could not find any resource matching path %s' % path)
+
+            return (GARequest.ACTION_READ, None, GAResponseFailure(content=[error]))
+
+        headers = dict((str(key).upper(), value) for key, value in (item.get('headers') or {}).items())
+        action = self._determine_action(method, resources)
+        page, page_size = self._extract_paging(headers)
+
+        sub_request = GARequest(action=action,
+                                content=item.get('body') or {},
+                                resources=resources,
+                                username=username,
+                                token=token,
+                                filter=self._extract_filter(headers),
+                                page=page,
+                                page_size=page_size,
+                                order_by=self._extract_ordering(headers),
+                                timings=timings,
+                                channel=self)
+
+        return (action, sub_request, None)
 
     def _determine_action(self, method, resources):
         """
@@ -211,10 +382,25 @@ class GAFalconChannel(GAChannel):  # pragma: no cover
         if not request.content_length:
             return {}
 
-        return json.loads(request.stream.read())
+        return self._codecs.codec_for_content_type(request.content_type).decode(request.stream.read())
 
         # we should raise a malformed query here
 
+    def _extract_client_address(self, request):
+        """ Returns the address of the client
+
+            The forwarding headers can be set by anyone, so they are only read when the request comes from
+            one of the trusted proxies. The client is then the last address of the route that is not a trusted proxy.
+        """
+        if request.remote_addr not in self._trusted_proxies:
+            return request.remote_addr
+
+        for address in reversed(request.access_route):
+            if address not in self._trusted_proxies:
+                return address
+
+        return request.remote_addr
+
     def _extract_auth(self, headers):
         """
         """
@@ -258,6 +444,24 @@ class GAFalconChannel(GAChannel):  # pragma: no cover
         if 'X-NUAGE-ORDERBY' in headers:
             return headers['X-NUAGE-ORDERBY']
 
+    def _extract_conditions(self, method, headers):
+        """
+        """
+        if_none_match = None
+        if_modified_since = None
+
+        if method.upper() != RESTConstants.HTTP_GET:
+            return if_none_match, if_modified_since
+
+        if 'IF-NONE-MATCH' in headers:
+            if_none_match = headers['IF-NONE-MATCH']
+
+        if 'IF-MODIFIED-SINCE' in headers:
+            date = parsedate_tz(headers['IF-MODIFIED-SINCE'])
+            if_modified_since = mktime_tz(date) if date else None
+
+        return if_none_match, if_modified_since
+
     def _convert_errors(self, action, response):
         """
         """
@@ -291,6 +495,9 @@ class GAFalconChannel(GAChannel):  # pragma: no cover
         elif error_type == GAError.TYPE_CONFLICT:
             code = falcon.HTTP_409
 
+        elif error_type == GAError.TYPE_TOOMANYREQUESTS:
+            code = falcon.HTTP_429
+
         else:
             code = falcon.HTTP_520
 
@@ -302,6 +509,9 @@ class GAFalconChannel(GAChannel):  # pragma: no cover
         if type(response.content) is list:
             content = [obj.to_dict() for obj in response.content]
 
+        elif isinstance(response.content, Iterator):
+            content = (obj.to_dict() for obj in response.content)
+
         elif hasattr(response.content, 'to_dict'):
             content = [response.content.to_dict()]
 
@@ -319,10 +529,17 @@ class GAFalconChannel(GAChannel):  # pragma: no cover
 
         return (code, content)
 
-    def _update_http_response(self, http_response, action, ga_response):
+    def _update_http_response(self, http_response, action, ga_response, codec):
         """
         """
         if isinstance(ga_response, GAResponseSuccess):
+            self._set_validators_headers(http_response=http_response, ga_response=ga_response)
+
+            if ga_response.not_modified:
+                http_response.status = falcon.HTTP_304
+                self._set_cors_headers(http_response=http_response)
+                return
+
             code, content = self._convert_content(action, ga_response)
 
         else:
@@ -330,9 +547,13 @@ class GAFalconChannel(GAChannel):  # pragma: no cover
 
         # logger.debug(json.dumps(content, indent=4))
 
-        http_response.body = json.dumps(content)
+        if isinstance(content, Iterator):
+            http_response.stream = codec.encode_iterator(self._guard_iterator(content))
+        else:
+            http_response.body = codec.encode(content)
+
         http_response.status = code
-        http_response.content_type = 'application/json'
+        http_response.content_type = codec.content_type
 
         self._set_cors_headers(http_response=http_response)
 
@@ -349,19 +570,111 @@ class GAFalconChannel(GAChannel):  # pragma: no cover
 
         http_response.set_header('X-Nuage-OrderBy', 'name ASC')
 
-    def _update_events_response(self, http_response, ga_notification):
+    def _set_server_timing_headers(self, http_request, http_response, timings):
+        """ Exposes the time spent in every phase of the request in the Server-Timing header and in the logs
+
+            Streamed responses are produced after the headers are sent, so their Server-Timing header
+            does not include fetching and encoding the objects. This is measured in the stream phase,
+            added to the total and logged once the response is complete.
+        """
+        http_response.set_header('Server-Timing', timings.to_header())
+        http_response.set_header('Timing-Allow-Origin', '*')
+
+        if http_response.stream is not None:
+            http_response.stream = self._measure_stream(http_request=http_request, chunks=http_response.stream, timings=timings)
+            return
+
+        self._log_timings(http_request=http_request, timings=timings)
+
+    def _measure_stream(self, http_request, chunks, timings):
+        """ Yields the given chunks, measuring the time spent producing them, then logs the timings
+        """
+        chunks = iter(chunks)
+        start = time.time()
+
+        try:
+            while True:
+                chunk_start = time.time()
+
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    break
+                finally:
+                    timings.add('stream', time.time() - chunk_start)
+
+                yield chunk
+
+        finally:
+            timings.add('total', time.time() - start)
+            self._log_timings(http_request=http_request, timings=timings)
+
+    def _log_timings(self, http_request, timings):
+        """
+        """
+        logger.info('%s %s timings: %s' % (http_request.method, http_request.path, timings.to_header()),
+                    extra={'method': http_request.method, 'path': http_request.path, 'timings': timings.to_dict()})
+
+    def _set_validators_headers(self, http_response, ga_response):
+        """
+        """
+        if ga_response.etag:
+            http_response.set_header('ETag', ga_response.etag)
+
+        if ga_response.last_modified is not None:
+            http_response.set_header('Last-Modified', formatdate(ga_response.last_modified, usegmt=True))
+
+    def _update_events_response(self, http_response, ga_notification, codec):
         """
         """
         content = ga_notification.to_dict()
 
         # logger.debug(json.dumps(content, indent=4))
 
-        http_response.body = json.dumps(content)
+        http_response.body = codec.encode(content)
         http_response.status = falcon.HTTP_200
-        http_response.content_type = 'application/json'
+        http_response.content_type = codec.content_type
 
         self._set_cors_headers(http_response=http_response)
 
+    def _compress_http_response(self, http_request, http_response):
+        """ Compresses the body of the response if the client accepts it and if it is large enough
+        """
+        http_response.append_header('Vary', 'Accept-Encoding')
+
+        encoding = self._compressor.encoding_for_accept_encoding(http_request.get_header('ACCEPT-ENCODING'))
+
+        if not encoding:
+            return
+
+        if http_response.body is not None:
+
+            if not self._compressor.should_compress(http_response.body):
+                return
+
+            http_response.data = self._compressor.compress(http_response.body, encoding)
+            http_response.body = None
+
+        elif http_response.stream is not None:
+            http_response.stream = self._compressor.compress_iterator(http_response.stream, encoding)
+
+        else:
+            return
+
+        http_response.set_header('Content-Encoding', encoding)
+
+    def _guard_iterator(self, items):
+        """ Yields the given items, logging and raising again any error raised while producing them
+        """
+        try:
+            for item in items:
+                yield item
+        except Exception as exception:
+            # the status and headers are already sent: raising again makes the server abort the
+            # connection before the body is complete, so the client knows the response is truncated
+            logger.error('Error while streaming the response: %s' % exception)
+            raise
+
     def _update_options_response(self, http_response):
         """
         """
@@ -372,20 +685,27 @@ class GAFalconChannel(GAChannel):  # pragma: no cover
         """
         """
         http_response.set_header('Access-Control-Allow-Origin', '*')
-        http_response.set_header('Access-Control-Expose-Headers', 'X-Requested-With, X-Nuage-Organization, X-Nuage-Count, X-Nuage-Page, X-Nuage-PageSize, X-Nuage-OrderBy, X-Nuage-Filter, X-Nuage-FilterType')
+        http_response.set_header('Access-Control-Expose-Headers', 'X-Requested-With, X-Nuage-Organization, X-Nuage-Count, X-Nuage-Page, X-Nuage-PageSize, X-Nuage-OrderBy, X-Nuage-Filter, X-Nuage-FilterType, ETag, Last-Modified, Server-Timing')
         http_response.set_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, HEAD, OPTIONS')
-        http_response.set_header('Access-Control-Allow-Headers', 'Authorization, Content-Type, Cache-Control, If-Modified-Since, X-Requested-With, X-Nuage-Organization, X-Nuage-Count, X-Nuage-Page, X-Nuage-PageSize, X-Nuage-OrderBy, X-Nuage-Filter, X-Nuage-FilterType')
+        http_response.set_header('Access-Control-Allow-Headers', 'Authorization, Accept, Content-Type, Cache-Control, If-Modified-Since, If-None-Match, X-Requested-With, X-Nuage-Organization, X-Nuage-Count, X-Nuage-Page, X-Nuage-PageSize, X-Nuage-OrderBy, X-Nuage-Filter, X-Nuage-FilterType')
         http_response.set_header('Access-Control-Allow-Credentials', 'true')
 
 
 class GAGUnicorn(BaseApplication):  # pragma: no cover
 
-    def __init__(self, app, host, port, ssl_certificate, ssl_key, number_of_workers, timeout, worker_init, worker_exit):
+    def __init__(self, app, host, port, ssl_certificate, ssl_key, number_of_workers, timeout, worker_init, worker_exit,
+                 worker_connections=1000, keepalive=2, backlog=2048, max_requests=5000, max_requests_jitter=500, unix_socket=None):
         """
         """
         self._app = app
         self._host = host
         self._port = port
+        self._unix_socket = unix_socket
+        self._worker_connections = worker_connections
+        self._keepalive = keepalive
+        self._backlog = backlog
+        self._max_requests = max_requests
+        self._max_requests_jitter = max_requests_jitter
         self._ssl_certificate = ssl_certificate
         self._ssl_key = ssl_key
         self._timeout = timeout
@@ -397,11 +717,19 @@ class GAGUnicorn(BaseApplication):  # pragma: no cover
     def load_config(self):
         """
         """
-        self.cfg.set('bind', '%s:%s' % (self._host, self._port))
+        if self._unix_socket:
+            self.cfg.set('bind', 'unix:%s' % self._unix_socket)
+        else:
+            self.cfg.set('bind', '%s:%s' % (self._host, self._port))
+
         self.cfg.set('workers', self._number_of_workers)
         self.cfg.set('worker_class', 'gevent')
+        self.cfg.set('worker_connections', self._worker_connections)
+        self.cfg.set('keepalive', self._keepalive)
+        self.cfg.set('backlog', self._backlog)
         self.cfg.set('timeout', self._timeout)
-        self.cfg.set('max_requests', 5000)
+        self.cfg.set('max_requests', self._max_requests)
+        self.cfg.set('max_requests_jitter', self._max_requests_jitter)
         self.cfg.set('proc_name', 'garuda-worker')
         self.cfg.set('reload', False)
         self.cfg.set('loglevel', 'warning')
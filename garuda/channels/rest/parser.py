@@ -4,17 +4,20 @@ import re
 from bambou import NURESTModelController
 from garuda.core.models import GAResource
 
+VERSION_REGEX = re.compile('v[0-9]_[0-9]')
+
 
 class GAPathParser(object):
     """ Parse Path to retrieve resources and values information
 
     """
-    def __init__(self, resource_mappings={'allalarms': 'alarms'}):
+    def __init__(self, resource_mappings={'allalarms': 'alarms'}, route_table=None):
         """
         """
         self._version = None
         self._resources = []
         self._resource_mappings = resource_mappings
+        self._route_table = route_table
 
     @property
     def resources(self):
@@ -55,13 +58,14 @@ class GAPathParser(object):
 
         index = path.find('/')
 
-        if index > 0 and re.match('v[0-9]_[0-9]', path[:index]):
+        if index > 0 and self._is_version(path[:index]):
             self._version = path[:index]
             path = path[index + 1:]
 
         infos = path.split('/')
 
-        result = []
+        names = []
+        values = []
         index = 0
 
         while index < len(infos):
@@ -70,20 +74,42 @@ class GAPathParser(object):
             if resource and len(resource) > 0:
 
                 index = index + 1
-                value = infos[index] if index < len(infos) and len(infos[index]) > 0 else None
-
-                name = self._get_resource(resource)
-
-                if name == 'events':
-                    result.append(GAResource('event', value))
-                else:
-                    result.append(GAResource(NURESTModelController.get_first_model_with_resource_name(name).rest_name, value))
+                names.append(resource)
+                values.append(infos[index] if index < len(infos) and len(infos[index]) > 0 else None)
 
             index = index + 1
 
-        self._resources = result
+        if self._route_table:
+            rest_names = self._route_table.resolve_shape(tuple(names))
+        else:
+            rest_names = [self._get_rest_name(name) for name in names]
+
+        self._resources = [GAResource(rest_name, value) for rest_name, value in zip(rest_names, values)]
         return self._resources
 
+    def _is_version(self, segment):
+        """ Check if the given path segment is the version prefix
+
+        """
+        if self._route_table and segment == self._route_table.version:
+            return True
+
+        return VERSION_REGEX.match(segment) is not None
+
+    def _get_rest_name(self, resource):
+        """ Get the rest name of the resource
+
+        """
+        name = self._get_resource(resource)
+
+        if name == 'events':
+            return 'event'
+
+        if name == 'batch':
+            return 'batch'
+
+        return NURESTModelController.get_first_model_with_resource_name(name).rest_name
+
     def _get_resource(self, resource):
         """ Get the resource
 
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+import inspect
+import logging
+from bambou import NURESTObject
+
+from garuda.core.lib import GALRUCache
+
+logger = logging.getLogger('garuda.comm.rest.routes')
+
+
+class GARouteTable(object):
+    """ Routing information compiled once from a Monolithe SDK
+
+        The table maps every resource name to its rest name, knows the version prefix
+        of the SDK and which children each model accepts. It also keeps a bounded cache
+        of already resolved path shapes so that parsing a known route does not hit the
+        bambou model registry again.
+    """
+
+    def __init__(self, sdk, resource_mappings={'allalarms': 'alarms'}, cache_size=1024):
+        """
+        """
+        self._sdk = sdk
+        self._resource_mappings = resource_mappings
+        self._version = None
+        self._rest_names = {}
+        self._children = {}
+        self._shapes = GALRUCache(max_size=cache_size)
+
+        self._compile()
+
+    @property
+    def version(self):
+        """
+        """
+        return self._version
+
+    @property
+    def shapes(self):
+        """
+        """
+        return self._shapes
+
+    def rest_name_for_resource_name(self, resource_name):
+        """ Returns the rest name of the given resource name, or None if the SDK does not know it
+        """
+        if resource_name in self._resource_mappings:
+            resource_name = self._resource_mappings[resource_name]
+
+        if resource_name == 'events':
+            return 'event'
+
+        if resource_name == 'batch':
+            return 'batch'
+
+        return self._rest_names.get(resource_name)
+
+    def is_valid_child(self, parent_rest_name, child_rest_name):
+        """ Returns True if the model parent_rest_name has children of type child_rest_name
+        """
+        return child_rest_name in self._children.get(parent_rest_name, ())
+
+    def is_valid_route(self, resources):
+        """ Returns True if every resource of the given list is known, and if the parent accepts the child
+        """
+        if not resources or None in [resource.name for resource in resources]:
+            return False
+
+        if len(resources) == 2:
+            return self.is_valid_child(parent_rest_name=resources[0].name, child_rest_name=resources[1].name)
+
+        return True
+
+    def resolve_shape(self, resource_names):
+        """ Returns the tuple of rest names matching the given tuple of resource names
+        """
+        rest_names = self._shapes.get(resource_names)
+
+        if rest_names is None:
+            rest_names = tuple([self.rest_name_for_resource_name(resource_name) for resource_name in resource_names])
+            self._shapes.set(resource_names, rest_names)
+
+        return rest_names
+
+    # Utilities
+
+    def _compile(self):
+        """
+        """
+        sdk_info = getattr(self._sdk, 'SDKInfo', None)
+
+        if sdk_info:
+            self._version = 'v%s' % str(sdk_info.api_version()).replace('.', '_')
+
+        for name in getattr(self._sdk, '__all__', dir(self._sdk)):
+            klass = getattr(self._sdk, name, None)
+
+            if not inspect.isclass(klass) or not issubclass(klass, NURESTObject) or not getattr(klass, '__rest_name__', None):
+                continue
+
+            self._rest_names[klass.resource_name] = klass.rest_name
+            self._children[klass.rest_name] = frozenset(klass().children_rest_names)
+
+        logger.debug('Route table compiled for version %s with %d models' % (self._version, len(self._rest_names)))
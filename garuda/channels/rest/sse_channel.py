@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import falcon
+import json
+import time
+from base64 import urlsafe_b64decode
+
+from garuda.core.models import GAError, GAPluginManifest, GAPushNotification, GARequest
+from garuda.core.channels import GAChannel
+
+from .constants import RESTConstants
+from .falcon_channel import GAGUnicorn
+
+logger = logging.getLogger('garuda.comm.sse')
+
+
+class GASSEChannel(GAChannel):  # pragma: no cover
+    """ Push channel keeping one Server-Sent Events stream open per listening session
+
+        Clients authenticate once, either with the usual Authorization header or with a token
+        query parameter as EventSource cannot set headers, then receive every push notification
+        of their session on the same connection. A comment line is sent every heartbeat_interval
+        seconds when nothing happens, which also keeps the session alive.
+    """
+
+    def __init__(self, ssl_certificate='', ssl_key='', host='0.0.0.0', port=2001, heartbeat_interval=20, retry_interval=3, number_of_workers=None):
+        """
+        """
+        super(GASSEChannel, self).__init__()
+
+        self._host = host
+        self._port = port
+        self._heartbeat_interval = heartbeat_interval
+        self._retry_interval = retry_interval
+        self._number_of_workers = number_of_workers or 1
+        self._falcon = falcon.API()
+        self._falcon.add_sink(self._handle_requests)
+        self._server = GAGUnicorn(app=self._falcon,
+                                  host=self._host,
+                                  port=self._port,
+                                  ssl_certificate=ssl_certificate,
+                                  ssl_key=ssl_key,
+                                  number_of_workers=self._number_of_workers,
+                                  timeout=heartbeat_interval + 20,
+                                  worker_init=self._worker_init,
+                                  worker_exit=self._worker_exit)
+
+    def _worker_init(self, worker):
+        """
+        """
+        self.core_controller.start()
+
+    def _worker_exit(self, worker):
+        """
+        """
+        self.core_controller.stop()
+
+    @classmethod
+    def manifest(cls):
+        """
+        """
+        return GAPluginManifest(name='rest.sse', version=1.0, identifier="garuda.communicationchannels.rest.sse")
+
+    def run(self):
+        """
+        """
+        logger.info("Listening to inbound event streams on %s:%d" % (self._host, self._port))
+
+        try:
+            self._server.run()
+        except:
+            pass
+
+    def _handle_requests(self, http_request, http_response):
+        """
+        """
+        method = http_request.method.upper()
+
+        if method == RESTConstants.HTTP_OPTIONS:
+            self._set_cors_headers(http_response=http_response)
+            http_response.status = falcon.HTTP_204
+            return
+
+        if method != RESTConstants.HTTP_GET:
+            http_response.status = falcon.HTTP_405
+            self._set_cors_headers(http_response=http_response)
+            return
+
+        username, token = self._extract_auth(http_request)
+
+        logger.info('= %s %s from %s' % (http_request.method, http_request.path, http_request.host))
+
+        ga_request = GARequest(action=GARequest.ACTION_LISTENEVENTS,
+                               username=username,
+                               token=token,
+                               channel=self)
+
+        session, ga_response_failure = self.core_controller.execute_events_request(request=ga_request)
+
+        if ga_response_failure:
+            errors = [error.to_dict() for error in ga_response_failure.content]
+            http_response.status = falcon.HTTP_401
+            http_response.content_type = 'application/json'
+            http_response.body = json.dumps({'errors': [{'property': '', 'type': GAError.TYPE_UNAUTHORIZED, 'descriptions': errors}]})
+            self._set_cors_headers(http_response=http_response)
+            return
+
+        http_response.status = falcon.HTTP_200
+        http_response.content_type = 'text/event-stream'
+        http_response.set_header('Cache-Control', 'no-cache')
+        http_response.set_header('X-Accel-Buffering', 'no')
+        self._set_cors_headers(http_response=http_response)
+
+        http_response.stream = self._stream_events(session=session)
+
+    def _stream_events(self, session):
+        """ Yields the push notifications of the session as Server-Sent Events until the session disappears
+
+            The listening status is reset when the client goes away, as the server then closes the generator.
+        """
+        sessions_controller = self.core_controller.sessions_controller
+        push_controller = self.core_controller.push_controller
+
+        sessions_controller.set_session_listening_status(session=session, status=True)
+        last_refresh = time.time()
+
+        try:
+            yield 'retry: %d\n\n' % (self._retry_interval * 1000)
+
+            while True:
+
+                events = push_controller.wait_for_events(session=session, timeout=self._heartbeat_interval)
+
+                if len(events):
+                    yield self._format_notification(GAPushNotification(events=events))
+
+                elif not sessions_controller.is_session_alive(session=session):
+                    logger.debug('Session %s is gone, closing its event stream' % session.redis_key)
+                    break
+
+                else:
+                    yield ': keepalive\n\n'
+
+                if time.time() - last_refresh >= self._heartbeat_interval:
+                    sessions_controller.set_session_listening_status(session=session, status=True)
+                    last_refresh = time.time()
+
+        finally:
+            sessions_controller.set_session_listening_status(session=session, status=False)
+
+    def _format_notification(self, ga_notification):
+        """
+        """
+        return 'id: %s\nevent: notification\ndata: %s\n\n' % (ga_notification.uuid, json.dumps(ga_notification.to_dict()))
+
+    def _extract_auth(self, http_request):
+        """
+        """
+        if 'AUTHORIZATION' in http_request.headers:
+            encoded_auth = http_request.headers['AUTHORIZATION'][6:]  # XREST stuff
+            auth = urlsafe_b64decode(str(encoded_auth)).split(':')
+            return auth[0], auth[1]
+
+        return None, http_request.get_param('token')
+
+    def _set_cors_headers(self, http_response):
+        """
+        """
+        http_response.set_header('Access-Control-Allow-Origin', '*')
+        http_response.set_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        http_response.set_header('Access-Control-Allow-Headers', 'Authorization, Cache-Control, Last-Event-ID, X-Requested-With')
+        http_response.set_header('Access-Control-Allow-Credentials', 'true')
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import multiprocessing
+import time
+
+logger = logging.getLogger('garuda.comm.rest.workers')
+
+
+class GAWorkersTuner(object):
+    """ Sizes the number of gunicorn workers from the measured CPU usage of the node
+
+        Gevent workers already multiplex I/O with greenlets, so a worker per usable CPU is the baseline.
+        Time stolen by the hypervisor reduces the number of usable CPUs, and time spent waiting for
+        disk I/O, which blocks a whole worker, raises the number of workers up to twice the baseline.
+        When CPU times cannot be read, the classic (2 x cpus) + 1 formula is used.
+    """
+
+    PROC_STAT_PATH = '/proc/stat'
+
+    def __init__(self, sample_interval=1.0, min_workers=1, max_workers=None):
+        """
+        """
+        self._sample_interval = sample_interval
+        self._min_workers = min_workers
+        self._max_workers = max_workers if max_workers is not None else self.default_number_of_workers()
+
+    @classmethod
+    def default_number_of_workers(cls):
+        """
+        """
+        return (multiprocessing.cpu_count() * 2) + 1
+
+    def number_of_workers(self):
+        """ Samples the CPU times during sample_interval seconds and returns the number of workers to start
+        """
+        first = self._read_cpu_times()
+        time.sleep(self._sample_interval)
+        second = self._read_cpu_times()
+
+        if first is None or second is None:
+            logger.warn('Could not measure cpu times, using the default number of workers')
+            return self.default_number_of_workers()
+
+        deltas = dict((name, second[name] - first[name]) for name in first)
+        return self.number_of_workers_for_cpu_times(deltas)
+
+    def number_of_workers_for_cpu_times(self, cpu_times):
+        """ Returns the number of workers for the given cpu time deltas
+        """
+        busy = cpu_times['user'] + cpu_times['nice'] + cpu_times['system'] + cpu_times['irq'] + cpu_times['softirq']
+        total = busy + cpu_times['idle'] + cpu_times['iowait'] + cpu_times['steal']
+
+        if total <= 0:
+            return self.default_number_of_workers()
+
+        usable_cpus = max(1.0, multiprocessing.cpu_count() * (1.0 - float(cpu_times['steal']) / total))
+        blocking_ratio = min(1.0, float(cpu_times['iowait']) / busy) if busy > 0 else 0.0
+
+        number_of_workers = int(round(usable_cpus * (1.0 + blocking_ratio)))
+
+        logger.info('Measured %.2f usable cpu(s) and a blocking ratio of %.2f' % (usable_cpus, blocking_ratio))
+
+        return max(self._min_workers, min(self._max_workers, number_of_workers))
+
+    # Utilities
+
+    def _read_cpu_times(self):
+        """
+        """
+        try:
+            with open(self.PROC_STAT_PATH) as f:
+                values = [int(value) for value in f.readline().split()[1:9]]
+        except (IOError, ValueError):
+            return None
+
+        values += [0] * (8 - len(values))
+
+        return dict(zip(['user', 'nice', 'system', 'idle', 'iowait', 'irq', 'softirq', 'steal'], values))
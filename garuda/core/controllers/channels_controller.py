@@ -13,12 +13,13 @@ class GAChannelsController(object):
     """
 
     """
-    def __init__(self, garuda_uuid, channels, redis_info, additional_controller_classes, logic_plugins, authentication_plugins, storage_plugins, permission_plugins):
+    def __init__(self, garuda_uuid, channels, redis_info, additional_controller_classes, logic_plugins, authentication_plugins, storage_plugins, permission_plugins, push_options=None):
         """
         """
         self._garuda_uuid = garuda_uuid
         self._channels = channels
         self._redis_info = redis_info
+        self._push_options = push_options
         self._logic_plugins = logic_plugins
         self._authentication_plugins = authentication_plugins
         self._storage_plugins = storage_plugins
@@ -46,6 +47,12 @@ class GAChannelsController(object):
         """
         return self._redis_info
 
+    @property
+    def push_options(self):
+        """
+        """
+        return self._push_options
+
     @property
     def logic_plugins(self):
         """
@@ -103,7 +110,8 @@ class GAChannelsController(object):
                                     additional_controller_classes=self._additional_controller_classes,
                                     authentication_plugins=self._authentication_plugins,
                                     storage_plugins=self._storage_plugins,
-                                    permission_plugins=self._permission_plugins)
+                                    permission_plugins=self._permission_plugins,
+                                    push_options=self._push_options)
 
             channel.core_controller = core
             channel.did_fork()
@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 
 import logging
-import redis
 import os
 from uuid import uuid4
 
@@ -12,6 +11,7 @@ from .sessions_controller import GASessionsController
 from .permissions_controller import GAPermissionsController
 from .logic_controller import GALogicController
 
+from garuda.core.lib import GAConsistentHashRing, GAPubSubDispatcher, GARedisConnectionPool, GAShardedPipeline
 from garuda.core.models import GAContext, GAResponseFailure, GAResponseSuccess, GAError
 
 logger = logging.getLogger('garuda.core')
@@ -21,17 +21,26 @@ class GACoreController(object):
     """
 
     """
-    def __init__(self, garuda_uuid, redis_info, additional_controller_classes=[], authentication_plugins=[], logic_plugins=[], storage_plugins=[], permission_plugins=[]):
-        """
+    def __init__(self, garuda_uuid, redis_info, additional_controller_classes=[], authentication_plugins=[], logic_plugins=[], storage_plugins=[], permission_plugins=[], push_options=None):
+        """ Initializes the core controller
+
+            push_options is a dictionary of the keyword arguments given to the push controller.
         """
         self._uuid = str(uuid4())
         self._garuda_uuid = garuda_uuid
 
-        self._redis_host = redis_info['host']
-        self._redis_port = redis_info['port']
-        self._redis_db = redis_info['db']
-        self._redis = redis.StrictRedis(host=self._redis_host, port=self._redis_port, db=self._redis_db)
-        self._redis.config_set('notify-keyspace-events', 'KEA')
+        # redis_info can be a list of endpoints: the first one is the primary Redis, holding the
+        # indexes, the pub/sub channels and the fan-out queue, and all of them are shards for the
+        # sessions, the event queues and the permissions
+        redis_infos = redis_info if isinstance(redis_info, (list, tuple)) else [redis_info]
+
+        self._redis_host = redis_infos[0]['host']
+        self._redis_port = redis_infos[0]['port']
+        self._redis_db = redis_infos[0]['db']
+        self._redis_shards = [GARedisConnectionPool.redis(host=info['host'], port=info['port'], db=info['db'], max_connections=info.get('max_connections')) for info in redis_infos]
+        self._redis = self._redis_shards[0]
+        self._redis_ring = GAConsistentHashRing(nodes=[('%s:%s/%s' % (info['host'], info['port'], info['db']), shard) for info, shard in zip(redis_infos, self._redis_shards)])
+        self._pubsub_dispatcher = GAPubSubDispatcher.shared(redis=self._redis)
 
         self._running = False
 
@@ -43,7 +52,7 @@ class GACoreController(object):
         self._storage_controller = GAStorageController(plugins=storage_plugins, core_controller=self)
         self._sessions_controller = GASessionsController(plugins=authentication_plugins, core_controller=self)
         self._permissions_controller = GAPermissionsController(plugins=permission_plugins, core_controller=self)
-        self._push_controller = GAPushController(core_controller=self)
+        self._push_controller = GAPushController(core_controller=self, **(push_options or {}))
 
         self._logic_controller.ready()
         self._storage_controller.ready()
@@ -72,6 +81,31 @@ class GACoreController(object):
         """
         return self._redis
 
+    @property
+    def redis_shards(self):
+        """
+        """
+        return self._redis_shards
+
+    def redis_for_key(self, key):
+        """ Returns the Redis shard owning the given routing key
+        """
+        if len(self._redis_shards) == 1:
+            return self._redis
+
+        return self._redis_ring.get_node(key)
+
+    def sharded_pipeline(self, transaction=False):
+        """ Returns a pipeline spanning all the Redis shards
+        """
+        return GAShardedPipeline(redis=self._redis, redis_for_key=self.redis_for_key, transaction=transaction)
+
+    @property
+    def pubsub_dispatcher(self):
+        """
+        """
+        return self._pubsub_dispatcher
+
     @property
     def redis_host(self):
         """
@@ -142,6 +176,7 @@ class GACoreController(object):
         logger.debug('Starting core controller %s with pid %s' % (self.uuid, os.getpid()))
         self.push_controller.start()
         self.sessions_controller.start()
+        self.permissions_controller.start()
 
         for additional_controller in self._additional_controllers.values():
             additional_controller.start()
@@ -159,25 +194,36 @@ class GACoreController(object):
         for additional_controller in self._additional_controllers.values():
             additional_controller.stop()
 
+        self.permissions_controller.stop()
         self.sessions_controller.stop()
         self.push_controller.stop()
 
     def execute_model_request(self, request):
         """
         """
-        session_uuid = self.sessions_controller.extract_session_identifier(request=request)
-        session = None
+        with request.timings.measure('session'):
+            session_uuid = self.sessions_controller.extract_session_identifier(request=request)
+            session = None
 
-        logger.debug("finding session: %s" % session_uuid)
-        if session_uuid:
-            session = self.sessions_controller.get_session(session_uuid=session_uuid)
+            logger.debug("finding session: %s" % session_uuid)
+            if session_uuid:
+                session = self.sessions_controller.get_session(session_uuid=session_uuid)
 
         if not session:
-            session = self.sessions_controller.create_session(request=request)
+            with request.timings.measure('login'):
+                session = self.sessions_controller.create_session(request=request)
 
             if session:
                 return GAResponseSuccess(content=[session.root_object])
 
+            if self.sessions_controller.is_authentication_throttled(request=request):
+                context = GAContext(session=None, request=request)
+                context.add_error(GAError(type=GAError.TYPE_TOOMANYREQUESTS,
+                                          title='Too many authentication attempts',
+                                          description='Too many failed authentication attempts were made. Please retry later.'))
+
+                return GAResponseFailure(content=context.errors)
+
         context = GAContext(session=session, request=request)
 
         if not session:
@@ -190,17 +236,21 @@ class GACoreController(object):
             return GAResponseFailure(content=context.errors)
 
         # reset the session ttl
-        self.sessions_controller.reset_session_ttl(session)
+        with request.timings.measure('ttl'):
+            self.sessions_controller.reset_session_ttl(session)
 
         logger.debug('Execute action %s on session UUID=%s' % (request.action, session_uuid))
 
         operations_controller = GAOperationsController(context=context, logic_controller=self.logic_controller, storage_controller=self.storage_controller)
-        operations_controller.run()
+
+        with self.permissions_controller.decisions_scope():
+            operations_controller.run()
 
         response = context.make_response()
 
         if len(context.events) > 0:  # pragma: no cover
-            self.push_controller.push_events(events=context.events)
+            with request.timings.measure('push'):
+                self.push_controller.queue_events(events=context.events)
 
         return response
 
@@ -223,3 +273,49 @@ class GACoreController(object):
         self.sessions_controller.reset_session_ttl(session)
 
         return (session, None)
+
+    def execute_batch_request(self, request, sub_requests):
+        """ Executes the given sub requests under the session of the given request
+
+            The session is resolved and its ttl is reset only once, and the events of all
+            the sub requests are queued at once. Returns the list of responses, one per
+            sub request, and a response failure if the session is not valid.
+        """
+        with request.timings.measure('session'):
+            session_uuid = self.sessions_controller.extract_session_identifier(request=request)
+            session = self.sessions_controller.get_session(session_uuid=session_uuid) if session_uuid else None
+
+        if not session:
+            context = GAContext(session=session, request=request)
+            error = GAError(type=GAError.TYPE_UNAUTHORIZED,
+                            title='Unauthorized access',
+                            description='Could not grant access. Please log in.')
+
+            context.add_error(error)
+            return (None, GAResponseFailure(content=context.errors))
+
+        # reset the session ttl
+        with request.timings.measure('ttl'):
+            self.sessions_controller.reset_session_ttl(session)
+
+        logger.debug('Execute batch of %d request(s) on session UUID=%s' % (len(sub_requests), session_uuid))
+
+        responses = []
+        events = []
+
+        with self.permissions_controller.decisions_scope():
+
+            for sub_request in sub_requests:
+                context = GAContext(session=session, request=sub_request)
+
+                operations_controller = GAOperationsController(context=context, logic_controller=self.logic_controller, storage_controller=self.storage_controller)
+                operations_controller.run()
+
+                responses.append(context.make_response())
+                events.extend(context.events)
+
+        if len(events) > 0:  # pragma: no cover
+            with request.timings.measure('push'):
+                self.push_controller.queue_events(events=events)
+
+        return (responses, None)
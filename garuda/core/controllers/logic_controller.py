@@ -52,6 +52,11 @@ class GALogicController(GAPluginController):
 
         return self._managing_plugin_registry[key]
 
+    def has_managing_plugins(self, resource_name, action):
+        """
+        """
+        return len(self._managing_plugins(resource_name=resource_name, action=action)) > 0
+
     def perform_delegate(self, delegate, context):
         """
         """
@@ -61,9 +66,10 @@ class GALogicController(GAPluginController):
             return
 
         # result = []
-        for plugin in plugins:
-            # result.append(self._perform_delegate(plugin, delegate, context))
-            context = self._perform_delegate(plugin, delegate, context)
+        with context.timings.measure('logic'):
+            for plugin in plugins:
+                # result.append(self._perform_delegate(plugin, delegate, context))
+                context = self._perform_delegate(plugin, delegate, context)
 
         # result = self._thread_manager.start(self._perform_delegate,
         #                                        elements=plugins,
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+from garuda.core.lib import GAEntityTag
 from garuda.core.models import GARequest, GAError, GAPushEvent
 
 
@@ -30,9 +31,11 @@ class GAOperationsController(object):
 
         if len(resources) == 2:
             parent_resource = resources[0]
-            response = self.storage_controller.get(user_identifier=self.user_identifier,
-                                                   resource_name=parent_resource.name,
-                                                   identifier=parent_resource.value)
+
+            with self.context.timings.measure('parent'):
+                response = self.storage_controller.get(user_identifier=self.user_identifier,
+                                                       resource_name=parent_resource.name,
+                                                       identifier=parent_resource.value)
 
             if response.has_errors:
                 self.context.add_errors(response.errors)
@@ -40,6 +43,9 @@ class GAOperationsController(object):
 
             self.context.parent_object = response.data
 
+        if action in (GARequest.ACTION_READ, GARequest.ACTION_READALL) and self.context.request.is_conditional and self._is_client_representation_fresh():
+            return
+
         if action is GARequest.ACTION_READALL:
             self._perform_readall_operation(count_only=False)
 
@@ -64,9 +70,10 @@ class GAOperationsController(object):
         """
         if not self.context.parent_object and (self.context.object and self.context.object.parent_type and self.context.object.parent_id):
 
-            response = self.storage_controller.get(user_identifier=self.user_identifier,
-                                                   resource_name=self.context.object.parent_type,
-                                                   identifier=self.context.object.parent_id)
+            with self.context.timings.measure('parent'):
+                response = self.storage_controller.get(user_identifier=self.user_identifier,
+                                                       resource_name=self.context.object.parent_type,
+                                                       identifier=self.context.object.parent_id)
 
             if response.has_errors:
                 self.context.add_errors(response.errors)
@@ -74,6 +81,64 @@ class GAOperationsController(object):
 
             self.context.parent_object = response.data
 
+    # VALIDATORS
+
+    def _validators_salt(self, total_count):
+        """
+        """
+        if self.context.request.action != GARequest.ACTION_READALL:
+            return ''
+
+        request = self.context.request
+        return '%s:%s:%s:%s:%s' % (total_count, request.page, request.page_size, request.filter, request.order_by)
+
+    def _update_validators(self, fingerprints, total_count):
+        """
+        """
+        request = self.context.request
+        is_readall = request.action == GARequest.ACTION_READALL
+
+        # the most recent date of a page does not change when one of its objects is deleted, or when
+        # an older object enters it, so collections are only validated by their ETag
+        self.context.etag = GAEntityTag.compute(fingerprints=fingerprints, salt=self._validators_salt(total_count=total_count))
+        self.context.last_modified = GAEntityTag.last_modified(fingerprints=fingerprints) if not is_readall else None
+        self.context.not_modified = GAEntityTag.is_not_modified(etag=self.context.etag,
+                                                                last_modified=self.context.last_modified,
+                                                                if_none_match=request.if_none_match,
+                                                                if_modified_since=request.if_modified_since if not is_readall else None)
+
+    def _is_client_representation_fresh(self):
+        """ Uses the storage to check the validators of the client without fetching the objects
+
+            This is skipped when logic plugins manage the request, as they may alter the objects.
+        """
+        request = self.context.request
+        resource = request.resources[-1]
+
+        if self.logic_controller.has_managing_plugins(resource_name=resource.name, action=request.action):
+            return False
+
+        with self.context.timings.measure('validators'):
+            response = self.storage_controller.get_last_updated_dates(user_identifier=self.user_identifier,
+                                                                      resource_name=resource.name,
+                                                                      identifier=resource.value if request.action == GARequest.ACTION_READ else None,
+                                                                      parent=self.context.parent_object,
+                                                                      page=request.page,
+                                                                      page_size=request.page_size,
+                                                                      filter=request.filter,
+                                                                      order_by=request.order_by)
+
+        if not response or response.has_errors:
+            return False
+
+        self._update_validators(fingerprints=response.data, total_count=response.count)
+
+        if not self.context.not_modified:
+            return False
+
+        self.context.total_count = response.count
+        return True
+
     # READ OPERATIONS
 
     def _prepare_context_for_read_operation(self):
@@ -95,7 +160,8 @@ class GAOperationsController(object):
         """
         """
         if self.context.object is None:
-            self._prepare_context_for_read_operation()
+            with self.context.timings.measure('storage'):
+                self._prepare_context_for_read_operation()
 
         if self.context.has_errors:
             return
@@ -109,6 +175,9 @@ class GAOperationsController(object):
 
         self.logic_controller.perform_delegate(delegate='did_perform_read', context=self.context)
 
+        if not self.context.has_errors and self.context.object:
+            self._update_validators(fingerprints=GAEntityTag.fingerprints([self.context.object]), total_count=None)
+
     # READALL OPERATIONS
 
     def _prepare_context_for_readall_operation(self, count_only):
@@ -134,7 +203,8 @@ class GAOperationsController(object):
                                                         page=self.context.request.page,
                                                         page_size=self.context.request.page_size,
                                                         filter=self.context.request.filter,
-                                                        order_by=self.context.request.order_by)
+                                                        order_by=self.context.request.order_by,
+                                                        stream=self.context.request.stream)
 
              if response.has_errors:
                  self.context.add_errors(response.errors)
@@ -146,7 +216,8 @@ class GAOperationsController(object):
     def _perform_readall_operation(self, count_only):
         """
         """
-        self._prepare_context_for_readall_operation(count_only)
+        with self.context.timings.measure('storage'):
+            self._prepare_context_for_readall_operation(count_only)
 
         if self.context.has_errors:
             return
@@ -160,6 +231,9 @@ class GAOperationsController(object):
 
         self.logic_controller.perform_delegate(delegate='did_perform_readall', context=self.context)
 
+        if not count_only and not self.context.has_errors and isinstance(self.context.objects, list):
+            self._update_validators(fingerprints=GAEntityTag.fingerprints(self.context.objects), total_count=self.context.total_count)
+
     # WRITE OPERATIONS
 
     def _populate_context_for_create_with_resource(self, resource):
@@ -243,7 +317,8 @@ class GAOperationsController(object):
     def _perform_write_operation(self):
         """
         """
-        self._prepare_context_for_write_operation()
+        with self.context.timings.measure('storage'):
+            self._prepare_context_for_write_operation()
 
         if self.context.has_errors:
             return
@@ -258,7 +333,8 @@ class GAOperationsController(object):
         if self.context.has_errors:
             return
 
-        self._perform_store()
+        with self.context.timings.measure('storage'):
+            self._perform_store()
 
         if self.context.has_errors:
             return
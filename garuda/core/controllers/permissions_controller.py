@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*-
 
 import logging
+import os
+import threading
+from contextlib import contextmanager
 from uuid import uuid4
 
+from garuda.core.lib import GALRUCache
 from garuda.core.models import GAPluginController
 from garuda.core.plugins import GAPermissionsPlugin
 
@@ -11,14 +15,27 @@ logger = logging.getLogger('garuda.controller.authentication')
 
 
 class GAPermissionsController(GAPluginController):
-    """
+    """ Routes the permission operations to the managing plugin, and caches its decisions
+
+        Inside a decisions_scope, typically a request, every decision is computed only once. When
+        _decisions_cache_ttl is set, decisions are also cached by the process for that many seconds.
+        Creating or removing permissions invalidates the cached decisions of every process.
     """
 
+    INVALIDATIONS_CHANNEL = 'permissions:invalidations'
+    ALL_RESOURCES = '*'
+
     def __init__(self, plugins, core_controller):
         """
         """
         super(GAPermissionsController, self).__init__(core_controller=core_controller, plugins=plugins)
         self._managing_plugin_registry = {}
+        self._decisions_cache_ttl = None
+        self._decisions_cache = GALRUCache(max_size=10000)
+        self._local = threading.local()
+        self._sender = None
+
+        self.subscribe(channel=self.INVALIDATIONS_CHANNEL, handler=self._on_decisions_invalidation)
 
     @classmethod
     def identifier(cls):
@@ -32,6 +49,17 @@ class GAPermissionsController(GAPluginController):
         """
         return GAPermissionsPlugin
 
+    def start(self):
+        """
+        """
+        self.start_listening_to_events()
+
+    def stop(self):
+        """
+        """
+        self.stop_listening_to_events()
+        self._decisions_cache.clear()
+
     # API
 
     def _managing_plugin(self):
@@ -48,31 +76,74 @@ class GAPermissionsController(GAPluginController):
         """
         """
         plugin = self._managing_plugin()
-        return plugin.create_permission(resource=resource, target=target, permission=permission, explicit=explicit, parent_permission_id=parent_permission_id) if plugin else None
+        result = plugin.create_permission(resource=resource, target=target, permission=permission, explicit=explicit, parent_permission_id=parent_permission_id) if plugin else None
+
+        self.invalidate_decisions(resource=resource)
+
+        return result
 
     def remove_permission(self, resource, target, permission):
         """
         """
         plugin = self._managing_plugin()
-        return plugin.remove_permission(resource=resource, target=target, permission=permission) if plugin else None
+        result = plugin.remove_permission(resource=resource, target=target, permission=permission) if plugin else None
+
+        self.invalidate_decisions(resource=resource)
+
+        return result
 
     def remove_all_permissions_of_resource(self, resource):
         """
         """
         plugin = self._managing_plugin()
-        return plugin.remove_all_permissions_of_resource(resource=resource) if plugin else None
+        result = plugin.remove_all_permissions_of_resource(resource=resource) if plugin else None
+
+        self.invalidate_decisions(resource=resource)
+
+        return result
 
     def remove_all_permissions_for_target_ids(self, target_ids):
         """
         """
         plugin = self._managing_plugin()
-        return plugin.remove_all_permissions_for_target_ids(target_ids=target_ids) if plugin else None
+        result = plugin.remove_all_permissions_for_target_ids(target_ids=target_ids) if plugin else None
+
+        self.invalidate_decisions()
+
+        return result
 
     def has_permission(self, resource, target, permission, explicit_only=False):
         """
         """
         plugin = self._managing_plugin()
-        return plugin.has_permission(resource=resource, target=target, permission=permission, explicit_only=explicit_only) if plugin else None
+
+        if not plugin:
+            return None
+
+        resource_id = self._resource_id(resource)
+        decision_key = (resource_id, target.rest_name, target.id, permission, explicit_only)
+        cacheable = target.id is not None
+        scope_decisions = getattr(self._local, 'decisions', None)
+
+        if cacheable and scope_decisions is not None and decision_key in scope_decisions:
+            return scope_decisions[decision_key]
+
+        # the decisions of the resource are fetched before computing the decision, so an invalidation
+        # received meanwhile drops them, along with the decision about to be computed
+        process_decisions = self._process_decisions(resource_id) if cacheable else None
+
+        if process_decisions is not None and decision_key in process_decisions:
+            decision = process_decisions[decision_key]
+        else:
+            decision = plugin.has_permission(resource=resource, target=target, permission=permission, explicit_only=explicit_only)
+
+            if process_decisions is not None:
+                process_decisions[decision_key] = decision
+
+        if cacheable and scope_decisions is not None:
+            scope_decisions[decision_key] = decision
+
+        return decision
 
     def child_ids_with_permission(self, resource, parent, children_type, permission=None):
         """
@@ -85,3 +156,85 @@ class GAPermissionsController(GAPluginController):
         """
         plugin = self._managing_plugin()
         return plugin.is_empty() if plugin else True
+
+    # Decisions cache
+
+    @contextmanager
+    def decisions_scope(self):
+        """ Caches the decisions taken in the block, in the current thread. Nested scopes share the outermost one
+
+            Example:
+                with permissions_controller.decisions_scope():
+                    ...
+        """
+        if getattr(self._local, 'decisions', None) is not None:
+            yield
+            return
+
+        self._local.decisions = {}
+
+        try:
+            yield
+        finally:
+            self._local.decisions = None
+
+    def invalidate_decisions(self, resource=None):
+        """ Drops the cached decisions about the given resource, or about all resources, in every process
+        """
+        resource_id = self._resource_id(resource) if resource is not None else self.ALL_RESOURCES
+
+        self._drop_decisions(resource_id)
+        self.publish(channel=self.INVALIDATIONS_CHANNEL, data='%s %s' % (self._sender_identifier(), resource_id))
+
+    # Utilities
+
+    def _resource_id(self, resource):
+        """
+        """
+        return str(resource.id if hasattr(resource, 'id') else resource)
+
+    def _process_decisions(self, resource_id):
+        """ Returns the decisions cached by the process about the given resource, or None if the process cache is disabled
+        """
+        if not self._decisions_cache_ttl or not self.listening:
+            return None
+
+        decisions = self._decisions_cache.get(resource_id)
+
+        if decisions is None:
+            decisions = {}
+            self._decisions_cache.set(resource_id, decisions, ttl=self._decisions_cache_ttl)
+
+        return decisions
+
+    def _sender_identifier(self):
+        """ Returns the identifier of this controller in the current process
+
+            The controllers are created before the workers are forked, so they share their uuid. A new
+            identifier is drawn in every process, so a worker only ignores the invalidations it sent itself.
+        """
+        pid = os.getpid()
+
+        if self._sender is None or self._sender[0] != pid:
+            self._sender = (pid, str(uuid4()))
+
+        return self._sender[1]
+
+    def _on_decisions_invalidation(self, data):
+        """
+        """
+        sender, resource_id = data.split(' ', 1)
+
+        if sender != self._sender_identifier():
+            self._drop_decisions(resource_id)
+
+    def _drop_decisions(self, resource_id):
+        """
+        """
+        if getattr(self._local, 'decisions', None) is not None:
+            self._local.decisions.clear()
+
+        if resource_id == self.ALL_RESOURCES:
+            self._decisions_cache.clear()
+        else:
+            self._decisions_cache.delete(resource_id)
@@ -2,7 +2,11 @@
 
 import logging
 import msgpack
+import os
+import threading
+import time
 
+from garuda.core.lib import GAThreadManager
 from garuda.core.models import GAPushEvent, GAResource, GARequest, GAContext, GAController
 from .operations_controller import GAOperationsController
 
@@ -14,40 +18,195 @@ class GAPushController(GAController):
 
     """
 
+    NOTIFICATIONS_CHANNEL = 'eventqueue:notifications'
+    FAN_OUT_QUEUE_KEY = 'pushqueue:pending'
+    FAN_OUT_PROCESSING_KEY = 'pushqueue:processing'
+    FAN_OUT_PROCESSING_INDEX_KEY = 'index:pushqueue:processing'
+    FAN_OUT_WORKER_KEY = 'pushqueue:worker'
+
+    OVERFLOW_POLICY_DROP_OLDEST = 'DROP_OLDEST'
+    OVERFLOW_POLICY_REFETCH = 'REFETCH'
+
+    def __init__(self, core_controller, coalesce_events=False, max_event_queue_length=1000, event_queue_ttl=600,
+                 event_queue_overflow_policy=OVERFLOW_POLICY_DROP_OLDEST, number_of_fan_out_workers=2):
+        """ Initializes the push controller
+
+            Args:
+                coalesce_events: if True, only the last event about an entity is pushed to the event queues
+                max_event_queue_length: the maximum number of events kept in the event queue of a session
+                event_queue_ttl: the number of seconds an event queue is kept once it is not fed anymore
+                event_queue_overflow_policy: OVERFLOW_POLICY_DROP_OLDEST or OVERFLOW_POLICY_REFETCH
+                number_of_fan_out_workers: the number of fan-out threads. If 0, events are pushed synchronously
+        """
+        if event_queue_overflow_policy not in (self.OVERFLOW_POLICY_DROP_OLDEST, self.OVERFLOW_POLICY_REFETCH):
+            raise ValueError('unknown event queue overflow policy %s' % event_queue_overflow_policy)
+
+        super(GAPushController, self).__init__(core_controller=core_controller)
+
+        self._waiters = {}
+        self._waiters_lock = threading.Lock()
+
+        self._coalesce_events = coalesce_events
+        self._max_event_queue_length = max_event_queue_length
+        self._event_queue_ttl = event_queue_ttl
+        self._event_queue_overflow_policy = event_queue_overflow_policy
+
+        self._number_of_fan_out_workers = number_of_fan_out_workers
+        self._fan_out_poll_timeout = 1
+        self._fan_out_lag_warning_threshold = 1.0
+        self._fan_out_worker_ttl = 10
+        self._fan_out_max_attempts = 3
+        self._push_batch_size = 100
+        self._fan_out_running = False
+        self._fan_out_threads = []
+        self._fan_out_metrics_lock = threading.Lock()
+        self._reset_fan_out_metrics()
+
+        self.subscribe(channel=self.NOTIFICATIONS_CHANNEL, handler=self._on_event_queue_notification)
+
     @classmethod
     def identifier(cls):
         """
         """
         return 'garuda.controller.push'
 
-    def push_events(self, events):
+    def start(self):
         """
         """
-        pipeline = self.redis.pipeline()
+        self.start_listening_to_events()
+        self._start_fan_out_workers()
+
+    def stop(self):
+        """
+        """
+        self._stop_fan_out_workers()
+        self.stop_listening_to_events()
+        self._wake_up_all_waiters()
+
+    def queue_events(self, events):
+        """ Queues the given events to be pushed by the fan-out workers, and returns immediately
+
+            The events are stored in a Redis list, so they survive the process that raised them
+            and are fanned out by any running garuda worker. Every fan-out worker atomically moves
+            the batch it processes to its own processing list, and removes it only once pushed, so
+            a batch is retried if pushing it fails, and requeued if the worker dies. When no fan-out
+            worker runs in this process, the events are pushed synchronously.
+        """
+        if not self._fan_out_running:
+            self.push_events(events=events)
+            return
+
+        pack = msgpack.packb({'enqueuedAt': time.time(), 'events': [event.to_dict() for event in events]})
+
+        logger.debug('Queuing %d event(s) for fan-out' % len(events))
+        self.redis.lpush(self.FAN_OUT_QUEUE_KEY, pack)
+
+    def fan_out_metrics(self):
+        """ Returns the fan-out lag metrics, in seconds, along with the number of pending event batches
+        """
+        with self._fan_out_metrics_lock:
+            metrics = dict(self._fan_out_metrics)
 
-        # we loop on every system wide sessions
-        for session in self.core_controller.sessions_controller.get_all_sessions():
+        metrics['average_lag'] = metrics['total_lag'] / metrics['processed'] if metrics['processed'] else 0.0
+        metrics['pending'] = self.redis.llen(self.FAN_OUT_QUEUE_KEY)
 
+        del metrics['total_lag']
+
+        return metrics
+
+    def push_events(self, events, skipped_users=None, progress_callback=None):
+        """ Pushes the given events to the event queues of the listening sessions allowed to read them
+
+            The event queues are fed by batches of users, so that a failure only loses the current batch.
+
+            Args:
+                events: the events to push
+                skipped_users: the identifiers of the users the events were already pushed to
+                progress_callback: called between users with the identifiers of the users the events are pushed to so far
+        """
+        if self._coalesce_events:
+            events = self.coalesce_events(events)
+
+        pipeline = self.core_controller.sharded_pipeline(transaction=True)
+        overflow_candidates = []
+        pushed_users = []
+        pending_users = []
+
+        # we loop on the users that have listening sessions
+        for user_identifier, session_keys in self.core_controller.sessions_controller.get_listening_session_keys_by_user().items():
+
+            if skipped_users and user_identifier in skipped_users:
+                continue
+
+            if len(pending_users) >= self._push_batch_size:
+                self._execute_push_pipeline(pipeline=pipeline, overflow_candidates=overflow_candidates)
+                pushed_users.extend(pending_users)
+
+                pipeline = self.core_controller.sharded_pipeline(transaction=True)
+                overflow_candidates = []
+                pending_users = []
+
+            if progress_callback:
+                progress_callback(pushed_users)
+
+            pending_users.append(user_identifier)
             session_events = []
 
-            # for every objects in the events, we check that the session's user has a permission
+            # for every objects in the events, we check once that the user has a permission
             # and if so, we add the permitted objects to the session_events list
-            for event in events:
-                if self.core_controller.permissions_controller.has_permission(resource=session.root_object.id, target=event.entity, permission='read'):
-                    session_events.append(event)
+            with self.core_controller.permissions_controller.decisions_scope():
+                for event in events:
+                    if self.core_controller.permissions_controller.has_permission(resource=user_identifier, target=event.entity, permission='read'):
+                        session_events.append(event)
 
             # Then, if there is at least one permitted entity in the events list, we pack them
-            # and plublish it to the redis pipeline
+            # and plublish them to the queue of every listening session of the user
             if len(session_events):
                 packs = [msgpack.packb(session_event.to_dict()) for session_event in session_events]
-                event_queue_key = 'eventqueue:%s' % session.redis_key
-                logger.debug('Adding %d event pack(s) to the session event queue: %s' % (len(events), event_queue_key))
-                pipeline.lpush(event_queue_key, *packs)
 
-        # Finally we execute the redis pipeline
-        logger.debug('Executing event queue command pipeline...')
+                for session_key in session_keys:
+                    event_queue_key = 'eventqueue:%s' % session_key
+                    logger.debug('Adding %d event pack(s) to the session event queue: %s' % (len(packs), event_queue_key))
+                    shard_pipeline = pipeline.for_key(session_key)
+
+                    if self._event_queue_overflow_policy == self.OVERFLOW_POLICY_REFETCH:
+                        overflow_candidates.append((session_key, pipeline.position(session_key), session_events[-1]))
+
+                    shard_pipeline.lpush(event_queue_key, *packs)
+
+                    if self._event_queue_overflow_policy != self.OVERFLOW_POLICY_REFETCH:
+                        shard_pipeline.ltrim(event_queue_key, 0, self._max_event_queue_length - 1)
+
+                    shard_pipeline.expire(event_queue_key, self._event_queue_ttl)
+                    pipeline.publish(self.NOTIFICATIONS_CHANNEL, session_key)
+
+        # Finally we execute the redis pipeline of the last batch
+        self._execute_push_pipeline(pipeline=pipeline, overflow_candidates=overflow_candidates)
+        pushed_users.extend(pending_users)
+
+        if progress_callback:
+            progress_callback(pushed_users)
+
+    def get_event_queue_depth(self, session):
+        """
+        """
+        return self.redis_for_key(session.redis_key).llen('eventqueue:%s' % session.redis_key)
+
+    def get_event_queue_depths(self):
+        """ Returns the number of pending events of every listening session, by session key
+        """
+        session_keys = [session_key for keys in self.core_controller.sessions_controller.get_listening_session_keys_by_user().values() for session_key in keys]
+
+        pipeline = self.core_controller.sharded_pipeline()
+        positions = []
+
+        for session_key in session_keys:
+            positions.append(pipeline.position(session_key))
+            pipeline.for_key(session_key).llen('eventqueue:%s' % session_key)
+
         pipeline.execute()
-        logger.debug('Event queue command pipeline executed')
+
+        return dict((session_key, pipeline.result(session_key, position)) for session_key, position in zip(session_keys, positions))
 
     def get_next_event(self, session, timeout=None):
         """
@@ -56,7 +215,7 @@ class GAPushController(GAController):
 
         logger.debug('Waiting for event to be popped out of event queue: %s' % event_queue_key)
 
-        blob = self.redis.brpop([event_queue_key], timeout=timeout)
+        blob = self.redis_for_key(session.redis_key).brpop([event_queue_key], timeout=timeout)
 
         logger.debug('Popping one event from the session event queue %s' % event_queue_key)
 
@@ -64,7 +223,7 @@ class GAPushController(GAController):
             return
 
         key, pack = blob
-        event = GAPushEvent.from_dict(data=msgpack.unpackb(pack))
+        event = self._event_from_pack(pack)
         resources = [GAResource(name=event.entity.rest_name, value=event.entity.id)]
         request = GARequest(action=GARequest.ACTION_READ, resources=resources)
         context = GAContext(request=request, session=session)
@@ -79,12 +238,338 @@ class GAPushController(GAController):
         #     logger.debug('Returning one event to session %s' % session.redis_key)
         return event
 
+    def wait_for_events(self, session, timeout=None, max_events=100, linger=0):
+        """ Returns the next events of the session, waiting at most timeout seconds for one to come
+
+            Waiting does not hold any Redis connection: the dispatcher of the process receives
+            a notification for every filled event queue on a single pubsub connection, and only
+            wakes up the waiters of the matching session. Once an event is available, the call
+            waits linger more seconds to let a burst of events build up, then drains up to
+            max_events events in a single round trip. When coalescing is enabled, the drained
+            events are coalesced before being returned.
+        """
+        waiter = threading.Event()
+        self._add_waiter(session_key=session.redis_key, waiter=waiter)
+
+        try:
+            if not self.get_event_queue_depth(session=session) and not waiter.wait(timeout):
+                return []
+
+            if linger:
+                time.sleep(linger)
+
+            events = self._pop_events(session=session, max_events=max_events)
+
+            return self.coalesce_events(events) if self._coalesce_events else events
+
+        finally:
+            self._remove_waiter(session_key=session.redis_key, waiter=waiter)
+
+    def coalesce_events(self, events):
+        """ Merges the given events, ordered from the oldest to the newest, that concern the same entity
+
+            The latest UPDATE of an entity wins over its previous CREATE or UPDATE, a DELETE replaces
+            the previous UPDATE of an entity, and a CREATE followed by a DELETE cancel out. Merged events
+            take the place of the newest one. Events of other actions are left untouched.
+        """
+        coalesced = []
+        pending = {}
+
+        for event in events:
+            entity = event.entity
+            key = (event.entity_type, entity.id) if entity is not None and entity.id else None
+            previous = pending.get(key) if key else None
+
+            if previous is None or previous.action not in (GARequest.ACTION_CREATE, GARequest.ACTION_UPDATE):
+                coalesced.append(event)
+
+                if key:
+                    pending[key] = event
+
+                continue
+
+            if event.action == GARequest.ACTION_UPDATE:
+                event.action = previous.action
+
+            elif event.action != GARequest.ACTION_DELETE:
+                coalesced.append(event)
+                pending[key] = event
+                continue
+
+            coalesced.remove(previous)
+
+            if event.action == GARequest.ACTION_DELETE and previous.action == GARequest.ACTION_CREATE:
+                del pending[key]
+                continue
+
+            coalesced.append(event)
+            pending[key] = event
+
+        if len(coalesced) != len(events):
+            logger.debug('Coalesced %d event(s) into %d' % (len(events), len(coalesced)))
+
+        return coalesced
+
     def is_event_queue_empty(self, session):
         """
         """
-        return self.redis.llen('eventqueue:%s' % session.redis_key) == 0
+        return self.get_event_queue_depth(session=session) == 0
 
     def delete_event_queue(self, session_key):
         """
         """
-        self.redis.delete('eventqueue:%s' % session_key)
+        self.redis_for_key(session_key).delete('eventqueue:%s' % session_key)
+
+    def delete_event_queues(self, session_keys, pipeline=None):
+        """ Deletes the event queues of the given sessions. If a sharded pipeline is given, it is up to the caller to execute it
+        """
+        execute = pipeline is None
+
+        if execute:
+            pipeline = self.core_controller.sharded_pipeline()
+
+        for session_key in session_keys:
+            pipeline.for_key(session_key).delete('eventqueue:%s' % session_key)
+
+        if execute:
+            pipeline.execute()
+
+    # Utilities
+
+    def _execute_push_pipeline(self, pipeline, overflow_candidates):
+        """ Executes the given sharded pipeline feeding event queues, and handles the queues it overflowed
+        """
+        logger.debug('Executing event queue command pipeline...')
+        pipeline.execute()
+        logger.debug('Event queue command pipeline executed')
+
+        overflowed_queues = [(session_key, last_event) for session_key, position, last_event in overflow_candidates if pipeline.result(session_key, position) > self._max_event_queue_length]
+
+        if len(overflowed_queues):
+            self._replace_event_queues_with_refetch(overflowed_queues)
+
+    def _replace_event_queues_with_refetch(self, overflowed_queues):
+        """ Replaces the backlog of the given overflowed event queues with a single REFETCH event
+        """
+        pipeline = self.core_controller.sharded_pipeline()
+
+        for session_key, last_event in overflowed_queues:
+            event_queue_key = 'eventqueue:%s' % session_key
+            shard_pipeline = pipeline.for_key(session_key)
+
+            logger.warn('Event queue %s overflowed, replacing its backlog with a refetch event' % event_queue_key)
+
+            refetch_event = GAPushEvent(action=last_event.action, entity=last_event.entity)
+            refetch_event.update_mechanism = GAPushEvent.UPDATE_MECHANISM_REFETCH
+
+            shard_pipeline.delete(event_queue_key)
+            shard_pipeline.lpush(event_queue_key, msgpack.packb(refetch_event.to_dict()))
+            shard_pipeline.expire(event_queue_key, self._event_queue_ttl)
+
+        pipeline.execute()
+
+    def _start_fan_out_workers(self):
+        """
+        """
+        if self._fan_out_running or self._number_of_fan_out_workers <= 0:
+            return
+
+        self._requeue_orphaned_fan_out_batches()
+
+        self._fan_out_running = True
+        self._fan_out_threads = [GAThreadManager.start_thread(self._fan_out_loop, worker_name='%s:%s:%d' % (self.uuid, os.getpid(), index))
+                                 for index in range(self._number_of_fan_out_workers)]
+
+    def _stop_fan_out_workers(self):
+        """
+        """
+        if not self._fan_out_running:
+            return
+
+        self._fan_out_running = False
+
+        for thread in self._fan_out_threads:
+            thread.join(timeout=self._fan_out_poll_timeout + 1)
+
+        self._fan_out_threads = []
+
+    def _fan_out_loop(self, worker_name):
+        """
+        """
+        processing_key = '%s:%s' % (self.FAN_OUT_PROCESSING_KEY, worker_name)
+        worker_key = '%s:%s' % (self.FAN_OUT_WORKER_KEY, worker_name)
+
+        self.redis.sadd(self.FAN_OUT_PROCESSING_INDEX_KEY, worker_name)
+
+        while self._fan_out_running:
+
+            try:
+                self.redis.set(worker_key, 1, ex=self._fan_out_worker_ttl)
+                pack = self.redis.brpoplpush(self.FAN_OUT_QUEUE_KEY, processing_key, timeout=self._fan_out_poll_timeout)
+
+                if not pack:
+                    continue
+
+            except Exception as exc:
+                logger.error('Could not read the fan-out queue: %s' % exc)
+                time.sleep(self._fan_out_poll_timeout)
+                continue
+
+            done_users = []
+
+            try:
+                self._fan_out_pack(pack=pack, worker_key=worker_key, done_users=done_users)
+                self.redis.lrem(processing_key, 1, pack)
+
+            except Exception as exc:
+                logger.error('Could not fan out events: %s' % exc)
+                self._retry_fan_out_pack(pack=pack, processing_key=processing_key, done_users=done_users)
+
+        pipeline = self.redis.pipeline()
+        pipeline.delete(worker_key)
+        pipeline.srem(self.FAN_OUT_PROCESSING_INDEX_KEY, worker_name)
+        pipeline.execute()
+
+    def _retry_fan_out_pack(self, pack, processing_key, done_users=None):
+        """ Moves the given batch back to the fan-out queue, to be processed next, or drops it once it failed too many times
+
+            The users the events were already pushed to are recorded in the batch, so that they are skipped on retry.
+        """
+        try:
+            data = msgpack.unpackb(pack)
+            data['attempts'] = data.get('attempts', 1) + 1
+            data['doneUsers'] = data.get('doneUsers', []) + list(done_users or [])
+        except Exception:
+            data = None
+
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.lrem(processing_key, 1, pack)
+
+        if data is None:
+            logger.error('Dropping an event batch that could not be decoded')
+        elif data['attempts'] <= self._fan_out_max_attempts:
+            pipeline.rpush(self.FAN_OUT_QUEUE_KEY, msgpack.packb(data))
+        else:
+            logger.error('Dropping %d event(s) that could not be fanned out after %d attempts' % (len(data['events']), self._fan_out_max_attempts))
+
+        pipeline.execute()
+
+    def _requeue_orphaned_fan_out_batches(self):
+        """ Moves back to the fan-out queue the batches left in the processing list of the workers that died
+        """
+        for worker_name in self.redis.smembers(self.FAN_OUT_PROCESSING_INDEX_KEY):
+
+            if self.redis.exists('%s:%s' % (self.FAN_OUT_WORKER_KEY, worker_name)):
+                continue
+
+            processing_key = '%s:%s' % (self.FAN_OUT_PROCESSING_KEY, worker_name)
+            number_of_batches = 0
+
+            while self.redis.rpoplpush(processing_key, self.FAN_OUT_QUEUE_KEY):
+                number_of_batches += 1
+
+            if number_of_batches:
+                logger.warn('Requeued %d event batch(es) left by the fan-out worker %s' % (number_of_batches, worker_name))
+
+            self.redis.srem(self.FAN_OUT_PROCESSING_INDEX_KEY, worker_name)
+
+    def _fan_out_pack(self, pack, worker_key=None, done_users=None):
+        """ Pushes the events of the given batch, skipping the users they were already pushed to
+
+            While pushing, the heartbeat of the worker is refreshed, so that a long fan-out is not taken
+            for an orphan, and the users the events are pushed to are recorded in done_users.
+        """
+        data = msgpack.unpackb(pack)
+        events = [GAPushEvent.from_dict(data=event_data) for event_data in data['events']]
+        heartbeat = {'refreshed_at': time.time()}
+
+        def on_progress(pushed_users):
+            if done_users is not None:
+                done_users[:] = pushed_users
+
+            if worker_key and time.time() - heartbeat['refreshed_at'] > self._fan_out_worker_ttl / 3.0:
+                self.redis.set(worker_key, 1, ex=self._fan_out_worker_ttl)
+                heartbeat['refreshed_at'] = time.time()
+
+        self.push_events(events=events, skipped_users=set(data.get('doneUsers', [])), progress_callback=on_progress)
+
+        lag = time.time() - data['enqueuedAt']
+        self._record_fan_out_lag(lag)
+
+        if lag > self._fan_out_lag_warning_threshold:
+            logger.warn('Fanned out %d event(s) %.3fs after they were queued' % (len(events), lag))
+        else:
+            logger.debug('Fanned out %d event(s) %.3fs after they were queued' % (len(events), lag))
+
+    def _record_fan_out_lag(self, lag):
+        """
+        """
+        with self._fan_out_metrics_lock:
+            self._fan_out_metrics['processed'] += 1
+            self._fan_out_metrics['last_lag'] = lag
+            self._fan_out_metrics['max_lag'] = max(self._fan_out_metrics['max_lag'], lag)
+            self._fan_out_metrics['total_lag'] += lag
+
+    def _reset_fan_out_metrics(self):
+        """
+        """
+        with self._fan_out_metrics_lock:
+            self._fan_out_metrics = {'processed': 0, 'last_lag': 0.0, 'max_lag': 0.0, 'total_lag': 0.0}
+
+    def _event_from_pack(self, pack):
+        """
+        """
+        return GAPushEvent.from_dict(data=msgpack.unpackb(pack))
+
+    def _pop_events(self, session, max_events):
+        """ Atomically pops up to max_events of the oldest events of the session, from the oldest to the newest
+        """
+        event_queue_key = 'eventqueue:%s' % session.redis_key
+
+        pipeline = self.redis_for_key(session.redis_key).pipeline(transaction=True)
+        pipeline.lrange(event_queue_key, -max_events, -1)
+        pipeline.ltrim(event_queue_key, 0, -max_events - 1)
+        packs, _ = pipeline.execute()
+
+        events = [self._event_from_pack(pack) for pack in reversed(packs)]
+
+        logger.debug('Popped %d event(s) from the session event queue %s' % (len(events), event_queue_key))
+
+        return events
+
+    def _add_waiter(self, session_key, waiter):
+        """
+        """
+        with self._waiters_lock:
+            self._waiters.setdefault(session_key, set()).add(waiter)
+
+    def _remove_waiter(self, session_key, waiter):
+        """
+        """
+        with self._waiters_lock:
+            waiters = self._waiters.get(session_key)
+
+            if waiters is None:
+                return
+
+            waiters.discard(waiter)
+
+            if not len(waiters):
+                del self._waiters[session_key]
+
+    def _wake_up_all_waiters(self):
+        """
+        """
+        with self._waiters_lock:
+            for waiters in self._waiters.values():
+                for waiter in waiters:
+                    waiter.set()
+
+    def _on_event_queue_notification(self, data):
+        """
+        """
+        with self._waiters_lock:
+            waiters = list(self._waiters.get(data, ()))
+
+        for waiter in waiters:
+            waiter.set()
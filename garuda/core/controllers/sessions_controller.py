@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
 
+import copy
+import hashlib
 import logging
 import os
+import threading
+import time
 
+from garuda.core.lib import GALRUCache, GAThreadManager
 from garuda.core.models import GAPluginController
 from garuda.core.plugins import GAAuthenticationPlugin
 from garuda.core.models import GASession
@@ -14,6 +19,15 @@ logger = logging.getLogger('garuda.controller.sessions')
 class GASessionsController(GAPluginController):
     """
     """
+
+    INVALIDATIONS_CHANNEL = 'sessions:invalidations'
+    EXPIRATIONS_CHANNEL = 'sessions:expirations'
+    REVOCATIONS_CHANNEL = 'sessions:revocations'
+    REVOKED_SESSIONS_KEY = 'index:sessions:revoked'
+    REAPER_LOCK_KEY = 'lock:sessions:reaper'
+    SESSIONS_INDEX_KEY = 'index:sessions'
+    LISTENERS_INDEX_KEY = 'index:listeners'
+
     def __init__(self, plugins, core_controller):
         """
 
@@ -22,10 +36,25 @@ class GASessionsController(GAPluginController):
 
         self._garuda_uuid = self.core_controller.uuid
         self._default_session_ttl = 300
+        self._session_ttl_refresh_ratio = 0.5
+        self._listening_grace_period = 60
         self._local_sessions_redis_key = None
         self._local_listening_sessions_redis_key = None
-
-        self.subscribe(channel='__keyevent@%s__:expired' % self.redis_db, handler=self._on_session_expiration)
+        self._sessions_cache = GALRUCache(max_size=10000, ttl=30)
+        self._sessions_expirations = GALRUCache(max_size=10000)
+        self._revoked_sessions = {}
+        self._authentications_cache = GALRUCache(max_size=10000, ttl=60)
+        self._failed_authentications_cache = GALRUCache(max_size=10000, ttl=5)
+        self._authentication_rate_limit = 30
+        self._authentication_rate_window = 10
+        self._reaper_interval = 5
+        self._reaper_batch_size = 500
+        self._reaper_thread = None
+        self._reaper_stopped = threading.Event()
+
+        self.subscribe(channel=self.EXPIRATIONS_CHANNEL, handler=self._on_sessions_expiration)
+        self.subscribe(channel=self.REVOCATIONS_CHANNEL, handler=self._on_session_revocation)
+        self.subscribe(channel=self.INVALIDATIONS_CHANNEL, handler=self._on_session_invalidation)
 
     @classmethod
     def identifier(cls):
@@ -67,12 +96,19 @@ class GASessionsController(GAPluginController):
         """
         """
         self.start_listening_to_events()
+        self._load_revoked_sessions()
+        self._start_reaper()
 
     def stop(self):
         """
         """
+        self._stop_reaper()
         self.stop_listening_to_events()
         self.flush_local_sessions()
+        self._sessions_cache.clear()
+        self._sessions_expirations.clear()
+        self._authentications_cache.clear()
+        self._failed_authentications_cache.clear()
 
     def get_all_local_sessions(self, listening=False):
         """
@@ -92,20 +128,74 @@ class GASessionsController(GAPluginController):
     def get_all_sessions(self):
         """
         """
-        session_keys = self._get_all_session_keys(local_only=False)
+        return list(self.iter_sessions())
 
-        if not len(session_keys):
-            return []
+    def iter_session_keys(self, batch_size=500):
+        """ Iterates over the keys of all the live sessions, using the session index
 
-        return [self._get_session_from_key(key) for key in session_keys]
+            The index is a sorted set of the session keys scored by their expiration date. It is
+            scanned with a cursor, and entries that are already expired are skipped and pruned.
+        """
+        now = time.time()
+        self.redis.zremrangebyscore(self.SESSIONS_INDEX_KEY, '-inf', now)
+
+        for session_key, expiration in self.redis.zscan_iter(self.SESSIONS_INDEX_KEY, count=batch_size):
+
+            if expiration > now:
+                yield session_key
+
+    def iter_sessions(self, batch_size=500):
+        """ Iterates over all the live sessions, fetching them by batches of batch_size
+        """
+        session_keys = []
+
+        for session_key in self.iter_session_keys(batch_size=batch_size):
+            session_keys.append(session_key)
+
+            if len(session_keys) >= batch_size:
+                for session in self._get_sessions_from_keys(session_keys):
+                    yield session
+
+                session_keys = []
+
+        for session in self._get_sessions_from_keys(session_keys):
+            yield session
 
     def get_session(self, session_uuid):
+        """ Returns the session with the given uuid, from the local cache when possible
+
+            If the given identifier is a signed token issued by a plugin, the session is
+            read from the token itself, and only checked against the revoked sessions.
         """
+        if session_uuid and '.' in session_uuid:
+            return self._get_session_from_token(session_uuid)
+
+        session_key = 'sessions:' + session_uuid
+        session = self._sessions_cache.get(session_key)
+
+        if session is None:
+            session = self._get_session_from_key(session_key)
+
+            if session:
+                self._sessions_cache.set(session_key, session)
+
+        return session
+
+    def is_session_alive(self, session):
+        """ Returns True if the given session is neither expired nor deleted
         """
-        return self._get_session_from_key('sessions:' + session_uuid)
+        if session.stateless:
+            return session.expiration > time.time() and not self._is_session_revoked(session)
+
+        return self.get_session(session_uuid=session.uuid) is not None
 
     def create_session(self, request):
-        """
+        """ Authenticates the request and returns a new session, or None if the authentication failed
+
+            The results of the authentication are cached by credentials: the root object of a successful
+            authentication is reused for the new sessions created with the same credentials, and a failed
+            one is not retried before the negative cache expires, so that the authentication backend is
+            called as little as possible. Throttled clients are not authenticated at all.
         """
         logger.debug('Creating session for garuda_uuid=%s (ttl=%s)' % (self._garuda_uuid, self._default_session_ttl))
         session = GASession(garuda_uuid=self._garuda_uuid)
@@ -115,42 +205,200 @@ class GASessionsController(GAPluginController):
             logger.warn('No plugin found to create session')
             return None
 
-        root_object = plugin.authenticate(request=request, session=session)
+        credentials_key = self._credentials_key(request=request, plugin=plugin)
 
-        if not root_object:  # pragma: no cover
-            return None
+        authentication = self._authentications_cache.get(credentials_key) if credentials_key else None
+
+        if authentication:
+            root_object = self._root_object_for_session(authentication=authentication, session=session)
+
+        else:
+            if credentials_key and credentials_key in self._failed_authentications_cache:
+                logger.debug('Authentication recently failed with the same credentials')
+                return None
+
+            if self.is_authentication_throttled(request=request):
+                return None
+
+            root_object = plugin.authenticate(request=request, session=session)
+
+            if not root_object:
+                self._count_failed_authentication(request=request)
+
+                if credentials_key:
+                    self._failed_authentications_cache.set(credentials_key, True)
+
+                return None
+
+            if credentials_key:
+                self._authentications_cache.set(credentials_key, (root_object, session.uuid))
 
         session.root_object = root_object
-        self._save_session(session)
+        token = plugin.issue_session_token(session=session)
+
+        if token:
+            root_object.api_key = token
+        else:
+            self._save_session(session)
 
         return session
 
+    def is_authentication_throttled(self, request):
+        """ Returns True if the client of the request failed to authenticate too many times
+
+            Clients are identified by their username and their address. The failed authentications
+            are counted in Redis, by windows of authentication_rate_window seconds, so that the limit applies
+            to all processes.
+        """
+        key = self._throttling_key(request)
+
+        if not key:
+            return False
+
+        failures = self.redis.get(key)
+
+        if failures is not None and int(failures) >= self._authentication_rate_limit:
+            logger.warn('Throttling authentication attempts of %s' % key)
+            return True
+
+        return False
+
     def delete_session(self, session):
         """
         """
         logger.debug('Deleting session %s' % session.uuid)
 
-        self.redis.delete(session.redis_key)
+        if session.stateless:
+            self._revoke_session(session)
 
-    def reset_session_ttl(self, session):
-        """
+        pipeline = self.core_controller.sharded_pipeline()
+        pipeline.for_key(session.redis_key).delete(session.redis_key)
+        pipeline.zrem(self.SESSIONS_INDEX_KEY, session.redis_key)
+
+        if session.root_object and session.root_object.id:
+            pipeline.zrem(self._listeners_index_key(session.root_object.id), session.redis_key)
+
+        pipeline.execute()
+
+        self._sessions_cache.delete(session.redis_key)
+        self._sessions_expirations.delete(session.redis_key)
+        self.publish(channel=self.INVALIDATIONS_CHANNEL, data=session.redis_key)
+
+    def reset_session_ttl(self, session, pipeline=None):
+        """ Extends the ttl of the session, only if its remaining lifetime is below the refresh threshold
+
+            The expiration is tracked locally, so that most requests do not need any Redis command.
+            If a sharded pipeline is given, the commands are added to it, and it is up to the caller to execute it.
         """
+        if session.stateless:
+            return
+
+        now = time.time()
+        expiration = self._sessions_expirations.get(session.redis_key)
+
+        if expiration is not None and expiration - now > self._default_session_ttl * self._session_ttl_refresh_ratio:
+            return
+
         logger.debug('Reseting ttl for session key  %s for in garuda set %s)' % (session.redis_key, self.local_sessions_redis_key))
 
-        self.redis.persist(session.redis_key)
-        self.redis.expire(session.redis_key, self._default_session_ttl)
+        self._sessions_expirations.set(session.redis_key, now + self._default_session_ttl)
+
+        execute = pipeline is None
+
+        if execute:
+            pipeline = self.core_controller.sharded_pipeline()
+
+        pipeline.for_key(session.redis_key).expire(session.redis_key, self._default_session_ttl)
+        pipeline.zadd(self.SESSIONS_INDEX_KEY, now + self._default_session_ttl, session.redis_key)
+
+        if execute:
+            pipeline.execute()
 
     def set_session_listening_status(self, session, status):
         """
         """
         logger.debug('Set session key %s listening status: %s' % (session.redis_key, status))
 
+        pipeline = self.core_controller.sharded_pipeline()
+
         if status:
-            self.redis.sadd(self.local_listening_sessions_redis_key, session.redis_key)
+            pipeline.sadd(self.local_listening_sessions_redis_key, session.redis_key)
         else:
-            self.redis.srem(self.local_listening_sessions_redis_key, session.redis_key)
+            pipeline.srem(self.local_listening_sessions_redis_key, session.redis_key)
+
+        self._index_listening_session(session=session, status=status, pipeline=pipeline)
+        self.reset_session_ttl(session, pipeline=pipeline)
+        pipeline.execute()
+
+    def get_listening_session_keys_by_user(self):
+        """ Returns the keys of the sessions that can consume events, grouped by root object identifier
+
+            A session stays in this index while it is listening, and during the listening grace period
+            after it stopped, so that events pushed between two long polls are not lost.
+        """
+        now = time.time()
+        user_identifiers = self.redis.zrangebyscore(self.LISTENERS_INDEX_KEY, now, '+inf')
 
-        self.reset_session_ttl(session)
+        if not len(user_identifiers):
+            return {}
+
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.zremrangebyscore(self.LISTENERS_INDEX_KEY, '-inf', now)
+
+        for user_identifier in user_identifiers:
+            pipeline.zrangebyscore(self._listeners_index_key(user_identifier), now, '+inf')
+
+        session_keys_by_user = {}
+
+        for user_identifier, session_keys in zip(user_identifiers, pipeline.execute()[1:]):
+            if len(session_keys):
+                session_keys_by_user[user_identifier] = session_keys
+
+        return session_keys_by_user
+
+    def reap_expired_sessions(self, batch_size=500):
+        """ Cleans up the sessions whose expiration date is passed, and returns the number of reaped sessions
+
+            Expired sessions are found in the session index, by batches of batch_size. Their index
+            entries and event queues are deleted at once, then their keys are published so that every
+            process forgets them. Sessions that are in fact still alive get their index entry fixed.
+        """
+        now = time.time()
+        number_of_reaped_sessions = 0
+
+        while True:
+            session_keys = self.redis.zrangebyscore(self.SESSIONS_INDEX_KEY, '-inf', now, start=0, num=batch_size)
+
+            if not len(session_keys):
+                break
+
+            pipeline = self.core_controller.sharded_pipeline()
+            expired_session_keys = []
+
+            for session_key, ttl in zip(session_keys, self._get_session_ttls(session_keys)):
+                if ttl is not None and ttl > 0:
+                    pipeline.zadd(self.SESSIONS_INDEX_KEY, now + ttl, session_key)
+                else:
+                    expired_session_keys.append(session_key)
+
+            if len(expired_session_keys):
+                pipeline.zrem(self.SESSIONS_INDEX_KEY, *expired_session_keys)
+                self.core_controller.push_controller.delete_event_queues(expired_session_keys, pipeline=pipeline)
+
+            pipeline.execute()
+
+            if len(expired_session_keys):
+                self._forget_sessions(expired_session_keys)
+                self.publish(channel=self.EXPIRATIONS_CHANNEL, data=','.join(expired_session_keys))
+                number_of_reaped_sessions += len(expired_session_keys)
+
+            if len(session_keys) < batch_size:
+                break
+
+        if number_of_reaped_sessions:
+            logger.debug('Reaped %d expired session(s)' % number_of_reaped_sessions)
+
+        return number_of_reaped_sessions
 
     def flush_local_sessions(self):
         """
@@ -167,29 +415,231 @@ class GASessionsController(GAPluginController):
         """
         logger.debug('Saving session key  %s for in garuda set %s)' % (session.redis_key, self.local_sessions_redis_key))
 
-        self.redis.hmset(session.redis_key, session.to_hash())
-        self.redis.sadd(self.local_sessions_redis_key, session.redis_key)
-        self.redis.expire(session.redis_key, self._default_session_ttl)
+        expiration = time.time() + self._default_session_ttl
+
+        pipeline = self.core_controller.sharded_pipeline()
+        pipeline.for_key(session.redis_key).hmset(session.redis_key, session.to_hash())
+        pipeline.for_key(session.redis_key).expire(session.redis_key, self._default_session_ttl)
+        pipeline.sadd(self.local_sessions_redis_key, session.redis_key)
+        pipeline.zadd(self.SESSIONS_INDEX_KEY, expiration, session.redis_key)
+        pipeline.execute()
+
+        self._sessions_cache.set(session.redis_key, session)
+        self._sessions_expirations.set(session.redis_key, expiration)
 
-    def _on_session_expiration(self, data):
+    def _listeners_index_key(self, user_identifier):
         """
         """
-        session_key = data
-        self.redis.srem(self.local_sessions_redis_key, session_key)
-        self.redis.srem(self.local_listening_sessions_redis_key, session_key)
-        self.core_controller.push_controller.delete_event_queue(session_key)
-        logger.debug('Session %s is now expired' % session_key)
+        return '%s:%s' % (self.LISTENERS_INDEX_KEY, user_identifier)
+
+    def _index_listening_session(self, session, status, pipeline):
+        """ Adds the listening session to the index of its user
+
+            The session is indexed until the end of its lifetime while listening, or until the end
+            of the grace period when it stops. The user entry is always pushed to the farthest horizon,
+            so that it never expires before one of its sessions.
+        """
+        if not session.root_object or not session.root_object.id:
+            return
+
+        now = time.time()
+        user_identifier = session.root_object.id
+        user_index_key = self._listeners_index_key(user_identifier)
+        horizon = max(self._default_session_ttl, self._listening_grace_period)
+        expiration = now + (self._default_session_ttl if status else self._listening_grace_period)
+
+        pipeline.zadd(user_index_key, expiration, session.redis_key)
+        pipeline.zremrangebyscore(user_index_key, '-inf', now)
+        pipeline.expire(user_index_key, int(horizon) + 1)
+        pipeline.zadd(self.LISTENERS_INDEX_KEY, now + horizon, user_identifier)
+
+    def _on_session_invalidation(self, data):
+        """
+        """
+        self._sessions_cache.delete(data)
+
+    def _count_failed_authentication(self, request):
+        """
+        """
+        key = self._throttling_key(request)
+
+        if not key:
+            return
+
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.incr(key)
+        pipeline.expire(key, self._authentication_rate_window)
+        pipeline.execute()
+
+    def _throttling_key(self, request):
+        """
+        """
+        username = getattr(request, 'username', None)
+        client_address = getattr(request, 'client_address', None)
+
+        if not username and not client_address:
+            return None
+
+        # failures are counted per username and address, so that nobody can lock a user out from another address
+        return 'throttle:authentication:%s:%s:%d' % (username or '', client_address or '', int(time.time() / self._authentication_rate_window))
+
+    def _root_object_for_session(self, authentication, session):
+        """ Returns a copy of the cached root object of a previous authentication, for the given new session
+        """
+        cached_root_object, cached_session_uuid = authentication
+        root_object = copy.copy(cached_root_object)
+
+        # plugins usually give the session uuid as API key, which must then be the one of the new session
+        if getattr(root_object, 'api_key', None) == cached_session_uuid:
+            root_object.api_key = session.uuid
+
+        return root_object
+
+    def _credentials_key(self, request, plugin):
+        """ Returns a hash of the credentials of the request, or None if the request has no credentials
+        """
+        username = getattr(request, 'username', None)
+        token = getattr(request, 'token', None)
+
+        if username is None and token is None:
+            return None
+
+        credentials = [plugin.manifest().identifier, username, token]
+
+        return hashlib.sha256('\x00'.join(value.encode('utf-8') if isinstance(value, unicode) else str(value) for value in credentials)).hexdigest()
+
+    def _get_session_from_token(self, token):
+        """
+        """
+        for plugin in self._plugins:
+            session = plugin.session_from_token(token)
+
+            if session:
+                return None if self._is_session_revoked(session) else session
+
+        return None
+
+    def _revoke_session(self, session):
+        """ Revokes the given stateless session until the expiration of its token
+        """
+        self._revoked_sessions[session.uuid] = session.expiration
+
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.zadd(self.REVOKED_SESSIONS_KEY, session.expiration, session.uuid)
+        pipeline.zremrangebyscore(self.REVOKED_SESSIONS_KEY, '-inf', time.time())
+        pipeline.publish(self.REVOCATIONS_CHANNEL, '%s %r' % (session.uuid, session.expiration))
+        pipeline.execute()
+
+    def _is_session_revoked(self, session):
+        """
+        """
+        return session.uuid in self._revoked_sessions
+
+    def _load_revoked_sessions(self):
+        """ Loads the revoked sessions whose tokens are not expired yet
+        """
+        now = time.time()
+        self._revoked_sessions = dict(self.redis.zrangebyscore(self.REVOKED_SESSIONS_KEY, now, '+inf', withscores=True))
+
+    def _on_session_revocation(self, data):
+        """
+        """
+        session_uuid, expiration = data.split(' ')
+        now = time.time()
+
+        self._revoked_sessions[session_uuid] = float(expiration)
+        self._revoked_sessions = dict((uuid, expiration) for uuid, expiration in self._revoked_sessions.items() if expiration > now)
+
+    def _on_sessions_expiration(self, data):
+        """
+        """
+        self._forget_sessions(data.split(','))
+
+    def _forget_sessions(self, session_keys):
+        """ Removes the given expired sessions from the local caches and session sets
+        """
+        for session_key in session_keys:
+            self._sessions_cache.delete(session_key)
+            self._sessions_expirations.delete(session_key)
+
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.srem(self.local_sessions_redis_key, *session_keys)
+        pipeline.srem(self.local_listening_sessions_redis_key, *session_keys)
+        pipeline.execute()
+
+        logger.debug('Sessions %s are now expired' % ', '.join(session_keys))
+
+    def _start_reaper(self):
+        """
+        """
+        if self._reaper_thread:
+            return
+
+        self._reaper_stopped.clear()
+        self._reaper_thread = GAThreadManager.start_thread(self._reap_periodically)
+
+    def _stop_reaper(self):
+        """
+        """
+        if not self._reaper_thread:
+            return
+
+        self._reaper_stopped.set()
+        self._reaper_thread.join(timeout=1)
+        self._reaper_thread = None
+
+    def _reap_periodically(self):
+        """ Reaps the expired sessions every reaper interval
+
+            A lock expiring with the interval makes sure that only one process sweeps the index per interval.
+        """
+        while not self._reaper_stopped.wait(self._reaper_interval):
+
+            try:
+                if self.redis.set(self.REAPER_LOCK_KEY, self.uuid, px=int(self._reaper_interval * 1000), nx=True):
+                    self.reap_expired_sessions(batch_size=self._reaper_batch_size)
+            except Exception as exc:
+                logger.error('Could not reap expired sessions: %s' % exc)
 
     def _get_session_from_key(self, session_key):
         """
         """
-        session_data = self.redis.hgetall(session_key)
+        session_data = self.redis_for_key(session_key).hgetall(session_key)
 
         if not session_data or not len(session_data):
             return None
 
         return GASession.from_hash(session_data)
 
+    def _get_sessions_from_keys(self, session_keys):
+        """
+        """
+        sessions_data = self._execute_on_session_keys(session_keys, 'hgetall')
+
+        return [GASession.from_hash(session_data) for session_data in sessions_data if session_data]
+
+    def _get_session_ttls(self, session_keys):
+        """
+        """
+        return self._execute_on_session_keys(session_keys, 'ttl')
+
+    def _execute_on_session_keys(self, session_keys, command):
+        """ Runs the given command on every given session key, on their shards, and returns the results in order
+        """
+        if not len(session_keys):
+            return []
+
+        pipeline = self.core_controller.sharded_pipeline()
+        positions = []
+
+        for session_key in session_keys:
+            positions.append(pipeline.position(session_key))
+            getattr(pipeline.for_key(session_key), command)(session_key)
+
+        pipeline.execute()
+
+        return [pipeline.result(session_key, position) for session_key, position in zip(session_keys, positions)]
+
     def _get_all_session_keys(self, listening=False, local_only=True):
         """
         """
@@ -198,7 +648,7 @@ class GASessionsController(GAPluginController):
         elif local_only and not listening:
             return self.redis.smembers(self.local_sessions_redis_key)
         else:
-            return self.redis.keys('sessions:*')
+            return list(self.iter_session_keys())
 
     def _plugin_for_request(self, request):
         """
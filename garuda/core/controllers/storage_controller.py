@@ -58,11 +58,23 @@ class GAStorageController(GAPluginController):
         plugin = self._managing_plugin(resource_name=resource_name, identifier=identifier)
         return plugin.get(user_identifier=user_identifier, resource_name=resource_name, identifier=identifier, filter=filter) if plugin else None
 
-    def get_all(self, user_identifier, parent, resource_name, page=None, page_size=None, filter=None, order_by=None):
+    def get_all(self, user_identifier, parent, resource_name, page=None, page_size=None, filter=None, order_by=None, stream=False):
         """
         """
         plugin = self._managing_plugin(resource_name=resource_name, identifier=None)
-        return plugin.get_all(user_identifier=user_identifier, parent=parent, resource_name=resource_name, page=page, page_size=page_size, filter=filter, order_by=order_by) if plugin else None
+
+        if not plugin:
+            return None
+
+        # stream is only given when asked for, so that plugins written before it existed keep working
+        options = {'stream': True} if stream else {}
+        return plugin.get_all(user_identifier=user_identifier, parent=parent, resource_name=resource_name, page=page, page_size=page_size, filter=filter, order_by=order_by, **options)
+
+    def get_last_updated_dates(self, user_identifier, resource_name, identifier=None, parent=None, page=None, page_size=None, filter=None, order_by=None):
+        """
+        """
+        plugin = self._managing_plugin(resource_name=resource_name, identifier=identifier)
+        return plugin.get_last_updated_dates(user_identifier=user_identifier, resource_name=resource_name, identifier=identifier, parent=parent, page=page, page_size=page_size, filter=filter, order_by=order_by) if plugin else None
 
     def create(self, user_identifier, resource, parent=None):
         """
@@ -1,8 +1,16 @@
 # -*- coding: utf-8 -*-
 
-__all__ = ['GASDKLibrary', 'GAThreadManager', 'Singleton', 'GAMongoPredicateConverter', 'GAPredicateConverter']
+__all__ = ['GASDKLibrary', 'GAThreadManager', 'Singleton', 'GAMongoPredicateConverter', 'GAPredicateConverter', 'GALRUCache', 'GAEntityTag', 'GATimings', 'GARedisConnectionPool', 'GAPubSubDispatcher', 'GAConsistentHashRing', 'GAShardedPipeline', 'GATokenSigner']
 
 from .singleton import Singleton
 from .sdk_library import GASDKLibrary
 from .thread_manager import GAThreadManager
 from .predicate_converter import GAPredicateConverter
+from .lru_cache import GALRUCache
+from .entity_tag import GAEntityTag
+from .timings import GATimings
+from .redis_pool import GARedisConnectionPool
+from .pubsub_dispatcher import GAPubSubDispatcher
+from .hash_ring import GAConsistentHashRing
+from .sharded_pipeline import GAShardedPipeline
+from .token_signer import GATokenSigner
@@ -0,0 +1,67 @@
+# -*- coding:utf-8 -*-
+
+import hashlib
+
+
+class GAEntityTag(object):
+    """ Computes and compares HTTP validators (ETag and Last-Modified)
+
+        Validators are computed from fingerprints, which are (identifier, last_updated_date) tuples
+        of the objects being returned. The salt allows to differentiate two pages with the same objects,
+        for instance when the total count changes.
+    """
+
+    @classmethod
+    def compute(cls, fingerprints, salt=''):
+        """ Returns a weak ETag for the given fingerprints
+        """
+        digest = hashlib.sha1(str(salt))
+
+        for identifier, last_updated_date in fingerprints:
+            digest.update('|%s:%r' % (identifier, last_updated_date))
+
+        return 'W/"%s"' % digest.hexdigest()
+
+    @classmethod
+    def last_modified(cls, fingerprints):
+        """ Returns the most recent last_updated_date of the given fingerprints, or None
+        """
+        dates = [float(last_updated_date) for identifier, last_updated_date in fingerprints if last_updated_date is not None]
+        return max(dates) if len(dates) else None
+
+    @classmethod
+    def fingerprints(cls, objects):
+        """ Returns the fingerprints of the given objects
+        """
+        return [(obj.id, obj.last_updated_date) for obj in objects]
+
+    @classmethod
+    def is_not_modified(cls, etag, last_modified, if_none_match=None, if_modified_since=None):
+        """ Returns True if the client representation is still fresh
+
+            As per RFC 7232, If-Modified-Since is ignored when If-None-Match is given.
+        """
+        if if_none_match:
+
+            if not etag:
+                return False
+
+            if if_none_match.strip() == '*':
+                return True
+
+            candidates = [cls._opaque_tag(candidate) for candidate in if_none_match.split(',')]
+            return cls._opaque_tag(etag) in candidates
+
+        if if_modified_since is not None and last_modified is not None:
+            return int(last_modified) <= int(if_modified_since)
+
+        return False
+
+    # Utilities
+
+    @classmethod
+    def _opaque_tag(cls, etag):
+        """
+        """
+        etag = etag.strip()
+        return etag[2:] if etag.startswith('W/') else etag
@@ -0,0 +1,74 @@
+# -*- coding:utf-8 -*-
+
+import bisect
+import hashlib
+
+
+class GAConsistentHashRing(object):
+    """ Consistent hash ring routing keys to nodes
+
+        Every node is placed replicas times on the ring, so keys are evenly spread, and
+        adding or removing a node only moves the keys of that node.
+    """
+
+    def __init__(self, nodes=None, replicas=160):
+        """
+        """
+        self._replicas = replicas
+        self._nodes = {}
+        self._hashes = []
+        self._ring = {}
+
+        for name, node in nodes or []:
+            self.add_node(name=name, node=node)
+
+    @property
+    def nodes(self):
+        """
+        """
+        return self._nodes.values()
+
+    def __len__(self):
+        """
+        """
+        return len(self._nodes)
+
+    def add_node(self, name, node):
+        """ Adds the given node to the ring. The name must be stable, as it decides where the node is placed
+        """
+        self._nodes[name] = node
+
+        for replica in range(self._replicas):
+            point = self._hash('%s#%d' % (name, replica))
+            self._ring[point] = name
+            bisect.insort(self._hashes, point)
+
+    def remove_node(self, name):
+        """
+        """
+        if name not in self._nodes:
+            return
+
+        del self._nodes[name]
+
+        for replica in range(self._replicas):
+            point = self._hash('%s#%d' % (name, replica))
+            del self._ring[point]
+            self._hashes.remove(point)
+
+    def get_node(self, key):
+        """ Returns the node owning the given key, or None if the ring is empty
+        """
+        if not len(self._hashes):
+            return None
+
+        index = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+
+        return self._nodes[self._ring[self._hashes[index]]]
+
+    # Utilities
+
+    def _hash(self, key):
+        """
+        """
+        return int(hashlib.md5(key).hexdigest()[:16], 16)
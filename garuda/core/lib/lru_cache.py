@@ -0,0 +1,103 @@
+# -*- coding:utf-8 -*-
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class GALRUCache(object):
+    """ Bounded least recently used cache
+
+        Once max_size entries are stored, setting a new key evicts the least recently used one.
+        When a ttl is given, in seconds, entries also expire ttl seconds after they have been set.
+        The cache is safe to share between threads and greenlets.
+    """
+
+    def __init__(self, max_size=1024, ttl=None):
+        """
+        """
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def max_size(self):
+        """
+        """
+        return self._max_size
+
+    @property
+    def ttl(self):
+        """
+        """
+        return self._ttl
+
+    def __len__(self):
+        """
+        """
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """
+        """
+        with self._lock:
+            return self._get_entry(key) is not None
+
+    def get(self, key, default=None):
+        """
+        """
+        with self._lock:
+            entry = self._get_entry(key)
+
+            if entry is None:
+                return default
+
+            del self._entries[key]
+            self._entries[key] = entry
+
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        """ Sets the value of the key. The given ttl overrides the ttl of the cache for this entry
+        """
+        ttl = ttl if ttl is not None else self._ttl
+        expiration = time.time() + ttl if ttl is not None else None
+
+        with self._lock:
+
+            if key in self._entries:
+                del self._entries[key]
+
+            elif len(self._entries) >= self._max_size:
+                self._entries.popitem(last=False)
+
+            self._entries[key] = (value, expiration)
+
+    def delete(self, key):
+        """
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        """
+        with self._lock:
+            self._entries.clear()
+
+    # Utilities
+
+    def _get_entry(self, key):
+        """
+        """
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        if entry[1] is not None and entry[1] <= time.time():
+            del self._entries[key]
+            return None
+
+        return entry
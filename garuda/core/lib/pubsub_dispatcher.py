@@ -0,0 +1,149 @@
+# -*- coding:utf-8 -*-
+
+import logging
+import os
+import threading
+import time
+
+from .thread_manager import GAThreadManager
+
+logger = logging.getLogger('garuda.pubsub')
+
+
+class GAPubSubDispatcher(object):
+    """ Routes the messages of a single Redis pub/sub connection to the handlers subscribed to their channel
+
+        There is one dispatcher per process and connection pool, shared by all the controllers. It keeps
+        one pub/sub connection and one listening thread, which runs as long as at least one user started it.
+    """
+
+    _dispatchers = {}
+    _lock = threading.Lock()
+
+    def __init__(self, redis, poll_interval=1.0):
+        """
+        """
+        self._redis = redis
+        self._poll_interval = poll_interval
+        self._pubsub = redis.pubsub()
+        self._handlers = {}
+        self._handlers_lock = threading.RLock()
+        self._number_of_users = 0
+        self._running = False
+        self._thread = None
+
+    @classmethod
+    def shared(cls, redis):
+        """ Returns the dispatcher of the process for the connection pool of the given Redis client
+        """
+        key = (os.getpid(), id(redis.connection_pool))
+
+        with cls._lock:
+
+            if key not in cls._dispatchers:
+                cls._dispatchers[key] = cls(redis=redis)
+
+            return cls._dispatchers[key]
+
+    @property
+    def running(self):
+        """
+        """
+        return self._running
+
+    @property
+    def channels(self):
+        """
+        """
+        with self._handlers_lock:
+            return self._handlers.keys()
+
+    def subscribe(self, channel, handler):
+        """ Calls the given handler with the data of every message published on the given channel
+        """
+        with self._handlers_lock:
+            handlers = self._handlers.setdefault(channel, [])
+            handlers.append(handler)
+
+            if len(handlers) == 1:
+                self._pubsub.subscribe(channel)
+
+    def unsubscribe(self, channel, handler):
+        """
+        """
+        with self._handlers_lock:
+            handlers = self._handlers.get(channel)
+
+            if not handlers or handler not in handlers:
+                return
+
+            handlers.remove(handler)
+
+            if not len(handlers):
+                del self._handlers[channel]
+                self._pubsub.unsubscribe(channel)
+
+    def start(self):
+        """ Starts the listening thread if needed. Every call must be balanced by a call to stop
+        """
+        with self._handlers_lock:
+            self._number_of_users += 1
+
+            if self._running:
+                return
+
+            self._running = True
+            self._thread = GAThreadManager.start_thread(self._listen)
+
+    def stop(self):
+        """ Stops the listening thread once all its users stopped it
+        """
+        with self._handlers_lock:
+            if not self._running:
+                return
+
+            self._number_of_users -= 1
+
+            if self._number_of_users > 0:
+                return
+
+            self._running = False
+            thread = self._thread
+            self._thread = None
+
+        thread.join(timeout=self._poll_interval + 1)
+
+    def dispatch(self, channel, data):
+        """
+        """
+        with self._handlers_lock:
+            handlers = list(self._handlers.get(channel, []))
+
+        for handler in handlers:
+            try:
+                handler(data)
+            except Exception as exc:
+                logger.error('Handler of channel %s failed: %s' % (channel, exc))
+
+    # Utilities
+
+    def _listen(self):
+        """
+        """
+        while self._running:
+
+            if not self._pubsub.subscribed:
+                time.sleep(self._poll_interval)
+                continue
+
+            try:
+                message = self._pubsub.get_message(timeout=self._poll_interval)
+            except Exception as exc:
+                logger.error('Could not read from the pub/sub connection: %s' % exc)
+                time.sleep(self._poll_interval)
+                continue
+
+            if not message or message['type'] not in ('message', 'pmessage'):
+                continue
+
+            self.dispatch(channel=message['channel'], data=message['data'])
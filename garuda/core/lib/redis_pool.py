@@ -0,0 +1,51 @@
+# -*- coding:utf-8 -*-
+
+import os
+import redis
+import threading
+
+
+class GARedisConnectionPool(object):
+    """ Registry of the Redis connection pools of the process
+
+        All the clients returned for the same host, port and db share a single connection pool,
+        so the number of connections to Redis does not grow with the number of controllers and plugins.
+        When max_connections is given, the pool blocks at most timeout seconds for a free connection.
+        Pools are never shared across processes.
+    """
+
+    _pools = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def connection_pool(cls, host, port, db, max_connections=None, timeout=20):
+        """ Returns the connection pool of the process for the given Redis database
+        """
+        key = (os.getpid(), host, int(port), int(db))
+
+        with cls._lock:
+
+            if key not in cls._pools:
+
+                if max_connections:
+                    cls._pools[key] = redis.BlockingConnectionPool(host=host, port=port, db=db, max_connections=max_connections, timeout=timeout)
+                else:
+                    cls._pools[key] = redis.ConnectionPool(host=host, port=port, db=db)
+
+            return cls._pools[key]
+
+    @classmethod
+    def redis(cls, host, port, db, max_connections=None, timeout=20):
+        """ Returns a Redis client using the connection pool of the process for the given Redis database
+        """
+        return redis.StrictRedis(connection_pool=cls.connection_pool(host=host, port=port, db=db, max_connections=max_connections, timeout=timeout))
+
+    @classmethod
+    def reset(cls):
+        """ Disconnects and forgets all the connection pools
+        """
+        with cls._lock:
+            for pool in cls._pools.values():
+                pool.disconnect()
+
+            cls._pools = {}
@@ -0,0 +1,69 @@
+# -*- coding:utf-8 -*-
+
+
+class GAShardedPipeline(object):
+    """ Pipeline spanning the Redis shards of a core controller
+
+        Commands called directly on it go to the pipeline of the primary Redis, which holds the
+        indexes and the pub/sub channels. Commands on sharded keys go to the pipeline returned
+        by for_key. Executing it executes the pipeline of every shard that was used.
+    """
+
+    def __init__(self, redis, redis_for_key, transaction=False):
+        """
+        """
+        self._redis = redis
+        self._redis_for_key = redis_for_key
+        self._transaction = transaction
+        self._pipelines = {}
+        self._results = {}
+
+    def __getattr__(self, name):
+        """
+        """
+        return getattr(self.primary, name)
+
+    @property
+    def primary(self):
+        """
+        """
+        return self._pipeline_for_redis(self._redis)
+
+    def for_key(self, key):
+        """ Returns the pipeline of the shard owning the given key
+        """
+        return self._pipeline_for_redis(self._redis_for_key(key))
+
+    def position(self, key):
+        """ Returns the position of the next command queued for the given key, to find its result after execution
+        """
+        return len(self.for_key(key).command_stack)
+
+    def result(self, key, position):
+        """ Returns the result of the command queued at the given position for the given key
+        """
+        return self._results[id(self._redis_for_key(key))][position]
+
+    def execute(self):
+        """ Executes the pipeline of every used shard, and returns the results of the primary pipeline
+
+            The primary pipeline is executed last, so that the notifications it publishes are only
+            received once the sharded keys they are about have been written.
+        """
+        self._results = {}
+        primary_id = id(self._redis)
+
+        for redis_id in sorted(self._pipelines, key=lambda redis_id: redis_id == primary_id):
+            self._results[redis_id] = self._pipelines[redis_id].execute()
+
+        return self._results.get(id(self._redis), [])
+
+    # Utilities
+
+    def _pipeline_for_redis(self, redis):
+        """
+        """
+        if id(redis) not in self._pipelines:
+            self._pipelines[id(redis)] = redis.pipeline(transaction=self._transaction)
+
+        return self._pipelines[id(redis)]
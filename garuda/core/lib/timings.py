@@ -0,0 +1,97 @@
+# -*- coding:utf-8 -*-
+
+import time
+from collections import OrderedDict
+
+
+class GATimings(object):
+    """ Accumulates the time spent in the phases of a request
+
+        Measuring the same phase several times adds up the durations. When disabled,
+        measure() returns a shared no-op context manager, so that instrumented code
+        costs only a method call.
+    """
+
+    def __init__(self, enabled=False):
+        """
+        """
+        self._enabled = enabled
+        self._durations = OrderedDict()
+
+    @property
+    def enabled(self):
+        """
+        """
+        return self._enabled
+
+    def measure(self, name):
+        """ Returns a context manager measuring the time spent in the phase name
+
+            Example:
+                with context.timings.measure('storage'):
+                    ...
+        """
+        if not self._enabled:
+            return _NOOP_TIMER
+
+        return _GATimer(timings=self, name=name)
+
+    def add(self, name, duration):
+        """ Adds duration, in seconds, to the phase name
+        """
+        if not self._enabled:
+            return
+
+        self._durations[name] = self._durations.get(name, 0.0) + duration
+
+    def to_dict(self):
+        """ Returns the durations of the phases in milliseconds
+        """
+        return OrderedDict((name, round(duration * 1000, 3)) for name, duration in self._durations.items())
+
+    def to_header(self):
+        """ Returns the value of the Server-Timing header
+        """
+        return ', '.join(['%s;dur=%.3f' % (name, duration) for name, duration in self.to_dict().items()])
+
+
+class _GATimer(object):
+    """
+    """
+
+    def __init__(self, timings, name):
+        """
+        """
+        self._timings = timings
+        self._name = name
+        self._start = None
+
+    def __enter__(self):
+        """
+        """
+        self._start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        """
+        self._timings.add(self._name, time.time() - self._start)
+        return False
+
+
+class _GANoopTimer(object):
+    """
+    """
+
+    def __enter__(self):
+        """
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        """
+        return False
+
+
+_NOOP_TIMER = _GANoopTimer()
@@ -0,0 +1,77 @@
+# -*- coding:utf-8 -*-
+
+import hashlib
+import hmac
+import msgpack
+import time
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+
+class GATokenSigner(object):
+    """ Issues and verifies signed, expiring tokens carrying arbitrary data
+
+        A token is made of its msgpack encoded payload and of the HMAC-SHA256 of that payload,
+        both base64 encoded and joined by a dot. Verifying a token only costs CPU.
+    """
+
+    def __init__(self, secret, ttl=3600):
+        """
+        """
+        if not secret:
+            raise ValueError('a secret is required to sign tokens')
+
+        self._secret = secret
+        self._ttl = ttl
+
+    @property
+    def ttl(self):
+        """
+        """
+        return self._ttl
+
+    def sign(self, data, expiration=None):
+        """ Returns a token carrying the given data, valid until expiration or for ttl seconds
+        """
+        expiration = expiration if expiration is not None else time.time() + self._ttl
+        payload = self._encode(msgpack.packb({'data': data, 'exp': expiration}))
+
+        return '%s.%s' % (payload, self._signature(payload))
+
+    def verify(self, token):
+        """ Returns the data and the expiration date of the given token, or None if the token is invalid or expired
+        """
+        if not token or token.count('.') != 1:
+            return None
+
+        token = token.encode('utf-8') if isinstance(token, unicode) else token
+        payload, signature = token.split('.')
+
+        if not hmac.compare_digest(self._signature(payload), signature):
+            return None
+
+        try:
+            content = msgpack.unpackb(self._decode(payload))
+        except Exception:
+            return None
+
+        if content['exp'] <= time.time():
+            return None
+
+        return content['data'], content['exp']
+
+    # Utilities
+
+    def _signature(self, payload):
+        """
+        """
+        return self._encode(hmac.new(self._secret, payload, hashlib.sha256).digest())
+
+    def _encode(self, data):
+        """
+        """
+        return urlsafe_b64encode(data).rstrip('=')
+
+    def _decode(self, data):
+        """
+        """
+        return urlsafe_b64decode(data + '=' * (-len(data) % 4))
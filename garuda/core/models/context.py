@@ -21,6 +21,10 @@ class GAContext(object):
         self.parent_object = None
         self.total_count = 0
 
+        self.etag = None
+        self.last_modified = None
+        self.not_modified = False
+
         self.user_info = {}
         self._errors = []
         self._events = []
@@ -39,6 +43,12 @@ class GAContext(object):
         """
         return len(self._errors) > 0
 
+    @property
+    def timings(self):
+        """
+        """
+        return self.request.timings
+
     @property
     def events(self):
         """
@@ -142,5 +152,8 @@ class GAContext(object):
         response.total_count = self.total_count
         response.page = self.request.page
         response.page_size = self.request.page_size
+        response.etag = self.etag
+        response.last_modified = self.last_modified
+        response.not_modified = self.not_modified
 
         return response
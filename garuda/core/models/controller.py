@@ -3,8 +3,6 @@
 import logging
 from uuid import uuid4
 
-from garuda.core.lib import GAThreadManager
-
 logger = logging.getLogger('garuda.controller')
 
 
@@ -21,10 +19,8 @@ class GAController(object):
         self._core_controller = core_controller
         self._uuid = str(uuid4())
 
-        if self.redis:
-            self._pubsub = self.redis.pubsub()
-            self._pubsub_thread = None
-            self._subscriptions = {}
+        self._listening = False
+        self._subscriptions = {}
 
     @classmethod
     def identifier(cls):  # pragma: no cover
@@ -44,6 +40,11 @@ class GAController(object):
         """
         return self.core_controller.redis
 
+    def redis_for_key(self, key):
+        """
+        """
+        return self.core_controller.redis_for_key(key)
+
     @property
     def redis_host(self):
         """
@@ -62,6 +63,18 @@ class GAController(object):
         """
         return self.core_controller.redis_db
 
+    @property
+    def pubsub_dispatcher(self):
+        """
+        """
+        return self.core_controller.pubsub_dispatcher
+
+    @property
+    def listening(self):
+        """
+        """
+        return self._listening
+
     @property
     def uuid(self):
         """
@@ -94,27 +107,28 @@ class GAController(object):
     def subscribe(self, channel, handler):
         """
         """
+        self.unsubscribe(channel)
         self._subscriptions[channel] = handler
 
-        if self._pubsub_thread:
-            self._pubsub.subscribe(channel)
+        if self._listening:
+            self.pubsub_dispatcher.subscribe(channel, handler)
 
     def unsubscribe(self, channel):
         """
         """
-        if channel in self._subscriptions:
-            del self._subscriptions[channel]
+        if channel not in self._subscriptions:
+            return
+
+        handler = self._subscriptions.pop(channel)
 
-        if self._pubsub_thread:
-            self._pubsub.unsubscribe(channel)
+        if self._listening:
+            self.pubsub_dispatcher.unsubscribe(channel, handler)
 
     def unsubscribe_all(self):
         """
         """
-        self._subscriptions = {}
-
-        if self._pubsub_thread:
-            self._pubsub.unsubscribe()
+        for channel in self._subscriptions.keys():
+            self.unsubscribe(channel)
 
     def publish(self, channel, data):
         """
@@ -122,36 +136,27 @@ class GAController(object):
         self.redis.publish(channel, data)
 
     def start_listening_to_events(self):
+        """ Routes the messages of the subscribed channels to their handlers, through the pub/sub dispatcher of the process
         """
-        """
-        if self._pubsub_thread:
+        if self._listening:
             return
 
-        for channel in self._subscriptions:
-            self._pubsub.subscribe(channel)
+        self._listening = True
 
-        self._pubsub_thread = GAThreadManager.start_thread(self._listen_to_redis_events)
+        for channel, handler in self._subscriptions.items():
+            self.pubsub_dispatcher.subscribe(channel, handler)
+
+        self.pubsub_dispatcher.start()
 
     def stop_listening_to_events(self):
         """
         """
-        if not self._pubsub_thread:
+        if not self._listening:
             return
 
-        self._pubsub.unsubscribe()
-        GAThreadManager.stop_thread(self._pubsub_thread)
-        self._pubsub_thread = None
-
-    def _listen_to_redis_events(self):
-        """
-        """
-        for event in self._pubsub.listen():
-
-            if event['type'] in ('subscribe', 'unsubscribe'):
-                continue
+        self._listening = False
 
-            channel = event['channel']
+        for channel, handler in self._subscriptions.items():
+            self.pubsub_dispatcher.unsubscribe(channel, handler)
 
-            if channel in self._subscriptions:
-                handler = self._subscriptions[channel]
-                handler(event['data'])
+        self.pubsub_dispatcher.stop()
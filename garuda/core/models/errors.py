@@ -11,6 +11,7 @@ class GAError(object):
     TYPE_NOTALLOWED = 'not allowed'
     TYPE_AUTHENTICATIONFAILURE = 'authentication failed'
     TYPE_UNAUTHORIZED = 'unauthorized'
+    TYPE_TOOMANYREQUESTS = 'too many requests'
 
     def __init__(self, type, title, description, suggestion=None, property_name=''):
         """
@@ -2,6 +2,8 @@
 
 from uuid import uuid4
 
+from garuda.core.lib import GATimings
+
 
 class GARequest(object):
     """
@@ -15,8 +17,9 @@ class GARequest(object):
     ACTION_ASSIGN = 'ASSIGN'
     ACTION_COUNT = 'COUNT'
     ACTION_LISTENEVENTS = 'LISTEN'
+    ACTION_BATCH = 'BATCH'
 
-    def __init__(self, action, channel=None, content={}, resources=[], username=None, token=None, cookies=None, filter=None, order_by=None, page=None, page_size=None, parameters={}):
+    def __init__(self, action, channel=None, content={}, resources=[], username=None, token=None, cookies=None, filter=None, order_by=None, page=None, page_size=None, parameters={}, stream=False, if_none_match=None, if_modified_since=None, timings=None, client_address=None):
         """
         """
         self._uuid = str(uuid4())
@@ -32,9 +35,20 @@ class GARequest(object):
         self.order_by = order_by
         self.page = page
         self.page_size = page_size
+        self.stream = stream
+        self.if_none_match = if_none_match
+        self.if_modified_since = if_modified_since
+        self.timings = timings if timings is not None else GATimings()
+        self.client_address = client_address
 
     @property
     def uuid(self):
         """
         """
         return self._uuid
+
+    @property
+    def is_conditional(self):
+        """
+        """
+        return self.if_none_match is not None or self.if_modified_since is not None
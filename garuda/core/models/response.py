@@ -18,6 +18,9 @@ class GAResponse(object):
         self.order_by = None
         self.page = None
         self.page_size = None
+        self.etag = None
+        self.last_modified = None
+        self.not_modified = False
 
         self._uuid = str(uuid4())
 
@@ -18,6 +18,8 @@ class GASession(GASerializable):
         self._garuda_uuid = garuda_uuid
         self.root_object = root_object
         self.ttl = None
+        self.stateless = False
+        self.expiration = None
 
         self.register_attribute(type=str, internal_name='_uuid')
         self.register_attribute(type=str, internal_name='_garuda_uuid')
@@ -21,3 +21,13 @@ class GAAuthenticationPlugin(GAPlugin):
         """
         """
         raise NotImplementedError("%s must implement authenticate method" % self)
+
+    def issue_session_token(self, session):
+        """ Returns a signed token embedding the given session, or None if the plugin uses Redis backed sessions
+        """
+        return None
+
+    def session_from_token(self, token):
+        """ Returns the session embedded in the given signed token, or None if the token is not valid
+        """
+        return None
@@ -34,12 +34,12 @@ class GALogicPlugin(GAPlugin):
     # ReadAll Operations
 
     def will_perform_readall(self, context):
-        """
+        """ When context.request.stream is True, context.objects is an iterator: wrap it instead of consuming it
         """
         return context
 
     def did_perform_readall(self, context):
-        """
+        """ When context.request.stream is True, context.objects is an iterator: wrap it instead of consuming it
         """
         return context
 
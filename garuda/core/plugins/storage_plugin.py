@@ -26,11 +26,18 @@ class GAStoragePlugin(GAPlugin):
         """
         raise NotImplementedError("%s must implement get method" % self)
 
-    def get_all(self, user_identifier, parent, resource_name, page=None, page_size=None, filter=None, order_by=None):
-        """
+    def get_all(self, user_identifier, parent, resource_name, page=None, page_size=None, filter=None, order_by=None, stream=False):
+        """ Returns the objects of the page. If stream is True, data can be an iterator lazily producing the objects
         """
         raise NotImplementedError("%s must implement get_all method" % self)
 
+    def get_last_updated_dates(self, user_identifier, resource_name, identifier=None, parent=None, page=None, page_size=None, filter=None, order_by=None):
+        """ Returns the (identifier, last_updated_date) tuples of the object, or of the page, without hydrating them
+
+            This is optional. Plugins that cannot do better than a full fetch return None.
+        """
+        return None
+
     def create(self, user_identifier, resource, parent=None):
         """
         """
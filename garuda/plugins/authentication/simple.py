@@ -1,23 +1,28 @@
 # -*- coding: utf-8 -*-
 
 import logging
+import time
 logger = logging.getLogger('garuda.plugin.authentication.simple')
 
-from garuda.core.lib import GASDKLibrary
-from garuda.core.models import GAPluginManifest
+from garuda.core.lib import GASDKLibrary, GATokenSigner
+from garuda.core.models import GAPluginManifest, GASession
 from garuda.core.plugins import GAAuthenticationPlugin
 
 
 class GASimpleAuthenticationPlugin(GAAuthenticationPlugin):
-    """
+    """ Authentication plugin delegating the credentials check to an optional auth_function
+
+        When a secret is given, sessions are stateless: they are embedded in signed tokens valid
+        for token_ttl seconds, that are validated without any Redis lookup.
     """
 
-    def __init__(self, auth_function=None):
+    def __init__(self, auth_function=None, secret=None, token_ttl=3600):
         """
         """
         super(GASimpleAuthenticationPlugin, self).__init__()
 
         self._auth_function = auth_function
+        self._token_signer = GATokenSigner(secret=secret, ttl=token_ttl) if secret else None
 
     @classmethod
     def manifest(cls):
@@ -51,3 +56,32 @@ class GASimpleAuthenticationPlugin(GAAuthenticationPlugin):
             auth.api_key = session.uuid
             auth.password = None
             return auth
+
+    def issue_session_token(self, session):
+        """
+        """
+        if not self._token_signer:
+            return None
+
+        session.stateless = True
+        session.expiration = time.time() + self._token_signer.ttl
+
+        return self._token_signer.sign(data=session.to_dict(), expiration=session.expiration)
+
+    def session_from_token(self, token):
+        """
+        """
+        if not self._token_signer:
+            return None
+
+        content = self._token_signer.verify(token)
+
+        if not content:
+            return None
+
+        data, expiration = content
+        session = GASession.from_dict(data=data)
+        session.stateless = True
+        session.expiration = expiration
+
+        return session
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    Moves the permissions stored by older versions of GARedisPermissionsPlugin to the indexed layout.
+
+    Usage: python -m garuda.plugins.permissions.migrate_redis_permissions --redis 127.0.0.1:6379/0 [--redis host:port/db ...]
+
+    The Redis endpoints must be given in the same order as in the redis_info of the core controller.
+"""
+import argparse
+
+from garuda.core.controllers import GACoreController
+
+from .redis_permissions import GARedisPermissionsPlugin
+
+
+def parse_redis_endpoint(endpoint):
+    """
+    """
+    address, db = endpoint.split('/') if '/' in endpoint else (endpoint, 0)
+    host, port = address.split(':') if ':' in address else (address, 6379)
+
+    return {'host': host, 'port': int(port), 'db': int(db)}
+
+
+def run(redis_infos, batch_size):
+    """
+    """
+    permissions_plugin = GARedisPermissionsPlugin()
+    GACoreController(garuda_uuid='garuda-permissions-migration', redis_info=redis_infos, permission_plugins=[permissions_plugin])
+
+    print '%d permissions migrated' % permissions_plugin.migrate_legacy_permissions(batch_size=batch_size)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Garuda Redis permissions migration')
+
+    parser.add_argument('--redis',
+                        dest='redis_endpoints',
+                        help='Redis endpoint as host:port/db. Repeat it for every shard',
+                        action='append',
+                        required=True,
+                        type=str)
+
+    parser.add_argument('--batch-size',
+                        dest='batch_size',
+                        help='number of keys migrated at once',
+                        default=500,
+                        type=int)
+
+    args = parser.parse_args()
+
+    run(redis_infos=[parse_redis_endpoint(endpoint) for endpoint in args.redis_endpoints], batch_size=args.batch_size)
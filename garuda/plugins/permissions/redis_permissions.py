@@ -10,13 +10,32 @@ logger = logging.getLogger('garuda.controller.permission.redis')
 
 
 class GARedisPermissionsPlugin(GAPermissionsPlugin):
-    """
+    """ Stores the permissions in Redis, on the shard of the resource they are given to
+
+        Every permission is a hash holding its resource, target, target parent, scope, value and parent
+        permission. It is indexed by:
+
+            - a hash per resource and target, to check a permission in one round trip
+            - a hash per resource, target parent and target type, to list the permitted children
+            - a set per permission, of the implicit permissions created from it
+            - a set per resource, of its permissions
+            - a set per target, on the shard of the target, of the permissions given on it
+            - a set per shard, of all its permissions
     """
 
     SYSTEM_PERMISSION = 'garuda-system-permission'
     DEFAULT_PERMISSION = 'read'
     PERMISSIONS = ['read', 'use', 'extend', 'write', 'all']
 
+    PERMISSION_KEY = 'permissions'
+    ALL_PERMISSIONS_INDEX_KEY = 'index:permissions'
+    TARGET_INDEX_KEY = 'index:permissions:target'
+    CHILDREN_INDEX_KEY = 'index:permissions:children'
+    IMPLICIT_INDEX_KEY = 'index:permissions:implicit'
+    RESOURCE_INDEX_KEY = 'index:permissions:resource'
+    TARGETED_INDEX_KEY = 'index:permissions:targeted'
+    LEGACY_PERMISSION_KEY_PATTERN = 'permission:*'
+
     @classmethod
     def manifest(cls):
         """
@@ -54,16 +73,19 @@ class GARedisPermissionsPlugin(GAPermissionsPlugin):
             target_parent = response.data
 
         permission_id = str(uuid4())
-        key = self._compute_permission_redis_key(permission_id=permission_id,
-                                                 resource_id=resource.id if hasattr(resource, 'id') else resource,
-                                                 target_type=target.rest_name,
-                                                 target_id=target.id,
-                                                 target_parent_type=target_parent.rest_name if target_parent else 'none',
-                                                 target_parent_id=target_parent.id if target_parent else 'none',
-                                                 scope='E' if explicit else 'I',
-                                                 parent_permission_id=parent_permission_id)
-
-        self.redis.set(key, self._value_for_permission(permission=permission))
+        resource_id = resource.id if hasattr(resource, 'id') else resource
+        record = {'resource_id': resource_id,
+                  'target_type': target.rest_name,
+                  'target_id': target.id,
+                  'target_parent_type': target_parent.rest_name if target_parent else 'none',
+                  'target_parent_id': target_parent.id if target_parent else 'none',
+                  'scope': 'E' if explicit else 'I',
+                  'value': self._value_for_permission(permission=permission),
+                  'parent_permission_id': parent_permission_id or ''}
+
+        pipeline = self.core_controller.sharded_pipeline(transaction=True)
+        self._index_permission(pipeline=pipeline, permission_id=permission_id, record=record)
+        pipeline.execute()
 
         if target_parent:
             self.create_permission(resource=resource,
@@ -75,33 +97,35 @@ class GARedisPermissionsPlugin(GAPermissionsPlugin):
     def remove_permission(self, resource, target, permission):
         """
         """
-        key_pattern = self._compute_permission_redis_key(resource_id=resource.id if hasattr(resource, 'id') else resource,
-                                                         target_type=target.rest_name,
-                                                         target_id=target.id)
+        resource_id = resource.id if hasattr(resource, 'id') else resource
+        redis = self._redis_for_resource(resource_id)
+        permission_value = self._value_for_permission(permission=permission)
+        target_permissions = redis.hgetall(self._target_index_key(resource_id=resource_id, target_type=target.rest_name, target_id=target.id))
 
-        for key in self.redis.scan_iter(match=key_pattern):
-            if self._permission_for_value(int(self.redis.get(key))) == permission:
-                self._remove_implicit_child_permission(parent_permission_id=self._extract_permission_id_from_key(key))
-                self.redis.delete(key)
+        permission_ids = [permission_id for permission_id, value in target_permissions.iteritems() if self._decode_index_value(value)[0] == permission_value]
+
+        self._remove_permissions(redis=redis, permission_ids=permission_ids)
 
     def remove_all_permissions_of_resource(self, resource):
         """
         """
-        key_pattern = self._compute_permission_redis_key(resource_id=resource.id if hasattr(resource, 'id') else resource)
-        keys = list(self.redis.scan_iter(match=key_pattern))
-        self.redis.delete(*keys)
+        resource_id = resource.id if hasattr(resource, 'id') else resource
+        redis = self._redis_for_resource(resource_id)
+
+        self._remove_permissions(redis=redis, permission_ids=redis.smembers(self._resource_index_key(resource_id=resource_id)))
 
     def remove_all_permissions_for_target_ids(self, target_ids):
         """
         """
-        keys = []
+        permission_ids_by_resource = {}
 
-        for key in self.redis.scan_iter(match='permission:*'):
-            if key.split(":")[5] in target_ids:
-                keys.append(key)
+        for target_id in target_ids:
+            for entry in self.core_controller.redis_for_key(str(target_id)).smembers(self._targeted_index_key(target_id=target_id)):
+                permission_id, resource_id = entry.split(':', 1)
+                permission_ids_by_resource.setdefault(resource_id, []).append(permission_id)
 
-        if len(keys):
-            self.redis.delete(*keys)
+        for resource_id, permission_ids in permission_ids_by_resource.iteritems():
+            self._remove_permissions(redis=self._redis_for_resource(resource_id), permission_ids=permission_ids)
 
     def has_permission(self, resource, target, permission, explicit_only=False):
         """
@@ -109,16 +133,14 @@ class GARedisPermissionsPlugin(GAPermissionsPlugin):
         if resource == self.SYSTEM_PERMISSION:
             return True
 
-        key_pattern = self._compute_permission_redis_key(resource_id=resource.id if hasattr(resource, 'id') else resource,
-                                                         target_type=target.rest_name,
-                                                         target_id=target.id,
-                                                         scope='E' if explicit_only else '*',
-                                                         parent_permission_id='*')
-
+        resource_id = resource.id if hasattr(resource, 'id') else resource
+        redis = self._redis_for_resource(resource_id)
         minimum_permission_value = self._value_for_permission(permission=permission)
 
-        for key in self.redis.scan_iter(match=key_pattern):
-            if int(self.redis.get(key)) >= minimum_permission_value:
+        for value in redis.hvals(self._target_index_key(resource_id=resource_id, target_type=target.rest_name, target_id=target.id)):
+            permission_value, scope = self._decode_index_value(value)
+
+            if permission_value >= minimum_permission_value and (not explicit_only or scope == 'E'):
                 return True
 
         if not target.parent_type or not target.parent_id:
@@ -127,37 +149,65 @@ class GARedisPermissionsPlugin(GAPermissionsPlugin):
         response = self.storage_controller.get(user_identifier=self.SYSTEM_PERMISSION, resource_name=target.parent_type, identifier=target.parent_id)
         target_parent = response.data
 
-        return self.has_permission(resource=resource, target=target_parent, permission=permission, explicit_only=True)
+        # going through the permissions controller shares its decisions cache between the checks of the children
+        return self.core_controller.permissions_controller.has_permission(resource=resource, target=target_parent, permission=permission, explicit_only=True)
 
     def child_ids_with_permission(self, resource, parent, children_type, permission=None):
         """
         """
         parent_id = parent.id if parent and parent.id else 'none'
 
-        key_pattern = self._compute_permission_redis_key(resource_id=resource.id if hasattr(resource, 'id') else resource,
-                                                         target_type=children_type if children_type else '*',
-                                                         target_parent_id=parent_id if parent_id else '*')
-
+        resource_id = resource.id if hasattr(resource, 'id') else resource
+        redis = self._redis_for_resource(resource_id)
         permission_value = self._value_for_permission(permission) if permission else 0
 
         ids = set()
-        for key in self.redis.scan_iter(match=key_pattern):
-
-            if permission_value == 0:  # in that case, no need to query redis for the value, any permission will do
-                ids.add(self._extract_target_from_key(key))
-                continue
+        for value in redis.hvals(self._children_index_key(resource_id=resource_id, target_parent_id=parent_id, target_type=children_type)):
+            child_permission_value, target_id = self._decode_index_value(value)
 
-            if int(self.redis.get(key)) >= permission_value:
-                ids.add(self._extract_target_from_key(key))
+            if child_permission_value >= permission_value:
+                ids.add(target_id)
 
         return ids
 
+    def migrate_legacy_permissions(self, batch_size=500):
+        """ Moves the permissions stored as permission:pid:ppid:rid:ttype:tid:tptype:tpid:s keys to the indexed layout
+
+            The legacy keys are deleted once migrated, so it is safe to run it again if interrupted.
+            Returns the number of migrated permissions.
+        """
+        number_of_migrated_permissions = 0
+
+        for redis in self.core_controller.redis_shards:
+            keys = []
+
+            for key in redis.scan_iter(match=self.LEGACY_PERMISSION_KEY_PATTERN, count=batch_size):
+                keys.append(key)
+
+                if len(keys) >= batch_size:
+                    number_of_migrated_permissions += self._migrate_legacy_keys(redis=redis, keys=keys)
+                    keys = []
+
+            if len(keys):
+                number_of_migrated_permissions += self._migrate_legacy_keys(redis=redis, keys=keys)
+
+        return number_of_migrated_permissions
+
     # Utilities
 
     def is_empty(self):
         """
         """
-        return len(self.redis.keys('permission:*')) == 0
+        for redis in self.core_controller.redis_shards:
+            if redis.scard(self.ALL_PERMISSIONS_INDEX_KEY):
+                return False
+
+        return True
+
+    def _redis_for_resource(self, resource_id):
+        """ Returns the Redis shard holding the permissions of the given resource
+        """
+        return self.core_controller.redis_for_key(str(resource_id))
 
     def _value_for_permission(self, permission):
         """
@@ -169,19 +219,156 @@ class GARedisPermissionsPlugin(GAPermissionsPlugin):
         """
         return self.PERMISSIONS[value]
 
-    def _extract_permission_id_from_key(self, key):
+    def _permission_key(self, permission_id):
+        """
+        """
+        return '%s:%s' % (self.PERMISSION_KEY, permission_id)
+
+    def _target_index_key(self, resource_id, target_type, target_id):
+        """
+        """
+        return '%s:%s:%s:%s' % (self.TARGET_INDEX_KEY, resource_id, target_type, target_id)
+
+    def _children_index_key(self, resource_id, target_parent_id, target_type):
+        """
+        """
+        return '%s:%s:%s:%s' % (self.CHILDREN_INDEX_KEY, resource_id, target_parent_id, target_type)
+
+    def _implicit_index_key(self, permission_id):
+        """
+        """
+        return '%s:%s' % (self.IMPLICIT_INDEX_KEY, permission_id)
+
+    def _resource_index_key(self, resource_id):
+        """
+        """
+        return '%s:%s' % (self.RESOURCE_INDEX_KEY, resource_id)
+
+    def _targeted_index_key(self, target_id):
+        """
+        """
+        return '%s:%s' % (self.TARGETED_INDEX_KEY, target_id)
+
+    def _decode_index_value(self, value):
+        """ Returns the permission value and the scope or target id stored in an index entry
         """
+        permission_value, data = value.split(':', 1)
+
+        return int(permission_value), data
+
+    def _index_permission(self, pipeline, permission_id, record):
+        """ Queues the creation of the given permission and of its index entries in the given sharded pipeline
         """
-        return key.split(':')[1]
+        resource_id = record['resource_id']
+        resource_pipeline = pipeline.for_key(str(resource_id))
+
+        resource_pipeline.hmset(self._permission_key(permission_id), record)
+        resource_pipeline.sadd(self.ALL_PERMISSIONS_INDEX_KEY, permission_id)
+        resource_pipeline.sadd(self._resource_index_key(resource_id=resource_id), permission_id)
+        resource_pipeline.hset(self._target_index_key(resource_id=resource_id, target_type=record['target_type'], target_id=record['target_id']),
+                               permission_id, '%s:%s' % (record['value'], record['scope']))
+        resource_pipeline.hset(self._children_index_key(resource_id=resource_id, target_parent_id=record['target_parent_id'], target_type=record['target_type']),
+                               permission_id, '%s:%s' % (record['value'], record['target_id']))
+
+        if record['parent_permission_id']:
+            resource_pipeline.sadd(self._implicit_index_key(permission_id=record['parent_permission_id']), permission_id)
 
-    def _extract_target_from_key(self, key):
+        pipeline.for_key(str(record['target_id'])).sadd(self._targeted_index_key(target_id=record['target_id']), '%s:%s' % (permission_id, resource_id))
+
+    def _unindex_permission(self, pipeline, permission_id, record):
+        """ Queues the deletion of the given permission and of its index entries in the given sharded pipeline
         """
+        resource_id = record['resource_id']
+        resource_pipeline = pipeline.for_key(str(resource_id))
+
+        resource_pipeline.delete(self._permission_key(permission_id), self._implicit_index_key(permission_id=permission_id))
+        resource_pipeline.srem(self.ALL_PERMISSIONS_INDEX_KEY, permission_id)
+        resource_pipeline.srem(self._resource_index_key(resource_id=resource_id), permission_id)
+        resource_pipeline.hdel(self._target_index_key(resource_id=resource_id, target_type=record['target_type'], target_id=record['target_id']), permission_id)
+        resource_pipeline.hdel(self._children_index_key(resource_id=resource_id, target_parent_id=record['target_parent_id'], target_type=record['target_type']), permission_id)
+
+        if record['parent_permission_id']:
+            resource_pipeline.srem(self._implicit_index_key(permission_id=record['parent_permission_id']), permission_id)
+
+        pipeline.for_key(str(record['target_id'])).srem(self._targeted_index_key(target_id=record['target_id']), '%s:%s' % (permission_id, resource_id))
+
+    def _remove_permissions(self, redis, permission_ids):
+        """ Removes the given permissions and the implicit permissions created from them. They belong to the same resource, hence to the same shard
         """
-        return key.split(':')[5]
+        records = {}
+        permission_ids = list(permission_ids)
+
+        while len(permission_ids):
+            pipeline = redis.pipeline(transaction=False)
+
+            for permission_id in permission_ids:
+                pipeline.hgetall(self._permission_key(permission_id))
+                pipeline.smembers(self._implicit_index_key(permission_id=permission_id))
+
+            results = pipeline.execute()
+            implicit_permission_ids = set()
+
+            for index, permission_id in enumerate(permission_ids):
+                record, children_ids = results[2 * index], results[2 * index + 1]
+
+                if record:
+                    records[permission_id] = record
+
+                implicit_permission_ids.update(children_ids)
+
+            permission_ids = [permission_id for permission_id in implicit_permission_ids if permission_id not in records]
+
+        if not len(records):
+            return
+
+        pipeline = self.core_controller.sharded_pipeline(transaction=True)
+
+        for permission_id, record in records.iteritems():
+            self._unindex_permission(pipeline=pipeline, permission_id=permission_id, record=record)
+
+        pipeline.execute()
+
+    def _migrate_legacy_keys(self, redis, keys):
+        """
+        """
+        values = redis.mget(keys)
+        pipeline = self.core_controller.sharded_pipeline(transaction=True)
+        legacy_keys = []
+
+        for key, value in zip(keys, values):
+            components = key.split(':')
+
+            if value is None:
+                continue
+
+            if len(components) != 9:
+                logger.warning('Could not migrate the legacy permission %s' % key)
+                continue
+
+            _, permission_id, parent_permission_id, resource_id, target_type, target_id, target_parent_type, target_parent_id, scope = components
+            record = {'resource_id': resource_id,
+                      'target_type': target_type,
+                      'target_id': target_id,
+                      'target_parent_type': target_parent_type,
+                      'target_parent_id': target_parent_id,
+                      'scope': scope,
+                      'value': int(value),
+                      'parent_permission_id': parent_permission_id if parent_permission_id not in ('None', '*') else ''}
+
+            self._index_permission(pipeline=pipeline, permission_id=permission_id, record=record)
+            legacy_keys.append(key)
+
+        if not len(legacy_keys):
+            return 0
+
+        pipeline.execute()
+        redis.delete(*legacy_keys)
+
+        return len(legacy_keys)
 
     def _compute_permission_redis_key(self, permission_id='*', parent_permission_id='*', resource_id='*', target_type='*',
                                       target_id='*', target_parent_type='*', target_parent_id='*', scope='*'):
-        """
+        """ Returns the key, or key pattern, of a permission in the legacy layout
         """
         # permission:pid:ppid:rid:ttype:tid:tptype:tpid:s
 
@@ -190,15 +377,3 @@ class GARedisPermissionsPlugin(GAPermissionsPlugin):
                                                        target_type, target_id,  # target information
                                                        target_parent_type, target_parent_id,  # target parent information
                                                        scope)  # explicit/implicit
-
-    def _remove_implicit_child_permission(self, parent_permission_id):
-        """
-        """
-        key_pattern = self._compute_permission_redis_key(parent_permission_id=parent_permission_id)
-
-        pipeline = self.redis.pipeline()
-        pipeline.multi()
-        for key in self.redis.scan_iter(match=key_pattern):
-            self._remove_implicit_child_permission(parent_permission_id=self._extract_permission_id_from_key(key))
-            pipeline.delete(key)
-        pipeline.execute()
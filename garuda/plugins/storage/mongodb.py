@@ -17,7 +17,13 @@ class GAMongoStoragePlugin(GAStoragePlugin):
     """
     """
 
-    def __init__(self, db_name='garuda', mongo_uri='mongodb://127.0.0.1:27017', db_initialization_function=None, sdk_identifier='default'):
+    # TODO: this is for the demo :)
+    DEMO_ORDER_BY = [('type', pymongo.ASCENDING), ('name', pymongo.ASCENDING), ('title', pymongo.ASCENDING), ('creationDate', pymongo.ASCENDING)]
+
+    # fields needed to compute validators and to check permissions without hydrating the full document
+    VALIDATORS_PROJECTION = {'lastUpdatedDate': 1, 'creationDate': 1, 'owner': 1, 'parentType': 1, 'parentID': 1}
+
+    def __init__(self, db_name='garuda', mongo_uri='mongodb://127.0.0.1:27017', db_initialization_function=None, sdk_identifier='default', stream_batch_size=50):
         """
         """
         super(GAMongoStoragePlugin, self).__init__()
@@ -28,6 +34,7 @@ class GAMongoStoragePlugin(GAStoragePlugin):
         self.sdk_identifier = sdk_identifier
         self._permissions_controller = None
         self.db_initialization_function = db_initialization_function
+        self.stream_batch_size = stream_batch_size
         self._predicate_converter = GAMongoPredicateConverter()
 
     @classmethod
@@ -105,16 +112,21 @@ class GAMongoStoragePlugin(GAStoragePlugin):
 
         return GAStoragePluginQueryResponse.init_with_data(data=obj)
 
-    def get_all(self, user_identifier, parent, resource_name, page=None, page_size=None, filter=None, order_by=None):
+    def get_all(self, user_identifier, parent, resource_name, page=None, page_size=None, filter=None, order_by=None, stream=False):
         """
         """
-        objects = []
-
-        # TODO: this is for the demo :)
-        order_by = [('type', pymongo.ASCENDING), ('name', pymongo.ASCENDING), ('title', pymongo.ASCENDING), ('creationDate', pymongo.ASCENDING)]
+        order_by = self.DEMO_ORDER_BY
 
         response = self._get_children_raw_data(user_identifier=user_identifier, parent=parent, resource_name=resource_name, page=page, page_size=page_size, filter=filter, order_by=order_by, grand_total=True)
 
+        if stream:
+            if response.data:
+                response.data.batch_size(self.stream_batch_size)
+
+            return GAStoragePluginQueryResponse.init_with_data(data=self._iter_objects(resource_name=resource_name, documents=response.data), count=response.count)
+
+        objects = []
+
         if response.data:
             for d in response.data:
                 obj = self.instantiate(resource_name)
@@ -123,6 +135,43 @@ class GAMongoStoragePlugin(GAStoragePlugin):
 
         return GAStoragePluginQueryResponse.init_with_data(data=objects, count=response.count)
 
+    def get_last_updated_dates(self, user_identifier, resource_name, identifier=None, parent=None, page=None, page_size=None, filter=None, order_by=None):
+        """
+        """
+        if identifier:
+
+            if not ObjectId.is_valid(identifier):
+                return GAStoragePluginQueryResponse.init_with_error(error_type=GAError.TYPE_NOTFOUND,
+                                                                    title='Resource not found',
+                                                                    description='Could not find resource')
+
+            data = self.db[resource_name].find_one({'_id': ObjectId(identifier)}, self.VALIDATORS_PROJECTION)
+
+            if not data:
+                return GAStoragePluginQueryResponse.init_with_error(error_type=GAError.TYPE_NOTFOUND,
+                                                                    title='Resource not found',
+                                                                    description='Could not find resource')
+
+            obj = self.instantiate(resource_name)
+            obj.from_dict(self._convert_from_dbid(data))
+
+            if not self.permissions_controller.has_permission(resource=user_identifier, target=obj, permission='read'):
+                return GAStoragePluginQueryResponse.init_with_error(error_type=GAError.TYPE_UNAUTHORIZED,
+                                                                    title='Permission Denied',
+                                                                    description='You do not have permission to access this object')
+
+            return GAStoragePluginQueryResponse.init_with_data(data=[(obj.id, obj.last_updated_date)], count=1)
+
+        response = self._get_children_raw_data(user_identifier=user_identifier, parent=parent, resource_name=resource_name, page=page, page_size=page_size, filter=filter, order_by=self.DEMO_ORDER_BY, grand_total=True, projection=self.VALIDATORS_PROJECTION)
+        fingerprints = []
+
+        if response.data:
+            for d in response.data:
+                d = self._convert_from_dbid(d)
+                fingerprints.append((d['ID'], d.get('lastUpdatedDate')))
+
+        return GAStoragePluginQueryResponse.init_with_data(data=fingerprints, count=response.count)
+
     def create(self, user_identifier, resource, parent=None):
         """
         """
@@ -244,7 +293,18 @@ class GAMongoStoragePlugin(GAStoragePlugin):
 
     # UTILITIES
 
-    def _get_children_raw_data(self, user_identifier, parent, resource_name, page=None, page_size=None, filter=None, order_by=None, grand_total=True):
+    def _iter_objects(self, resource_name, documents):
+        """ Lazily hydrates the objects of the given documents, one cursor batch at a time
+        """
+        if not documents:
+            return
+
+        for d in documents:
+            obj = self.instantiate(resource_name)
+            obj.from_dict(self._convert_from_dbid(d))
+            yield obj
+
+    def _get_children_raw_data(self, user_identifier, parent, resource_name, page=None, page_size=None, filter=None, order_by=None, grand_total=True, projection=None):
         """
         """
         skip = 0
@@ -272,7 +332,7 @@ class GAMongoStoragePlugin(GAStoragePlugin):
             if not association_data or association_key not in association_data:
                 return GAStoragePluginQueryResponse(data=[], count=0)
 
-            data = self.db[resource_name].find({'$and': [{'_id': {'$in': [ObjectId(identifier) for identifier in association_data[association_key]]}}, query_filter]})
+            data = self.db[resource_name].find({'$and': [{'_id': {'$in': [ObjectId(identifier) for identifier in association_data[association_key]]}}, query_filter]}, projection)
 
         else:
             identifiers = self.permissions_controller.child_ids_with_permission(resource=user_identifier,
@@ -293,7 +353,7 @@ class GAMongoStoragePlugin(GAStoragePlugin):
                 clause.append({'_id': {'$in': [ObjectId(i) for i in identifiers]}})
 
             clause.append(query_filter)
-            data = self.db[resource_name].find({'$and': clause})
+            data = self.db[resource_name].find({'$and': clause}, projection)
 
         if not data.count():
             return GAStoragePluginQueryResponse(data=[], count=0)
@@ -0,0 +1,84 @@
+import json
+import msgpack
+from unittest import TestCase
+
+from garuda.channels.rest.codecs import GACodecRegistry, GAJSONCodec, GAMsgpackCodec
+
+
+class TestCodecs(TestCase):
+    """
+    """
+
+    def test_json_codec(self):
+        """
+        """
+        codec = GAJSONCodec()
+
+        self.assertEquals(codec.content_type, 'application/json')
+        self.assertEquals(codec.decode(codec.encode({'name': 'enterprise'})), {'name': 'enterprise'})
+        self.assertEquals(json.loads(''.join(codec.encode_iterator(iter([{'a': 1}, {'b': 2}])))), [{'a': 1}, {'b': 2}])
+        self.assertEquals(json.loads(''.join(codec.encode_iterator(iter([])))), [])
+        self.assertTrue(codec.streams)
+
+    def test_json_codec_with_custom_functions(self):
+        """
+        """
+        codec = GAJSONCodec(dumps=lambda data: 'dumped', loads=lambda data: 'loaded')
+
+        self.assertEquals(codec.encode({}), 'dumped')
+        self.assertEquals(codec.decode('{}'), 'loaded')
+
+    def test_msgpack_codec(self):
+        """
+        """
+        codec = GAMsgpackCodec()
+
+        self.assertEquals(codec.content_type, 'application/x-msgpack')
+        self.assertEquals(codec.decode(codec.encode({'name': 'enterprise'})), {'name': 'enterprise'})
+        self.assertEquals(msgpack.unpackb(''.join(codec.encode_iterator(iter([{'a': 1}, {'b': 2}])))), [{'a': 1}, {'b': 2}])
+        self.assertFalse(codec.streams)
+
+
+class TestCodecRegistry(TestCase):
+    """
+    """
+
+    def setUp(self):
+        """
+        """
+        self.registry = GACodecRegistry()
+
+    def test_default_codecs(self):
+        """
+        """
+        self.assertEquals(sorted(self.registry.content_types), ['application/json', 'application/x-msgpack'])
+        self.assertEquals(self.registry.default_codec.content_type, 'application/json')
+
+    def test_codec_for_content_type(self):
+        """
+        """
+        self.assertEquals(self.registry.codec_for_content_type('application/x-msgpack').content_type, 'application/x-msgpack')
+        self.assertEquals(self.registry.codec_for_content_type('application/json; charset=UTF-8').content_type, 'application/json')
+        self.assertEquals(self.registry.codec_for_content_type('text/plain').content_type, 'application/json')
+        self.assertEquals(self.registry.codec_for_content_type(None).content_type, 'application/json')
+
+    def test_codec_for_accept(self):
+        """
+        """
+        self.assertEquals(self.registry.codec_for_accept(None).content_type, 'application/json')
+        self.assertEquals(self.registry.codec_for_accept('*/*').content_type, 'application/json')
+        self.assertEquals(self.registry.codec_for_accept('application/x-msgpack').content_type, 'application/x-msgpack')
+        self.assertEquals(self.registry.codec_for_accept('application/json, application/x-msgpack').content_type, 'application/json')
+        self.assertEquals(self.registry.codec_for_accept('application/json;q=0.5, application/x-msgpack').content_type, 'application/x-msgpack')
+        self.assertEquals(self.registry.codec_for_accept('application/x-msgpack;q=0, */*').content_type, 'application/json')
+        self.assertEquals(self.registry.codec_for_accept('application/x-msgpack;q=wrong').content_type, 'application/json')
+
+    def test_register_codec(self):
+        """
+        """
+        codec = GAJSONCodec(dumps=lambda data: 'fast')
+        self.registry.register_codec(codec)
+        self.assertEquals(self.registry.codec_for_accept('application/json'), codec)
+
+        self.registry.unregister_codec('application/x-msgpack')
+        self.assertEquals(self.registry.codec_for_accept('application/x-msgpack'), codec)
@@ -0,0 +1,57 @@
+import zlib
+from unittest import TestCase
+
+from garuda.channels.rest.compression import GACompressor
+
+
+class TestCompressor(TestCase):
+    """
+    """
+
+    def setUp(self):
+        """
+        """
+        self.compressor = GACompressor(threshold=10, level=6)
+
+    def test_properties(self):
+        """
+        """
+        self.assertEquals(self.compressor.threshold, 10)
+        self.assertEquals(self.compressor.level, 6)
+
+    def test_encoding_for_accept_encoding(self):
+        """
+        """
+        self.assertEquals(self.compressor.encoding_for_accept_encoding(None), None)
+        self.assertEquals(self.compressor.encoding_for_accept_encoding('identity'), None)
+        self.assertEquals(self.compressor.encoding_for_accept_encoding('br'), None)
+        self.assertEquals(self.compressor.encoding_for_accept_encoding('gzip, deflate'), 'gzip')
+        self.assertEquals(self.compressor.encoding_for_accept_encoding('deflate, gzip'), 'gzip')
+        self.assertEquals(self.compressor.encoding_for_accept_encoding('deflate'), 'deflate')
+        self.assertEquals(self.compressor.encoding_for_accept_encoding('gzip;q=0.5, deflate'), 'deflate')
+        self.assertEquals(self.compressor.encoding_for_accept_encoding('gzip;q=0'), None)
+        self.assertEquals(self.compressor.encoding_for_accept_encoding('*'), 'gzip')
+
+    def test_should_compress(self):
+        """
+        """
+        self.assertFalse(self.compressor.should_compress(None))
+        self.assertFalse(self.compressor.should_compress('small'))
+        self.assertTrue(self.compressor.should_compress('large enough body'))
+
+    def test_compress(self):
+        """
+        """
+        body = '{"name": "enterprise"}' * 10
+
+        self.assertEquals(zlib.decompress(self.compressor.compress(body, 'gzip'), zlib.MAX_WBITS | 16), body)
+        self.assertEquals(zlib.decompress(self.compressor.compress(body, 'deflate')), body)
+        self.assertEquals(zlib.decompress(self.compressor.compress(unicode(body), 'deflate')), body)
+
+    def test_compress_iterator(self):
+        """
+        """
+        chunks = ['[', '{"name": "enterprise"}', ',', '{"name": "enterprise"}', ']']
+        compressed = ''.join(self.compressor.compress_iterator(iter(chunks), 'gzip'))
+
+        self.assertEquals(zlib.decompress(compressed, zlib.MAX_WBITS | 16), ''.join(chunks))
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import falcon
+from falcon import testing
+from unittest import TestCase
+from mock import patch
+
+from garuda.channels.rest import GAFalconChannel
+from garuda.core.lib import GATimings
+
+
+class TestFalconChannel(TestCase):
+    """
+    """
+
+    def _make_request(self, remote_addr, forwarded_for=None):
+        """
+        """
+        headers = {'X-Forwarded-For': forwarded_for} if forwarded_for else {}
+        environ = testing.create_environ(headers=headers)
+        environ['REMOTE_ADDR'] = remote_addr
+
+        return falcon.Request(environ)
+
+    def test_client_address_without_trusted_proxies(self):
+        """
+        """
+        channel = GAFalconChannel()
+
+        self.assertEquals(channel._extract_client_address(self._make_request('10.0.0.1')), '10.0.0.1')
+
+        # the forwarding headers of untrusted peers are spoofable, so they are ignored
+        self.assertEquals(channel._extract_client_address(self._make_request('10.0.0.1', forwarded_for='1.1.1.1')), '10.0.0.1')
+        self.assertEquals(channel._extract_client_address(self._make_request('10.0.0.1', forwarded_for='2.2.2.2')), '10.0.0.1')
+
+    def test_client_address_with_trusted_proxies(self):
+        """
+        """
+        channel = GAFalconChannel(trusted_proxies=['192.168.0.1', '192.168.0.2'])
+
+        self.assertEquals(channel._extract_client_address(self._make_request('192.168.0.1', forwarded_for='1.1.1.1')), '1.1.1.1')
+        self.assertEquals(channel._extract_client_address(self._make_request('192.168.0.1', forwarded_for='1.1.1.1, 192.168.0.2')), '1.1.1.1')
+
+        # addresses added by the client in front of the proxies are not trusted
+        self.assertEquals(channel._extract_client_address(self._make_request('192.168.0.1', forwarded_for='6.6.6.6, 1.1.1.1')), '1.1.1.1')
+
+        self.assertEquals(channel._extract_client_address(self._make_request('192.168.0.1')), '192.168.0.1')
+        self.assertEquals(channel._extract_client_address(self._make_request('10.0.0.1', forwarded_for='1.1.1.1')), '10.0.0.1')
+
+    def test_server_timing_of_streamed_responses(self):
+        """
+        """
+        channel = GAFalconChannel(server_timing=True)
+        http_request = self._make_request('10.0.0.1')
+        http_response = falcon.Response()
+        http_response.stream = iter(['[', '{}', ']'])
+
+        timings = GATimings(enabled=True)
+        timings.add('total', 0.001)
+
+        with patch('garuda.channels.rest.falcon_channel.logger') as mock_logger:
+            channel._set_server_timing_headers(http_request=http_request, http_response=http_response, timings=timings)
+
+            self.assertEquals(http_response._headers['server-timing'], 'total;dur=1.000')
+            self.assertEquals(mock_logger.info.call_count, 0)
+
+            self.assertEquals(''.join(http_response.stream), '[{}]')
+
+            self.assertEquals(mock_logger.info.call_count, 1)
+            self.assertEquals(list(mock_logger.info.call_args[1]['extra']['timings'].keys()), ['total', 'stream'])
+
+    def test_server_timing_of_responses(self):
+        """
+        """
+        channel = GAFalconChannel(server_timing=True)
+        http_request = self._make_request('10.0.0.1')
+        http_response = falcon.Response()
+        timings = GATimings(enabled=True)
+
+        with patch('garuda.channels.rest.falcon_channel.logger') as mock_logger:
+            channel._set_server_timing_headers(http_request=http_request, http_response=http_response, timings=timings)
+            self.assertEquals(mock_logger.info.call_count, 1)
+
+        self.assertIsNone(http_response.stream)
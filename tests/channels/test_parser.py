@@ -1,6 +1,7 @@
 from unittest import TestCase
 
 from garuda.channels.rest.parser import GAPathParser
+from garuda.channels.rest.route_table import GARouteTable
 from garuda.core.lib import GASDKLibrary
 
 from tests.tstdk import v1_0 as tstdk
@@ -72,6 +73,16 @@ class TestPathParser(TestCase):
         self.assertEquals(parser.resources[0].name, 'event')
         self.assertEquals(parser.resources[0].value, None)
 
+    def test_parse_batch(self):
+        """
+        """
+        parser = GAPathParser()
+        parser.parse(path='api/v1_0/batch', url_prefix='api')
+
+        self.assertEquals(len(parser.resources), 1)
+        self.assertEquals(parser.resources[0].name, 'batch')
+        self.assertEquals(parser.resources[0].value, None)
+
     def test_resource_mappings(self):
         """
         """
@@ -81,3 +92,27 @@ class TestPathParser(TestCase):
         self.assertEquals(len(parser.resources), 1)
         self.assertEquals(parser.resources[0].name, 'enterprise')
         self.assertEquals(parser.resources[0].value, None)
+
+    def test_parse_with_route_table(self):
+        """
+        """
+        route_table = GARouteTable(sdk=tstdk)
+        parser = GAPathParser(route_table=route_table)
+        parser.parse(path='api/v1_0/enterprises/xxx/users', url_prefix='api')
+
+        self.assertEquals(parser.version, 'v1_0')
+        self.assertEquals(len(parser.resources), 2)
+        self.assertEquals(parser.resources[0].name, 'enterprise')
+        self.assertEquals(parser.resources[0].value, 'xxx')
+        self.assertEquals(parser.resources[1].name, 'user')
+        self.assertEquals(parser.resources[1].value, None)
+
+    def test_parse_unknown_resource_with_route_table(self):
+        """
+        """
+        parser = GAPathParser(route_table=GARouteTable(sdk=tstdk))
+        parser.parse(path='api/v1_0/unknowns/xxx', url_prefix='api')
+
+        self.assertEquals(len(parser.resources), 1)
+        self.assertEquals(parser.resources[0].name, None)
+        self.assertEquals(parser.resources[0].value, 'xxx')
@@ -0,0 +1,56 @@
+from unittest import TestCase
+
+from garuda.channels.rest.route_table import GARouteTable
+from garuda.core.models import GAResource
+
+from tests.tstdk import v1_0 as tstdk
+
+
+class TestRouteTable(TestCase):
+    """
+    """
+
+    def setUp(self):
+        """
+        """
+        self.route_table = GARouteTable(sdk=tstdk)
+
+    def test_version(self):
+        """
+        """
+        self.assertEquals(self.route_table.version, 'v1_0')
+
+    def test_rest_name_for_resource_name(self):
+        """
+        """
+        self.assertEquals(self.route_table.rest_name_for_resource_name('enterprises'), 'enterprise')
+        self.assertEquals(self.route_table.rest_name_for_resource_name('root'), 'root')
+        self.assertEquals(self.route_table.rest_name_for_resource_name('events'), 'event')
+        self.assertEquals(self.route_table.rest_name_for_resource_name('batch'), 'batch')
+        self.assertEquals(self.route_table.rest_name_for_resource_name('unknowns'), None)
+
+    def test_children(self):
+        """
+        """
+        self.assertTrue(self.route_table.is_valid_child('enterprise', 'user'))
+        self.assertFalse(self.route_table.is_valid_child('user', 'enterprise'))
+        self.assertFalse(self.route_table.is_valid_child('unknown', 'user'))
+
+    def test_valid_route(self):
+        """
+        """
+        self.assertTrue(self.route_table.is_valid_route([GAResource('enterprise', 'xxx')]))
+        self.assertTrue(self.route_table.is_valid_route([GAResource('enterprise', 'xxx'), GAResource('user', None)]))
+        self.assertFalse(self.route_table.is_valid_route([GAResource('user', 'xxx'), GAResource('enterprise', None)]))
+        self.assertFalse(self.route_table.is_valid_route([GAResource(None, 'xxx')]))
+        self.assertFalse(self.route_table.is_valid_route([]))
+        self.assertFalse(self.route_table.is_valid_route(None))
+
+    def test_resolve_shape_is_cached(self):
+        """
+        """
+        self.assertEquals(self.route_table.resolve_shape(('enterprises', 'users')), ('enterprise', 'user'))
+        self.assertEquals(len(self.route_table.shapes), 1)
+
+        self.route_table.resolve_shape(('enterprises', 'users'))
+        self.assertEquals(len(self.route_table.shapes), 1)
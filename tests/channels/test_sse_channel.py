@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import json
+from unittest import TestCase
+from mock import MagicMock
+
+from garuda.channels.rest import GASSEChannel
+from garuda.core.models import GAPushEvent, GARequest, GASession
+
+import tests.tstdk.v1_0 as tstdk
+
+
+class TestSSEChannel(TestCase):
+    """
+    """
+
+    def setUp(self):
+        """
+        """
+        self.channel = GASSEChannel(port=5455, heartbeat_interval=0)
+        self.channel.core_controller = MagicMock()
+        self.session = GASession(garuda_uuid='xxx-xxx-xxx-xxx')
+
+    def test_manifest(self):
+        """
+        """
+        self.assertEquals(GASSEChannel.manifest().identifier, 'garuda.communicationchannels.rest.sse')
+
+    def test_stream_events(self):
+        """
+        """
+        entity = tstdk.GAEnterprise(name='name')
+        event = GAPushEvent(action=GARequest.ACTION_CREATE, entity=entity)
+
+        push_controller = self.channel.core_controller.push_controller
+        sessions_controller = self.channel.core_controller.sessions_controller
+        push_controller.wait_for_events.side_effect = [[event], [], []]
+        sessions_controller.is_session_alive.side_effect = [True, False]
+
+        messages = list(self.channel._stream_events(session=self.session))
+
+        self.assertEquals(len(messages), 3)
+        self.assertEquals(messages[0], 'retry: 3000\n\n')
+        self.assertTrue(messages[1].startswith('id: '))
+        self.assertTrue(messages[1].endswith('\n\n'))
+        self.assertEquals(messages[2], ': keepalive\n\n')
+
+        data = json.loads(messages[1].split('data: ')[1])
+        self.assertEquals(data['events'][0]['type'], 'CREATE')
+        self.assertEquals(data['events'][0]['entities'][0]['name'], 'name')
+
+        sessions_controller.set_session_listening_status.assert_any_call(session=self.session, status=True)
+        sessions_controller.set_session_listening_status.assert_called_with(session=self.session, status=False)
+        self.assertEquals(sessions_controller.set_session_listening_status.call_count, 4)
+
+    def test_stream_events_closed_by_client(self):
+        """
+        """
+        sessions_controller = self.channel.core_controller.sessions_controller
+        self.channel.core_controller.push_controller.wait_for_events.return_value = []
+
+        stream = self.channel._stream_events(session=self.session)
+        next(stream)
+        next(stream)
+        stream.close()
+
+        sessions_controller.set_session_listening_status.assert_called_with(session=self.session, status=False)
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase
+from mock import patch
+
+from garuda.channels.rest.workers import GAWorkersTuner
+
+
+def cpu_times(user=0, nice=0, system=0, idle=0, iowait=0, irq=0, softirq=0, steal=0):
+    """
+    """
+    return {'user': user, 'nice': nice, 'system': system, 'idle': idle, 'iowait': iowait, 'irq': irq, 'softirq': softirq, 'steal': steal}
+
+
+class TestWorkersTuner(TestCase):
+    """
+    """
+
+    def test_default_number_of_workers(self):
+        """
+        """
+        with patch('multiprocessing.cpu_count', return_value=4):
+            self.assertEquals(GAWorkersTuner.default_number_of_workers(), 9)
+
+    def test_number_of_workers_for_cpu_times(self):
+        """
+        """
+        with patch('multiprocessing.cpu_count', return_value=4):
+            tuner = GAWorkersTuner()
+
+            self.assertEquals(tuner.number_of_workers_for_cpu_times(cpu_times(user=50, idle=50)), 4)
+            self.assertEquals(tuner.number_of_workers_for_cpu_times(cpu_times(user=40, iowait=20, idle=40)), 6)
+            self.assertEquals(tuner.number_of_workers_for_cpu_times(cpu_times(user=10, iowait=80, idle=10)), 8)
+            self.assertEquals(tuner.number_of_workers_for_cpu_times(cpu_times(user=25, steal=50, idle=25)), 2)
+            self.assertEquals(tuner.number_of_workers_for_cpu_times(cpu_times(idle=100)), 4)
+            self.assertEquals(tuner.number_of_workers_for_cpu_times(cpu_times()), 9)
+
+    def test_number_of_workers_is_bounded(self):
+        """
+        """
+        with patch('multiprocessing.cpu_count', return_value=4):
+            self.assertEquals(GAWorkersTuner(max_workers=5).number_of_workers_for_cpu_times(cpu_times(user=10, iowait=80, idle=10)), 5)
+            self.assertEquals(GAWorkersTuner(min_workers=3).number_of_workers_for_cpu_times(cpu_times(user=1, steal=99)), 3)
+
+    def test_number_of_workers(self):
+        """
+        """
+        with patch('multiprocessing.cpu_count', return_value=4):
+            tuner = GAWorkersTuner(sample_interval=0)
+
+            with patch.object(tuner, '_read_cpu_times', side_effect=[cpu_times(user=100, iowait=100), cpu_times(user=140, iowait=120, idle=40)]):
+                self.assertEquals(tuner.number_of_workers(), 6)
+
+            with patch.object(tuner, '_read_cpu_times', return_value=None):
+                self.assertEquals(tuner.number_of_workers(), 9)
+
+    def test_read_cpu_times(self):
+        """
+        """
+        times = GAWorkersTuner()._read_cpu_times()
+
+        if times is not None:
+            self.assertEquals(sorted(times.keys()), ['idle', 'iowait', 'irq', 'nice', 'softirq', 'steal', 'system', 'user'])
@@ -39,6 +39,7 @@ class TestChannelsController(TestCase):
 
         self.assertEquals(self.channels_controller.garuda_uuid, 'garuda-uuid')
         self.assertEquals(self.channels_controller.redis_info, self.redis_info)
+        self.assertIsNone(self.channels_controller.push_options)
 
         self.assertEquals(self.channels_controller.channels, [self.falcon_channel])
         self.assertEquals(self.channels_controller.logic_plugins, [])
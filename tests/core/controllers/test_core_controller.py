@@ -4,9 +4,9 @@ from unittest import TestCase
 from mock import patch
 from bambou import NURESTRootObject
 
-from garuda.core.lib import GASDKLibrary
-from garuda.core.controllers import GACoreController
-from garuda.core.models import GASession, GARequest, GAController, GAResource, GAError, GAResponseFailure, GAResponseSuccess
+from garuda.core.lib import GASDKLibrary, GATimings
+from garuda.core.controllers import GACoreController, GAPushController
+from garuda.core.models import GASession, GARequest, GAController, GAResource, GAError, GAResponseFailure, GAResponseSuccess, GAStoragePluginQueryResponse
 
 import tests.tstdk.v1_0 as tstdk
 
@@ -68,6 +68,26 @@ class TestCoreController(TestCase):
         self.assertIsNotNone(core_controller.permissions_controller)
         self.assertIsNotNone(core_controller.sessions_controller)
 
+    def test_push_options(self):
+        """
+        """
+        core_controller = GACoreController(garuda_uuid='test-garuda', redis_info={'host': '127.0.0.1', 'port': 6379, 'db': 6}, push_options={'coalesce_events': True})
+        self.assertTrue(core_controller.push_controller._coalesce_events)
+
+        core_controller = GACoreController(garuda_uuid='test-garuda', redis_info={'host': '127.0.0.1', 'port': 6379, 'db': 6},
+                                           push_options={'max_event_queue_length': 10,
+                                                         'event_queue_ttl': 20,
+                                                         'event_queue_overflow_policy': GAPushController.OVERFLOW_POLICY_REFETCH,
+                                                         'number_of_fan_out_workers': 0})
+        self.assertFalse(core_controller.push_controller._coalesce_events)
+        self.assertEquals(core_controller.push_controller._max_event_queue_length, 10)
+        self.assertEquals(core_controller.push_controller._event_queue_ttl, 20)
+        self.assertEquals(core_controller.push_controller._event_queue_overflow_policy, GAPushController.OVERFLOW_POLICY_REFETCH)
+        self.assertEquals(core_controller.push_controller._number_of_fan_out_workers, 0)
+
+        with self.assertRaises(ValueError):
+            GACoreController(garuda_uuid='test-garuda', redis_info={'host': '127.0.0.1', 'port': 6379, 'db': 6}, push_options={'event_queue_overflow_policy': 'NOPE'})
+
     def test_additonal_controllers(self):
         """
         """
@@ -122,6 +142,22 @@ class TestCoreController(TestCase):
                     self.assertEquals(result.__class__, GAResponseFailure)
                     self.assertEquals(result.content[0].type, GAError.TYPE_UNAUTHORIZED)
 
+    def test_execute_model_request_with_throttled_authentication(self):
+        """
+        """
+        GASDKLibrary().register_sdk('default', tstdk)
+        core_controller = GACoreController(garuda_uuid='test-garuda', redis_info={'host': '127.0.0.1', 'port': 6379, 'db': 6},
+                                           additional_controller_classes=[AdditionalController], authentication_plugins=[FakeAuthPlugin()])
+
+        request = GARequest(action=GARequest.ACTION_CREATE)
+        request.resources = [GAResource(name='root', value=None)]
+
+        with patch.object(core_controller.sessions_controller, 'is_authentication_throttled', return_value=True):
+            with patch.object(core_controller.sessions_controller, 'create_session', return_value=None):
+                result = core_controller.execute_model_request(request)
+                self.assertEquals(result.__class__, GAResponseFailure)
+                self.assertEquals(result.content[0].type, GAError.TYPE_TOOMANYREQUESTS)
+
     def test_execute_model_request_with_create_session(self):
         """
         """
@@ -188,3 +224,66 @@ class TestCoreController(TestCase):
             result = core_controller.execute_events_request(request)
             self.assertEquals(result[0].__class__, GASession)
             self.assertEquals(result[1], None)
+
+    def test_execute_batch_request_with_invalid_session(self):
+        """
+        """
+        GASDKLibrary().register_sdk('default', tstdk)
+        core_controller = GACoreController(garuda_uuid='test-garuda', redis_info={'host': '127.0.0.1', 'port': 6379, 'db': 6},
+                                           additional_controller_classes=[AdditionalController], authentication_plugins=[FakeAuthPlugin()])
+
+        request = GARequest(action=GARequest.ACTION_CREATE)
+        request.token = 'toto'
+        sub_request = GARequest(action=GARequest.ACTION_CREATE, resources=[GAResource(name='enterprise', value=None)])
+
+        with patch.object(core_controller.sessions_controller, 'get_session', return_value=None):
+            with patch.object(core_controller.sessions_controller, 'create_session') as create_session:
+                result = core_controller.execute_batch_request(request, sub_requests=[sub_request])
+                self.assertFalse(create_session.called)
+
+        self.assertEquals(result[0], None)
+        self.assertEquals(result[1].__class__, GAResponseFailure)
+        self.assertEquals(result[1].content[0].type, GAError.TYPE_UNAUTHORIZED)
+
+    def test_execute_batch_request_with_valid_session(self):
+        """
+        """
+        GASDKLibrary().register_sdk('default', tstdk)
+        core_controller = GACoreController(garuda_uuid='test-garuda', redis_info={'host': '127.0.0.1', 'port': 6379, 'db': 6},
+                                           additional_controller_classes=[AdditionalController], authentication_plugins=[FakeAuthPlugin()])
+
+        request = GARequest(action=GARequest.ACTION_CREATE)
+        request.token = 'toto'
+        sub_request1 = GARequest(action=GARequest.ACTION_CREATE, resources=[GAResource(name='enterprise', value=None)])
+        sub_request2 = GARequest(action=GARequest.ACTION_READ, resources=[GAResource(name='enterprise', value='xxx')])
+
+        session = GASession(garuda_uuid='test-garuda', root_object=tstdk.GARoot())
+
+        with patch.object(core_controller.sessions_controller, 'get_session', return_value=session) as get_session:
+            with patch.object(core_controller.sessions_controller, 'reset_session_ttl') as reset_session_ttl:
+                responses, failure = core_controller.execute_batch_request(request, sub_requests=[sub_request1, sub_request2])
+
+                self.assertEquals(get_session.call_count, 1)
+                self.assertEquals(reset_session_ttl.call_count, 1)
+
+        self.assertEquals(failure, None)
+        self.assertEquals(len(responses), 2)
+        self.assertEquals(responses[0].__class__, GAResponseFailure)  # nothing exists that's fine
+        self.assertEquals(responses[1].__class__, GAResponseFailure)
+
+    def test_execute_model_request_with_timings(self):
+        """
+        """
+        GASDKLibrary().register_sdk('default', tstdk)
+        core_controller = GACoreController(garuda_uuid='test-garuda', redis_info={'host': '127.0.0.1', 'port': 6379, 'db': 6},
+                                           additional_controller_classes=[AdditionalController], authentication_plugins=[FakeAuthPlugin()])
+
+        request = GARequest(action=GARequest.ACTION_READ, timings=GATimings(enabled=True))
+        request.resources = [GAResource(name='enterprise', value='xxx')]
+        request.token = 'toto'
+
+        with patch.object(core_controller.sessions_controller, 'get_session', return_value=GASession(garuda_uuid='test-garuda', root_object=tstdk.GARoot(id='root'))):
+            with patch.object(core_controller.storage_controller, 'get', return_value=GAStoragePluginQueryResponse.init_with_data(data=tstdk.GAEnterprise(id='xxx'))):
+                core_controller.execute_model_request(request)
+
+        self.assertEquals(request.timings.to_dict().keys(), ['session', 'ttl', 'storage'])
@@ -85,6 +85,16 @@ class TestLogicController(TestCase):
         managing_plugins = logic_controller._managing_plugins(resource_name='shared', action=GARequest.ACTION_ASSIGN)
         self.assertEquals(sorted(managing_plugins), sorted([plugin2]))
 
+    def test_has_managing_plugins(self):
+        """
+        """
+        core_controller = GACoreController(garuda_uuid='test-garuda', redis_info={'host': '127.0.0.1', 'port': '6379', 'db': 6}, authentication_plugins=[])
+        logic_controller = GALogicController(plugins=[LogicPlugin1()], core_controller=core_controller)
+        logic_controller.ready()
+
+        self.assertTrue(logic_controller.has_managing_plugins(resource_name='fakeobject1', action=GARequest.ACTION_CREATE))
+        self.assertFalse(logic_controller.has_managing_plugins(resource_name='fakeobject1', action=GARequest.ACTION_READ))
+
     def test_perform_delegate(self):
         """
         """
@@ -4,6 +4,7 @@ from mock import patch
 from bambou import NURESTRootObject
 
 from garuda.core.controllers import GAOperationsController
+from garuda.core.lib import GAEntityTag, GATimings
 from garuda.core.models import GAContext, GASession, GARequest, GAResource, GAError, GAStoragePluginQueryResponse
 
 import tests.tstdk.v1_0 as tstdk
@@ -13,6 +14,11 @@ class FakeLogicController(object):
     """
     """
 
+    def has_managing_plugins(self, resource_name, action):
+        """
+        """
+        return False
+
     def perform_delegate(self, delegate, context):
         """
         """
@@ -32,7 +38,7 @@ class FakeStorageController(object):
         """
         return GAStoragePluginQueryResponse()
 
-    def get_all(self, user_identifier, parent, resource_name, page, page_size, filter, order_by):
+    def get_all(self, user_identifier, parent, resource_name, page, page_size, filter, order_by, stream=False):
         """
         """
         return GAStoragePluginQueryResponse()
@@ -42,6 +48,11 @@ class FakeStorageController(object):
         """
         return GAStoragePluginQueryResponse()
 
+    def get_last_updated_dates(self, user_identifier, resource_name, identifier=None, parent=None, page=None, page_size=None, filter=None, order_by=None):
+        """
+        """
+        return None
+
     def create(self, user_identifier, resource, parent):
         """
         """
@@ -169,6 +180,113 @@ class TestOperationsController(TestCase):
                 operations_controller.run()
                 self.assertEquals(context.object, 'did_read_all')
 
+    def test_run_conditional_read_with_fresh_representation(self):
+        """
+        """
+        session = GASession(garuda_uuid='xxx-xxx-xxx-xxx')
+        session.root_object = NURESTRootObject()
+        session.root_object.id = 'test'
+
+        fingerprints = [('id', 42.0)]
+        request = GARequest(action=GARequest.ACTION_READ, if_none_match=GAEntityTag.compute(fingerprints))
+        request.resources = [GAResource(name='enterprise', value='id')]
+
+        context = GAContext(session=session, request=request)
+        context.performed_delegates = []
+
+        operations_controller = GAOperationsController(context=context, logic_controller=self.fake_logic_controller, storage_controller=self.fake_storage_controller)
+
+        with patch.object(self.fake_storage_controller, 'get_last_updated_dates', return_value=GAStoragePluginQueryResponse.init_with_data(data=fingerprints, count=1)):
+            with patch.object(self.fake_storage_controller, 'get') as m:
+                operations_controller.run()
+                self.assertFalse(m.called)
+
+        self.assertTrue(context.not_modified)
+        self.assertEquals(context.etag, request.if_none_match)
+        self.assertEquals(context.last_modified, 42.0)
+        self.assertEquals(context.performed_delegates, [])
+
+    def test_run_conditional_read_with_stale_representation(self):
+        """
+        """
+        session = GASession(garuda_uuid='xxx-xxx-xxx-xxx')
+        session.root_object = NURESTRootObject()
+        session.root_object.id = 'test'
+
+        request = GARequest(action=GARequest.ACTION_READ, if_none_match=GAEntityTag.compute([('id', 41.0)]))
+        request.resources = [GAResource(name='enterprise', value='id')]
+
+        context = GAContext(session=session, request=request)
+        context.performed_delegates = []
+
+        enterprise = tstdk.GAEnterprise(id='id', name='enterprise1')
+        enterprise.last_updated_date = 42.0
+
+        operations_controller = GAOperationsController(context=context, logic_controller=self.fake_logic_controller, storage_controller=self.fake_storage_controller)
+
+        with patch.object(self.fake_storage_controller, 'get_last_updated_dates', return_value=GAStoragePluginQueryResponse.init_with_data(data=[('id', 42.0)], count=1)):
+            with patch.object(self.fake_storage_controller, 'get', return_value=GAStoragePluginQueryResponse.init_with_data(data=enterprise)):
+                operations_controller.run()
+
+        self.assertFalse(context.not_modified)
+        self.assertEquals(context.object, enterprise)
+        self.assertEquals(context.etag, GAEntityTag.compute([('id', 42.0)]))
+        self.assertEquals(context.performed_delegates, ['will_perform_read', 'did_perform_read'])
+
+    def test_run_conditional_readall_without_storage_support(self):
+        """
+        """
+        session = GASession(garuda_uuid='xxx-xxx-xxx-xxx')
+        session.root_object = NURESTRootObject()
+        session.root_object.id = 'test'
+
+        user = tstdk.GAUser(id='id')
+        user.last_updated_date = 42.0
+
+        request = GARequest(action=GARequest.ACTION_READALL, page=0, page_size=50)
+        request.resources = [GAResource(name='user', value=None)]
+        request.if_none_match = GAEntityTag.compute([('id', 42.0)], salt='1:0:50:None:None')
+
+        context = GAContext(session=session, request=request)
+        context.performed_delegates = []
+
+        operations_controller = GAOperationsController(context=context, logic_controller=self.fake_logic_controller, storage_controller=self.fake_storage_controller)
+
+        with patch.object(self.fake_storage_controller, 'get_all', return_value=GAStoragePluginQueryResponse.init_with_data(data=[user], count=1)):
+            operations_controller.run()
+
+        self.assertTrue(context.not_modified)
+        self.assertEquals(context.etag, request.if_none_match)
+        self.assertEquals(context.performed_delegates, ['will_perform_readall', 'did_perform_readall'])
+
+    def test_run_conditional_readall_ignores_if_modified_since(self):
+        """
+        """
+        session = GASession(garuda_uuid='xxx-xxx-xxx-xxx')
+        session.root_object = NURESTRootObject()
+        session.root_object.id = 'test'
+
+        user = tstdk.GAUser(id='id1')
+        user.last_updated_date = 42.0
+
+        # the page held id1 and id2 when the client fetched it, and id2 was deleted since
+        request = GARequest(action=GARequest.ACTION_READALL, page=0, page_size=50, if_modified_since=42)
+        request.resources = [GAResource(name='user', value=None)]
+
+        context = GAContext(session=session, request=request)
+        context.performed_delegates = []
+
+        operations_controller = GAOperationsController(context=context, logic_controller=self.fake_logic_controller, storage_controller=self.fake_storage_controller)
+
+        with patch.object(self.fake_storage_controller, 'get_last_updated_dates', return_value=GAStoragePluginQueryResponse.init_with_data(data=[('id1', 42.0)], count=1)):
+            with patch.object(self.fake_storage_controller, 'get_all', return_value=GAStoragePluginQueryResponse.init_with_data(data=[user], count=1)):
+                operations_controller.run()
+
+        self.assertFalse(context.not_modified)
+        self.assertIsNone(context.last_modified)
+        self.assertEquals(context.objects, [user])
+        self.assertEquals(context.performed_delegates, ['will_perform_readall', 'did_perform_readall'])
+
     def test_run_count(self):
         """
         """
@@ -222,6 +340,26 @@ class TestOperationsController(TestCase):
                 operations_controller.run()
                 self.assertEquals(context.object, 'did_read')
 
+    def test_run_with_timings(self):
+        """
+        """
+        session = GASession(garuda_uuid='xxx-xxx-xxx-xxx')
+        session.root_object = NURESTRootObject()
+        session.root_object.id = 'test'
+        request = GARequest(action=GARequest.ACTION_READ, timings=GATimings(enabled=True))
+        request.resources = [GAResource(name='enterprise', value='id'), GAResource(name='user', value='id')]
+
+        context = GAContext(session=session, request=request)
+        context.performed_delegates = []
+
+        operations_controller = GAOperationsController(context=context, logic_controller=self.fake_logic_controller, storage_controller=self.fake_storage_controller)
+
+        with patch.object(self.fake_storage_controller, 'get', return_value=GAStoragePluginQueryResponse.init_with_data(data=tstdk.GAEnterprise(name='enterprise1'))):
+            operations_controller.run()
+
+        self.assertIs(context.timings, request.timings)
+        self.assertEquals(context.timings.to_dict().keys(), ['parent', 'storage'])
+
     def test_create(self):
         """
         """
@@ -435,6 +573,24 @@ class TestOperationsController(TestCase):
             operations_controller._prepare_context_for_readall_operation(count_only=True)
             self.assertEquals(len(context.errors), 1)
 
+    def test_prepare_context_for_streamed_readall_operation(self):
+        """
+        """
+        session = GASession(garuda_uuid='xxx-xxx-xxx-xxx')
+        request = GARequest(action=GARequest.ACTION_READALL, stream=True)
+        request.resources = [GAResource(name='user', value=None)]
+
+        context = GAContext(session=session, request=request)
+        objects = iter([tstdk.GAUser(name='user1'), tstdk.GAUser(name='user2')])
+
+        operations_controller = GAOperationsController(context=context, logic_controller=self.fake_logic_controller, storage_controller=self.fake_storage_controller)
+
+        with patch.object(FakeStorageController, 'get_all', return_value=GAStoragePluginQueryResponse.init_with_data(data=objects, count=2)) as m:
+            operations_controller._prepare_context_for_readall_operation(count_only=False)
+            self.assertEquals(m.call_args[1]['stream'], True)
+            self.assertEquals(context.objects, objects)
+            self.assertEquals(context.total_count, 2)
+
     def test_perform_readall_operation(self):
         """
         """
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+from mock import patch
+from unittest import TestCase
+
+from garuda.core.controllers import GACoreController
+from garuda.core.models import GAPluginManifest
+from garuda.core.plugins import GAPermissionsPlugin
+import tests.tstdk.v1_0 as tstdk
+
+
+class CountingPermissionsPlugin(GAPermissionsPlugin):
+    """ Grants the permissions stored in a set, and counts the decisions it takes
+    """
+
+    @classmethod
+    def manifest(cls):
+        """
+        """
+        return GAPluginManifest(name='counting', version=1.0, identifier='garuda.tests.permissions.counting')
+
+    def __init__(self):
+        """
+        """
+        self.permissions = set()
+        self.number_of_decisions = 0
+
+    def should_manage(self):
+        """
+        """
+        return True
+
+    def create_permission(self, resource, target, permission, explicit=True, parent_permission_id=None):
+        """
+        """
+        self.permissions.add((resource, target.id, permission))
+
+    def remove_permission(self, resource, target, permission):
+        """
+        """
+        self.permissions.discard((resource, target.id, permission))
+
+    def remove_all_permissions_for_target_ids(self, target_ids):
+        """
+        """
+        self.permissions = set(entry for entry in self.permissions if entry[1] not in target_ids)
+
+    def has_permission(self, resource, target, permission, explicit_only=False):
+        """
+        """
+        self.number_of_decisions += 1
+        return (resource, target.id, permission) in self.permissions
+
+
+class TestPermissionsDecisions(TestCase):
+    """
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        """
+        cls.plugin = CountingPermissionsPlugin()
+        cls.core_controller = GACoreController(garuda_uuid='test-garuda',
+                                               redis_info={'host': '127.0.0.1', 'port': '6379', 'db': 6},
+                                               permission_plugins=[cls.plugin])
+        cls.permissions_controller = cls.core_controller.permissions_controller
+        cls.other_core_controller = GACoreController(garuda_uuid='test-garuda',
+                                                     redis_info={'host': '127.0.0.1', 'port': '6379', 'db': 6},
+                                                     permission_plugins=[CountingPermissionsPlugin()])
+        cls.other_permissions_controller = cls.other_core_controller.permissions_controller
+
+        cls.enterprise = tstdk.GAEnterprise(id='e1', name='e1')
+
+    def setUp(self):
+        """
+        """
+        self.core_controller.redis.flushdb()
+        self.core_controller.start()
+        self.plugin.permissions = set()
+        self.plugin.number_of_decisions = 0
+
+    def tearDown(self):
+        """
+        """
+        self.permissions_controller._decisions_cache_ttl = None
+        self.other_permissions_controller._decisions_cache_ttl = None
+        self.core_controller.stop()
+        self.core_controller.redis.flushdb()
+
+    def _wait_for(self, condition, timeout=3):
+        """
+        """
+        deadline = time.time() + timeout
+
+        while not condition() and time.time() < deadline:
+            time.sleep(0.05)
+
+        return condition()
+
+    def test_decisions_are_not_cached_outside_of_scopes(self):
+        """
+        """
+        self.permissions_controller.create_permission(resource='user', target=self.enterprise, permission='read')
+
+        self.assertTrue(self.permissions_controller.has_permission(resource='user', target=self.enterprise, permission='read'))
+        self.assertTrue(self.permissions_controller.has_permission(resource='user', target=self.enterprise, permission='read'))
+        self.assertEquals(self.plugin.number_of_decisions, 2)
+
+    def test_decisions_scope(self):
+        """
+        """
+        with self.permissions_controller.decisions_scope():
+            self.assertFalse(self.permissions_controller.has_permission(resource='user', target=self.enterprise, permission='read'))
+
+            with self.permissions_controller.decisions_scope():
+                self.assertFalse(self.permissions_controller.has_permission(resource='user', target=self.enterprise, permission='read'))
+
+            self.assertFalse(self.permissions_controller.has_permission(resource='user', target=self.enterprise, permission='read'))
+            self.assertEquals(self.plugin.number_of_decisions, 1)
+
+            self.assertFalse(self.permissions_controller.has_permission(resource='user', target=self.enterprise, permission='write'))
+            self.assertEquals(self.plugin.number_of_decisions, 2)
+
+            self.permissions_controller.create_permission(resource='user', target=self.enterprise, permission='read')
+
+            self.assertTrue(self.permissions_controller.has_permission(resource='user', target=self.enterprise, permission='read'))
+            self.assertEquals(self.plugin.number_of_decisions, 3)
+
+        self.assertTrue(self.permissions_controller.has_permission(resource='user', target=self.enterprise, permission='read'))
+        self.assertEquals(self.plugin.number_of_decisions, 4)
+
+    def test_process_decisions_cache(self):
+        """
+        """
+        self.permissions_controller._decisions_cache_ttl = 0.5
+        self.permissions_controller.create_permission(resource='user', target=self.enterprise, permission='read')
+
+        self.assertTrue(self.permissions_controller.has_permission(resource='user', target=self.enterprise, permission='read'))
+        self.assertTrue(self.permissions_controller.has_permission(resource='user', target=self.enterprise, permission='read'))
+        self.assertEquals(self.plugin.number_of_decisions, 1)
+
+        self.permissions_controller.remove_permission(resource='user', target=self.enterprise, permission='read')
+
+        self.assertFalse(self.permissions_controller.has_permission(resource='user', target=self.enterprise, permission='read'))
+        self.assertEquals(self.plugin.number_of_decisions, 2)
+
+        self.plugin.permissions.add(('user', self.enterprise.id, 'read'))
+        time.sleep(0.6)
+
+        self.assertTrue(self.permissions_controller.has_permission(resource='user', target=self.enterprise, permission='read'))
+        self.assertEquals(self.plugin.number_of_decisions, 3)
+
+    def test_process_decisions_cache_is_invalidated_by_other_processes(self):
+        """
+        """
+        self.permissions_controller._decisions_cache_ttl = 60
+
+        self.assertFalse(self.permissions_controller.has_permission(resource='user', target=self.enterprise, permission='read'))
+        self.assertFalse(self.permissions_controller.has_permission(resource='other', target=self.enterprise, permission='read'))
+        self.assertEquals(self.plugin.number_of_decisions, 2)
+
+        # the other core controller stands for another process sharing the same permissions
+        self.plugin.permissions.add(('user', self.enterprise.id, 'read'))
+        self.other_permissions_controller.create_permission(resource='user', target=self.enterprise, permission='read')
+
+        self.assertTrue(self._wait_for(lambda: self.permissions_controller.has_permission(resource='user', target=self.enterprise, permission='read')))
+        self.assertFalse(self.permissions_controller.has_permission(resource='other', target=self.enterprise, permission='read'))
+        self.assertEquals(self.plugin.number_of_decisions, 3)
+
+        self.plugin.permissions = set()
+        self.other_permissions_controller.remove_all_permissions_for_target_ids(target_ids=[self.enterprise.id])
+
+        self.assertTrue(self._wait_for(lambda: not self.permissions_controller.has_permission(resource='user', target=self.enterprise, permission='read')))
+
+    def test_process_decisions_cache_is_invalidated_by_forked_workers(self):
+        """
+        """
+        self.permissions_controller._decisions_cache_ttl = 60
+
+        # forked workers share the uuid of the controller created before the fork
+        self.other_permissions_controller._uuid = self.permissions_controller.uuid
+
+        self.assertFalse(self.permissions_controller.has_permission(resource='user', target=self.enterprise, permission='read'))
+
+        self.plugin.permissions.add(('user', self.enterprise.id, 'read'))
+        self.other_permissions_controller.create_permission(resource='user', target=self.enterprise, permission='read')
+
+        self.assertTrue(self._wait_for(lambda: self.permissions_controller.has_permission(resource='user', target=self.enterprise, permission='read')))
+
+    def test_invalidations_sender_changes_after_fork(self):
+        """
+        """
+        sender = self.permissions_controller._sender_identifier()
+        self.assertEquals(self.permissions_controller._sender_identifier(), sender)
+
+        with patch('os.getpid', return_value=os.getpid() + 1):
+            forked_sender = self.permissions_controller._sender_identifier()
+
+        self.assertNotEquals(forked_sender, sender)
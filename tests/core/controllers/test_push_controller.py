@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+import msgpack
+import time
 from unittest import TestCase
 from bambou import NURESTRootObject
 from mock import patch
@@ -43,6 +45,7 @@ class GAPushControllerTestCase(TestCase):
         """ Cleanup context
         """
         self.core_controller.stop()
+        self.core_controller.sessions_controller._default_session_ttl = 3
 
     def test_identifier(self):
         """
@@ -53,7 +56,7 @@ class GAPushControllerTestCase(TestCase):
     def test_push_event_creates_event_queue(self):
         """
         """
-        with patch.object(self.core_controller.sessions_controller, 'get_all_sessions', return_value=[self.session]):
+        with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value={'user': [self.session.redis_key]}):
             self.assertEquals(self.push_controller.redis.llen(self.session_event_queue_key), 0)
             self.assertTrue(self.push_controller.is_event_queue_empty(session=self.session))
 
@@ -66,7 +69,7 @@ class GAPushControllerTestCase(TestCase):
     def test_events_gets_deleted_with_session_expiration(self):
         """
         """
-        with patch.object(self.core_controller.sessions_controller, 'get_all_sessions', return_value=[self.session]):
+        with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value={'user': [self.session.redis_key]}):
             self.core_controller.sessions_controller._default_session_ttl = 1
             session = self.core_controller.sessions_controller.create_session(request='fake-request')
 
@@ -78,6 +81,7 @@ class GAPushControllerTestCase(TestCase):
 
             import time
             time.sleep(1.5)
+            self.core_controller.sessions_controller.reap_expired_sessions()
 
             self.assertEquals(self.push_controller.redis.llen('eventqueue:%s' % session.redis_key), 0)
             self.assertTrue(self.push_controller.is_event_queue_empty(session=session))
@@ -85,7 +89,7 @@ class GAPushControllerTestCase(TestCase):
     def test_create_push(self):
         """
         """
-        with patch.object(self.core_controller.sessions_controller, 'get_all_sessions', return_value=[self.session]):
+        with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value={'user': [self.session.redis_key]}):
             self.assertEquals(self.push_controller.redis.llen(self.session_event_queue_key), 0)
             self.assertTrue(self.push_controller.is_event_queue_empty(session=self.session))
 
@@ -101,7 +105,7 @@ class GAPushControllerTestCase(TestCase):
     def test_update_push(self):
         """
         """
-        with patch.object(self.core_controller.sessions_controller, 'get_all_sessions', return_value=[self.session]):
+        with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value={'user': [self.session.redis_key]}):
             self.assertEquals(self.push_controller.redis.llen(self.session_event_queue_key), 0)
             self.assertTrue(self.push_controller.is_event_queue_empty(session=self.session))
 
@@ -117,7 +121,7 @@ class GAPushControllerTestCase(TestCase):
     def test_delete_push(self):
         """
         """
-        with patch.object(self.core_controller.sessions_controller, 'get_all_sessions', return_value=[self.session]):
+        with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value={'user': [self.session.redis_key]}):
             self.assertEquals(self.push_controller.redis.llen(self.session_event_queue_key), 0)
             self.assertTrue(self.push_controller.is_event_queue_empty(session=self.session))
 
@@ -133,7 +137,7 @@ class GAPushControllerTestCase(TestCase):
     def test_multiple_pushes(self):
         """
         """
-        with patch.object(self.core_controller.sessions_controller, 'get_all_sessions', return_value=[self.session]):
+        with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value={'user': [self.session.redis_key]}):
             self.assertEquals(self.push_controller.redis.llen(self.session_event_queue_key), 0)
             self.assertTrue(self.push_controller.is_event_queue_empty(session=self.session))
 
@@ -162,3 +166,354 @@ class GAPushControllerTestCase(TestCase):
         """
         event = self.push_controller.get_next_event(session=self.session, timeout=1)
         self.assertIsNone(event)
+
+    def test_wait_for_events_with_pending_events(self):
+        """
+        """
+        with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value={'user': [self.session.redis_key]}):
+            entity = tstdk.GAEnterprise(name='name', owner='user')
+            self.push_controller.push_events([GAPushEvent(action=GARequest.ACTION_CREATE, entity=entity)])
+            self.push_controller.push_events([GAPushEvent(action=GARequest.ACTION_UPDATE, entity=entity)])
+
+            events = self.push_controller.wait_for_events(session=self.session, timeout=1)
+
+            self.assertEquals([event.action for event in events], [GARequest.ACTION_CREATE, GARequest.ACTION_UPDATE])
+            self.assertTrue(self.push_controller.is_event_queue_empty(session=self.session))
+            self.assertEquals(self.push_controller._waiters, {})
+
+    def test_wait_for_events_with_max_events(self):
+        """
+        """
+        with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value={'user': [self.session.redis_key]}):
+            entity = tstdk.GAEnterprise(name='name', owner='user')
+            self.push_controller.push_events([GAPushEvent(action=GARequest.ACTION_CREATE, entity=entity) for i in range(3)])
+
+            self.assertEquals(len(self.push_controller.wait_for_events(session=self.session, timeout=1, max_events=2)), 2)
+            self.assertEquals(len(self.push_controller.wait_for_events(session=self.session, timeout=1, max_events=2)), 1)
+
+    def test_wait_for_events_drains_oldest_events_first(self):
+        """
+        """
+        with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value={'user': [self.session.redis_key]}):
+            for name in ['name1', 'name2', 'name3']:
+                entity = tstdk.GAEnterprise(name=name, owner='user')
+                self.push_controller.push_events([GAPushEvent(action=GARequest.ACTION_CREATE, entity=entity)])
+
+            with patch.object(self.push_controller.redis, 'rpop') as mock_rpop:
+                events = self.push_controller.wait_for_events(session=self.session, timeout=1, max_events=2)
+                self.assertEquals(mock_rpop.call_count, 0)
+
+            self.assertEquals([event.entity.name for event in events], ['name1', 'name2'])
+            self.assertEquals([event.entity.name for event in self.push_controller.wait_for_events(session=self.session, timeout=1)], ['name3'])
+
+    def test_wait_for_events_with_linger(self):
+        """
+        """
+        import threading
+
+        with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value={'user': [self.session.redis_key]}):
+            entity = tstdk.GAEnterprise(name='name', owner='user')
+            timers = [threading.Timer(delay, self.push_controller.push_events, [[GAPushEvent(action=GARequest.ACTION_CREATE, entity=entity)]]) for delay in [0.2, 0.4]]
+
+            for timer in timers:
+                timer.start()
+
+            events = self.push_controller.wait_for_events(session=self.session, timeout=5, linger=1)
+
+            for timer in timers:
+                timer.join()
+
+            self.assertEquals(len(events), 2)
+
+    def test_wait_for_events_is_woken_up_by_push(self):
+        """
+        """
+        import threading
+        import time
+
+        with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value={'user': [self.session.redis_key]}):
+            entity = tstdk.GAEnterprise(name='name', owner='user')
+            timer = threading.Timer(0.5, self.push_controller.push_events, [[GAPushEvent(action=GARequest.ACTION_CREATE, entity=entity)]])
+            timer.start()
+
+            start = time.time()
+            events = self.push_controller.wait_for_events(session=self.session, timeout=10)
+            timer.join()
+
+            self.assertLess(time.time() - start, 5)
+            self.assertEquals(len(events), 1)
+            self.assertEquals(events[0].action, GARequest.ACTION_CREATE)
+
+    def test_wait_for_events_timeout(self):
+        """
+        """
+        events = self.push_controller.wait_for_events(session=self.session, timeout=0.5)
+        self.assertEquals(events, [])
+        self.assertEquals(self.push_controller._waiters, {})
+
+    def test_push_events_checks_permissions_once_per_user(self):
+        """
+        """
+        session_keys_by_user = {'user': [self.session.redis_key, 'sessions:other'], 'nope': ['sessions:nope']}
+
+        with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value=session_keys_by_user):
+            with patch.object(self.core_controller.permissions_controller, 'has_permission', side_effect=lambda resource, target, permission: resource == 'user') as mock_method:
+                entity = tstdk.GAEnterprise(name='name', owner='user')
+                self.push_controller.push_events([GAPushEvent(action=GARequest.ACTION_CREATE, entity=entity)])
+
+                self.assertEquals(mock_method.call_count, 2)
+
+        self.assertEquals(self.push_controller.redis.llen(self.session_event_queue_key), 1)
+        self.assertEquals(self.push_controller.redis.llen('eventqueue:sessions:other'), 1)
+        self.assertEquals(self.push_controller.redis.llen('eventqueue:sessions:nope'), 0)
+        self.push_controller.redis.delete('eventqueue:sessions:other')
+
+    def test_push_events_without_listening_sessions(self):
+        """
+        """
+        entity = tstdk.GAEnterprise(name='name', owner='user')
+        self.push_controller.push_events([GAPushEvent(action=GARequest.ACTION_CREATE, entity=entity)])
+
+        self.assertTrue(self.push_controller.is_event_queue_empty(session=self.session))
+
+    def test_queue_events_fans_out_asynchronously(self):
+        """
+        """
+        self.push_controller._reset_fan_out_metrics()
+
+        with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value={'user': [self.session.redis_key]}):
+            entity = tstdk.GAEnterprise(name='name', owner='user')
+            self.push_controller.queue_events([GAPushEvent(action=GARequest.ACTION_CREATE, entity=entity)])
+
+            events = self.push_controller.wait_for_events(session=self.session, timeout=3)
+
+        self.assertEquals(len(events), 1)
+        self.assertEquals(events[0].entity.name, 'name')
+
+        # the lag is recorded right after the session gets notified
+        for i in range(10):
+            metrics = self.push_controller.fan_out_metrics()
+
+            if metrics['processed']:
+                break
+
+            time.sleep(0.1)
+
+        self.assertEquals(metrics['processed'], 1)
+        self.assertEquals(metrics['pending'], 0)
+        self.assertGreaterEqual(metrics['max_lag'], metrics['last_lag'])
+        self.assertEquals(metrics['average_lag'], metrics['last_lag'])
+
+    def test_queue_events_retries_failed_fan_out(self):
+        """
+        """
+        push_events = self.push_controller.push_events
+        calls = []
+
+        def failing_once(events, **kwargs):
+            calls.append(events)
+
+            if len(calls) == 1:
+                raise Exception('fan-out failure')
+
+            return push_events(events=events, **kwargs)
+
+        with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value={'user': [self.session.redis_key]}):
+            with patch.object(self.push_controller, 'push_events', side_effect=failing_once):
+                entity = tstdk.GAEnterprise(name='name', owner='user')
+                self.push_controller.queue_events([GAPushEvent(action=GARequest.ACTION_CREATE, entity=entity)])
+
+                events = self.push_controller.wait_for_events(session=self.session, timeout=3)
+
+        self.assertEquals(len(calls), 2)
+        self.assertEquals(len(events), 1)
+        self.assertEquals(events[0].entity.name, 'name')
+        self.assertEquals(self.push_controller.redis.llen(self.push_controller.FAN_OUT_QUEUE_KEY), 0)
+
+    def test_queue_events_retries_only_the_users_not_done(self):
+        """
+        """
+        execute_push_pipeline = self.push_controller._execute_push_pipeline
+        calls = []
+
+        def failing_second_batch(**kwargs):
+            calls.append(kwargs)
+
+            if len(calls) == 2:
+                raise Exception('fan-out failure')
+
+            return execute_push_pipeline(**kwargs)
+
+        session_keys_by_user = {'user': [self.session.redis_key], 'other': ['sessions:other']}
+        self.push_controller._push_batch_size = 1
+
+        try:
+            with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value=session_keys_by_user):
+                with patch.object(self.core_controller.permissions_controller, 'has_permission', return_value=True):
+                    with patch.object(self.push_controller, '_execute_push_pipeline', side_effect=failing_second_batch):
+                        entity = tstdk.GAEnterprise(name='name', owner='user')
+                        self.push_controller.queue_events([GAPushEvent(action=GARequest.ACTION_CREATE, entity=entity)])
+
+                        for i in range(30):
+                            if self.push_controller.redis.llen(self.session_event_queue_key) and self.push_controller.redis.llen('eventqueue:sessions:other'):
+                                break
+
+                            time.sleep(0.1)
+
+            self.assertEquals(len(calls), 3)
+            self.assertEquals(self.push_controller.redis.llen(self.session_event_queue_key), 1)
+            self.assertEquals(self.push_controller.redis.llen('eventqueue:sessions:other'), 1)
+        finally:
+            self.push_controller._push_batch_size = 100
+            self.push_controller.redis.delete('eventqueue:sessions:other')
+
+    def test_fan_out_refreshes_the_worker_heartbeat(self):
+        """
+        """
+        worker_key = '%s:busy-worker' % self.push_controller.FAN_OUT_WORKER_KEY
+        session_keys_by_user = {'user': [self.session.redis_key], 'other': ['sessions:other']}
+        entity = tstdk.GAEnterprise(name='name', owner='user')
+        pack = msgpack.packb({'enqueuedAt': time.time(), 'events': [GAPushEvent(action=GARequest.ACTION_CREATE, entity=entity).to_dict()]})
+
+        def slow_permission(resource, target, permission):
+            time.sleep(0.4)
+            return False
+
+        self.push_controller._fan_out_worker_ttl = 1
+
+        try:
+            with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value=session_keys_by_user):
+                with patch.object(self.core_controller.permissions_controller, 'has_permission', side_effect=slow_permission):
+                    self.push_controller._fan_out_pack(pack=pack, worker_key=worker_key, done_users=[])
+
+            self.assertTrue(self.push_controller.redis.exists(worker_key))
+        finally:
+            self.push_controller._fan_out_worker_ttl = 10
+            self.push_controller.redis.delete(worker_key)
+
+    def test_orphaned_fan_out_batches_are_requeued(self):
+        """
+        """
+        self.core_controller.stop()
+
+        processing_key = '%s:dead-worker' % self.push_controller.FAN_OUT_PROCESSING_KEY
+        entity = tstdk.GAEnterprise(name='orphan', owner='user')
+        pack = msgpack.packb({'enqueuedAt': time.time(), 'events': [GAPushEvent(action=GARequest.ACTION_CREATE, entity=entity).to_dict()]})
+
+        self.push_controller.redis.lpush(processing_key, pack)
+        self.push_controller.redis.sadd(self.push_controller.FAN_OUT_PROCESSING_INDEX_KEY, 'dead-worker')
+
+        with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value={'user': [self.session.redis_key]}):
+            self.core_controller.start()
+            events = self.push_controller.wait_for_events(session=self.session, timeout=3)
+
+        self.assertEquals(len(events), 1)
+        self.assertEquals(events[0].entity.name, 'orphan')
+        self.assertFalse(self.push_controller.redis.exists(processing_key))
+        self.assertFalse(self.push_controller.redis.sismember(self.push_controller.FAN_OUT_PROCESSING_INDEX_KEY, 'dead-worker'))
+
+    def test_queue_events_without_fan_out_workers(self):
+        """
+        """
+        self.core_controller.stop()
+        self.push_controller._number_of_fan_out_workers = 0
+        self.core_controller.start()
+
+        try:
+            with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value={'user': [self.session.redis_key]}):
+                entity = tstdk.GAEnterprise(name='name', owner='user')
+                self.push_controller.queue_events([GAPushEvent(action=GARequest.ACTION_CREATE, entity=entity)])
+
+            self.assertEquals(self.push_controller.redis.llen(self.push_controller.FAN_OUT_QUEUE_KEY), 0)
+            self.assertEquals(self.push_controller.redis.llen(self.session_event_queue_key), 1)
+        finally:
+            self.push_controller._number_of_fan_out_workers = 2
+
+    def test_coalesce_events(self):
+        """
+        """
+        def make_event(action, identifier, name):
+            return GAPushEvent(action=action, entity=tstdk.GAEnterprise(id=identifier, name=name, owner='user'))
+
+        events = [make_event(GARequest.ACTION_CREATE, 'a', 'a1'),
+                  make_event(GARequest.ACTION_UPDATE, 'b', 'b1'),
+                  make_event(GARequest.ACTION_UPDATE, 'a', 'a2'),
+                  make_event(GARequest.ACTION_UPDATE, 'b', 'b2'),
+                  make_event(GARequest.ACTION_CREATE, 'c', 'c1'),
+                  make_event(GARequest.ACTION_UPDATE, 'c', 'c2'),
+                  make_event(GARequest.ACTION_DELETE, 'c', 'c3'),
+                  make_event(GARequest.ACTION_UPDATE, 'd', 'd1'),
+                  make_event(GARequest.ACTION_DELETE, 'd', 'd2')]
+
+        coalesced = self.push_controller.coalesce_events(events)
+
+        self.assertEquals([(event.action, event.entity.name) for event in coalesced], [(GARequest.ACTION_CREATE, 'a2'),
+                                                                                        (GARequest.ACTION_UPDATE, 'b2'),
+                                                                                        (GARequest.ACTION_DELETE, 'd2')])
+
+    def test_wait_for_events_coalesces_events(self):
+        """
+        """
+        self.push_controller._coalesce_events = True
+
+        try:
+            with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value={'user': [self.session.redis_key]}):
+                for name in ['name1', 'name2', 'name3']:
+                    entity = tstdk.GAEnterprise(id='enterprise', name=name, owner='user')
+                    self.push_controller.push_events([GAPushEvent(action=GARequest.ACTION_UPDATE, entity=entity)])
+
+            self.assertEquals(self.push_controller.redis.llen(self.session_event_queue_key), 3)
+
+            events = self.push_controller.wait_for_events(session=self.session, timeout=0)
+
+            self.assertEquals(len(events), 1)
+            self.assertEquals(events[0].entity.name, 'name3')
+        finally:
+            self.push_controller._coalesce_events = False
+
+    def test_event_queue_drops_oldest_events_on_overflow(self):
+        """
+        """
+        self.push_controller._max_event_queue_length = 2
+
+        try:
+            with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value={'user': [self.session.redis_key]}):
+                for name in ['name1', 'name2', 'name3']:
+                    entity = tstdk.GAEnterprise(name=name, owner='user')
+                    self.push_controller.push_events([GAPushEvent(action=GARequest.ACTION_CREATE, entity=entity)])
+
+                self.assertEquals(self.push_controller.get_event_queue_depth(session=self.session), 2)
+                self.assertEquals(self.push_controller.get_event_queue_depths(), {self.session.redis_key: 2})
+                self.assertGreater(self.push_controller.redis.ttl(self.session_event_queue_key), 0)
+
+            events = self.push_controller.wait_for_events(session=self.session, timeout=0)
+            self.assertEquals([event.entity.name for event in events], ['name2', 'name3'])
+        finally:
+            self.push_controller._max_event_queue_length = 1000
+
+    def test_event_queue_refetch_on_overflow(self):
+        """
+        """
+        self.push_controller._max_event_queue_length = 2
+        self.push_controller._event_queue_overflow_policy = self.push_controller.OVERFLOW_POLICY_REFETCH
+
+        try:
+            with patch.object(self.core_controller.sessions_controller, 'get_listening_session_keys_by_user', return_value={'user': [self.session.redis_key]}):
+                for name in ['name1', 'name2']:
+                    entity = tstdk.GAEnterprise(name=name, owner='user')
+                    self.push_controller.push_events([GAPushEvent(action=GARequest.ACTION_CREATE, entity=entity)])
+
+                self.assertEquals(self.push_controller.get_event_queue_depth(session=self.session), 2)
+
+                entity = tstdk.GAEnterprise(name='name3', owner='user')
+                self.push_controller.push_events([GAPushEvent(action=GARequest.ACTION_CREATE, entity=entity)])
+
+            self.assertGreater(self.push_controller.redis.ttl(self.session_event_queue_key), 0)
+
+            events = self.push_controller.wait_for_events(session=self.session, timeout=0)
+            self.assertEquals(len(events), 1)
+            self.assertEquals(events[0].update_mechanism, GAPushEvent.UPDATE_MECHANISM_REFETCH)
+            self.assertEquals(events[0].entity.name, 'name3')
+        finally:
+            self.push_controller._max_event_queue_length = 1000
+            self.push_controller._event_queue_overflow_policy = self.push_controller.OVERFLOW_POLICY_DROP_OLDEST
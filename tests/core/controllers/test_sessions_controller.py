@@ -151,6 +151,7 @@ class GASessionsControllerTestCase(TestCase):
         self.assertIn(session.uuid, [s.uuid for s in self.sessions_controller.get_all_local_sessions(listening=True)])
 
         time.sleep(1.5)
+        self.assertEquals(self.sessions_controller.reap_expired_sessions(), 1)
 
         self.assertNotIn(session.uuid, [s.uuid for s in self.sessions_controller.get_all_local_sessions()])
         self.assertNotIn(session.uuid, [s.uuid for s in self.sessions_controller.get_all_local_sessions(listening=True)])
@@ -191,3 +192,320 @@ class GASessionsControllerTestCase(TestCase):
         sessions = self.sessions_controller.get_all_sessions()
 
         self.assertEquals(len(sessions), 0)
+
+    def test_get_session_uses_cache(self):
+        """
+        """
+        session = self.sessions_controller.create_session(request='fake-request')
+
+        with patch.object(self.sessions_controller.redis, 'hgetall') as mock_method:
+            self.assertEquals(self.sessions_controller.get_session(session.uuid).uuid, session.uuid)
+            self.assertFalse(mock_method.called)
+
+        self.sessions_controller._sessions_cache.clear()
+
+        self.assertEquals(self.sessions_controller.get_session(session.uuid).uuid, session.uuid)
+        self.assertIn(session.redis_key, self.sessions_controller._sessions_cache)
+
+    def test_session_invalidation(self):
+        """
+        """
+        session = self.sessions_controller.create_session(request='fake-request')
+        self.assertIn(session.redis_key, self.sessions_controller._sessions_cache)
+
+        self.sessions_controller.redis.publish(self.sessions_controller.INVALIDATIONS_CHANNEL, session.redis_key)
+        time.sleep(0.3)
+
+        self.assertNotIn(session.redis_key, self.sessions_controller._sessions_cache)
+
+    def test_expired_session_is_removed_from_cache(self):
+        """
+        """
+        self.sessions_controller._default_session_ttl = 1
+        session = self.sessions_controller.create_session(request='fake-request')
+        self.assertIn(session.redis_key, self.sessions_controller._sessions_cache)
+
+        time.sleep(1.5)
+        self.sessions_controller.reap_expired_sessions()
+
+        self.assertNotIn(session.redis_key, self.sessions_controller._sessions_cache)
+        self.assertEquals(self.sessions_controller.get_session(session.uuid), None)
+
+    def test_reset_session_ttl_only_when_needed(self):
+        """
+        """
+        self.sessions_controller._default_session_ttl = 100
+        session = self.sessions_controller.create_session(request='fake-request')
+
+        with patch.object(self.sessions_controller.redis, 'pipeline') as mock_method:
+            self.sessions_controller.reset_session_ttl(session)
+            self.assertFalse(mock_method.called)
+
+        now = time.time() + 60
+
+        with patch('time.time', return_value=now):
+            self.sessions_controller.reset_session_ttl(session)
+
+        self.assertEquals(self.sessions_controller._sessions_expirations.get(session.redis_key), now + 100)
+        self.assertEquals(self.sessions_controller.redis.zscore(self.sessions_controller.SESSIONS_INDEX_KEY, session.redis_key), now + 100)
+
+        self.sessions_controller._default_session_ttl = 3
+
+    def test_reset_session_ttl_for_unknown_expiration(self):
+        """
+        """
+        session = self.sessions_controller.create_session(request='fake-request')
+        self.sessions_controller._sessions_expirations.clear()
+        self.sessions_controller.redis.persist(session.redis_key)
+
+        self.sessions_controller.reset_session_ttl(session)
+
+        self.assertTrue(0 < self.sessions_controller.redis.ttl(session.redis_key) <= self.sessions_controller._default_session_ttl)
+        self.assertIn(session.redis_key, self.sessions_controller._sessions_expirations)
+
+    def test_reset_session_ttl_with_pipeline(self):
+        """
+        """
+        session = self.sessions_controller.create_session(request='fake-request')
+        self.sessions_controller._sessions_expirations.clear()
+        self.sessions_controller.redis.persist(session.redis_key)
+
+        pipeline = self.core_controller.sharded_pipeline()
+        self.sessions_controller.reset_session_ttl(session, pipeline=pipeline)
+        self.assertEquals(self.sessions_controller.redis.ttl(session.redis_key), -1)
+
+        pipeline.execute()
+        self.assertTrue(self.sessions_controller.redis.ttl(session.redis_key) > 0)
+
+    def test_session_index(self):
+        """
+        """
+        session1 = self.sessions_controller.create_session(request='fake-request')
+        session2 = self.sessions_controller.create_session(request='fake-request')
+        self.sessions_controller.redis.set('sessions:not-indexed', 'nope')
+
+        self.assertEquals(sorted(self.sessions_controller.iter_session_keys()), sorted([session1.redis_key, session2.redis_key]))
+
+        self.sessions_controller.delete_session(session1)
+
+        self.assertEquals(list(self.sessions_controller.iter_session_keys()), [session2.redis_key])
+
+    def test_session_index_skips_expired_sessions(self):
+        """
+        """
+        session = self.sessions_controller.create_session(request='fake-request')
+        self.sessions_controller.redis.zadd(self.sessions_controller.SESSIONS_INDEX_KEY, time.time() - 1, 'sessions:expired')
+
+        self.assertEquals(list(self.sessions_controller.iter_session_keys()), [session.redis_key])
+        self.assertEquals(self.sessions_controller.redis.zcard(self.sessions_controller.SESSIONS_INDEX_KEY), 1)
+
+    def test_iter_sessions_by_batches(self):
+        """
+        """
+        sessions = [self.sessions_controller.create_session(request='fake-request') for i in range(5)]
+
+        self.assertEquals(sorted([session.uuid for session in self.sessions_controller.iter_sessions(batch_size=2)]), sorted([session.uuid for session in sessions]))
+
+    def test_listening_sessions_by_user(self):
+        """
+        """
+        session1 = self.sessions_controller.create_session(request='fake-request')
+        session2 = self.sessions_controller.create_session(request='fake-request')
+        session3 = self.sessions_controller.create_session(request='fake-request')
+        session3.root_object = NURESTRootObject()
+        session3.root_object.id = 'other'
+
+        self.assertEquals(self.sessions_controller.get_listening_session_keys_by_user(), {})
+
+        self.sessions_controller.set_session_listening_status(session1, True)
+        self.sessions_controller.set_session_listening_status(session2, True)
+        self.sessions_controller.set_session_listening_status(session3, True)
+
+        listening = self.sessions_controller.get_listening_session_keys_by_user()
+        self.assertEquals(sorted(listening.keys()), ['id', 'other'])
+        self.assertEquals(sorted(listening['id']), sorted([session1.redis_key, session2.redis_key]))
+        self.assertEquals(listening['other'], [session3.redis_key])
+
+        self.sessions_controller.delete_session(session3)
+        self.assertEquals(sorted(self.sessions_controller.get_listening_session_keys_by_user().keys()), ['id'])
+
+    def test_listening_sessions_grace_period(self):
+        """
+        """
+        session = self.sessions_controller.create_session(request='fake-request')
+
+        self.sessions_controller._listening_grace_period = 10
+        self.sessions_controller.set_session_listening_status(session, True)
+        self.sessions_controller.set_session_listening_status(session, False)
+
+        self.assertEquals(self.sessions_controller.get_listening_session_keys_by_user(), {'id': [session.redis_key]})
+
+        with patch('time.time', return_value=time.time() + 11):
+            self.assertEquals(self.sessions_controller.get_listening_session_keys_by_user(), {})
+
+        self.sessions_controller._listening_grace_period = 60
+
+    def test_reap_expired_sessions(self):
+        """
+        """
+        session1 = self.sessions_controller.create_session(request='fake-request')
+        session2 = self.sessions_controller.create_session(request='fake-request')
+        session3 = self.sessions_controller.create_session(request='fake-request')
+        self.sessions_controller.redis.lpush('eventqueue:%s' % session1.redis_key, 'event')
+
+        # session1 is gone, session2 is still alive but its index entry is late
+        self.sessions_controller.redis.delete(session1.redis_key)
+        self.sessions_controller.redis.zadd(self.sessions_controller.SESSIONS_INDEX_KEY, time.time() - 1, session1.redis_key)
+        self.sessions_controller.redis.zadd(self.sessions_controller.SESSIONS_INDEX_KEY, time.time() - 1, session2.redis_key)
+
+        self.assertEquals(self.sessions_controller.reap_expired_sessions(batch_size=1), 1)
+
+        self.assertIsNone(self.sessions_controller.redis.zscore(self.sessions_controller.SESSIONS_INDEX_KEY, session1.redis_key))
+        self.assertGreater(self.sessions_controller.redis.zscore(self.sessions_controller.SESSIONS_INDEX_KEY, session2.redis_key), time.time())
+        self.assertFalse(self.sessions_controller.redis.exists('eventqueue:%s' % session1.redis_key))
+        self.assertNotIn(session1.redis_key, self.sessions_controller._sessions_cache)
+        self.assertEquals(sorted(self.sessions_controller.get_all_local_session_keys()), sorted([session2.redis_key, session3.redis_key]))
+
+        self.assertEquals(self.sessions_controller.reap_expired_sessions(), 0)
+
+    def test_expirations_are_propagated(self):
+        """
+        """
+        session1 = self.sessions_controller.create_session(request='fake-request')
+        session2 = self.sessions_controller.create_session(request='fake-request')
+
+        self.sessions_controller.redis.publish(self.sessions_controller.EXPIRATIONS_CHANNEL, '%s,%s' % (session1.redis_key, session2.redis_key))
+        time.sleep(0.3)
+
+        self.assertNotIn(session1.redis_key, self.sessions_controller._sessions_cache)
+        self.assertNotIn(session2.redis_key, self.sessions_controller._sessions_cache)
+        self.assertEquals(self.sessions_controller.get_all_local_session_keys(), set())
+
+    def test_reaper_runs_periodically(self):
+        """
+        """
+        self.core_controller.stop()
+        self.sessions_controller._reaper_interval = 0.2
+        self.core_controller.start()
+
+        try:
+            with patch.object(self.sessions_controller, 'reap_expired_sessions') as mock_method:
+                time.sleep(0.5)
+                self.assertTrue(mock_method.called)
+
+            self.assertTrue(self.sessions_controller.redis.exists(self.sessions_controller.REAPER_LOCK_KEY))
+        finally:
+            self.core_controller.stop()
+            self.sessions_controller._reaper_interval = 5
+            self.core_controller.start()
+
+    def test_authentication_cache(self):
+        """
+        """
+        request = GARequest(action=GARequest.ACTION_READ, username='user', token='token')
+
+        with patch.object(self.fake_auth_plugin, 'authenticate', wraps=self.fake_auth_plugin.authenticate) as mock_method:
+            session = self.sessions_controller.create_session(request=request)
+            other_device_session = self.sessions_controller.create_session(request=request)
+            self.assertEquals(mock_method.call_count, 1)
+
+            self.assertNotEquals(other_device_session.uuid, session.uuid)
+            self.assertIsNot(other_device_session.root_object, session.root_object)
+            self.assertEquals(other_device_session.root_object.id, session.root_object.id)
+
+            self.sessions_controller.delete_session(session)
+            self.assertIsNotNone(self.sessions_controller.get_session(session_uuid=other_device_session.uuid))
+
+            other_session = self.sessions_controller.create_session(request=GARequest(action=GARequest.ACTION_READ, username='user', token='other'))
+            self.assertNotEquals(other_session.uuid, session.uuid)
+            self.assertEquals(mock_method.call_count, 2)
+
+    def test_authentication_cache_gives_the_new_session_uuid_as_api_key(self):
+        """
+        """
+        def authenticate(request, session):
+            root = NURESTRootObject()
+            root.id = 'id'
+            root.api_key = session.uuid
+            return root
+
+        request = GARequest(action=GARequest.ACTION_READ, username='user', token='api-key-token')
+
+        with patch.object(self.fake_auth_plugin, 'authenticate', side_effect=authenticate):
+            session = self.sessions_controller.create_session(request=request)
+            other_session = self.sessions_controller.create_session(request=request)
+
+        self.assertEquals(session.root_object.api_key, session.uuid)
+        self.assertEquals(other_session.root_object.api_key, other_session.uuid)
+
+    def test_failed_authentication_cache(self):
+        """
+        """
+        request = GARequest(action=GARequest.ACTION_READ, username='user', token='wrong')
+
+        with patch.object(self.fake_auth_plugin, 'authenticate', return_value=None) as mock_method:
+            self.assertIsNone(self.sessions_controller.create_session(request=request))
+            self.assertIsNone(self.sessions_controller.create_session(request=request))
+            self.assertEquals(mock_method.call_count, 1)
+
+            with patch('time.time', return_value=time.time() + 6):
+                self.assertIsNone(self.sessions_controller.create_session(request=request))
+                self.assertEquals(mock_method.call_count, 2)
+
+    def test_authentication_throttling(self):
+        """
+        """
+        self.sessions_controller._authentication_rate_limit = 3
+
+        try:
+            with patch.object(self.fake_auth_plugin, 'authenticate', return_value=None) as mock_method:
+                for i in range(3):
+                    request = GARequest(action=GARequest.ACTION_READ, username='user', token='wrong-%d' % i, client_address='10.0.0.1')
+                    self.assertFalse(self.sessions_controller.is_authentication_throttled(request=request))
+                    self.assertIsNone(self.sessions_controller.create_session(request=request))
+
+                request = GARequest(action=GARequest.ACTION_READ, username='user', token='right', client_address='10.0.0.1')
+                self.assertTrue(self.sessions_controller.is_authentication_throttled(request=request))
+                self.assertIsNone(self.sessions_controller.create_session(request=request))
+                self.assertEquals(mock_method.call_count, 3)
+
+            # other users behind the same address are not throttled
+            self.assertFalse(self.sessions_controller.is_authentication_throttled(request=GARequest(action=GARequest.ACTION_READ, username='other', client_address='10.0.0.1')))
+            self.assertFalse(self.sessions_controller.is_authentication_throttled(request=GARequest(action=GARequest.ACTION_READ)))
+
+            with patch('time.time', return_value=time.time() + 10):
+                self.assertFalse(self.sessions_controller.is_authentication_throttled(request=request))
+        finally:
+            self.sessions_controller._authentication_rate_limit = 30
+
+    def test_failed_authentications_do_not_lock_the_user_out_from_other_addresses(self):
+        """
+        """
+        self.sessions_controller._authentication_rate_limit = 3
+
+        try:
+            with patch.object(self.fake_auth_plugin, 'authenticate', return_value=None):
+                for i in range(5):
+                    self.assertIsNone(self.sessions_controller.create_session(request=GARequest(action=GARequest.ACTION_READ, username='admin', token='guess-%d' % i, client_address='10.6.6.6')))
+
+            self.assertTrue(self.sessions_controller.is_authentication_throttled(request=GARequest(action=GARequest.ACTION_READ, username='admin', client_address='10.6.6.6')))
+
+            request = GARequest(action=GARequest.ACTION_READ, username='admin', token='right', client_address='10.0.0.1')
+            self.assertFalse(self.sessions_controller.is_authentication_throttled(request=request))
+            self.assertIsNotNone(self.sessions_controller.create_session(request=request))
+        finally:
+            self.sessions_controller._authentication_rate_limit = 30
+
+    def test_successful_authentications_are_not_throttled(self):
+        """
+        """
+        self.sessions_controller._authentication_rate_limit = 1
+
+        try:
+            for i in range(3):
+                request = GARequest(action=GARequest.ACTION_READ, username='user', token='token-%d' % i, client_address='10.0.0.1')
+                self.assertIsNotNone(self.sessions_controller.create_session(request=request))
+
+            self.assertFalse(self.sessions_controller.is_authentication_throttled(request=request))
+        finally:
+            self.sessions_controller._authentication_rate_limit = 30
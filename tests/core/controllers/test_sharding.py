@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase
+from mock import patch
+
+from garuda.core.controllers import GACoreController
+from garuda.core.models import GAPushEvent, GARequest
+from garuda.plugins.permissions import GAOwnerPermissionsPlugin
+
+from tests.helpers import FakeAuthPlugin
+import tests.tstdk.v1_0 as tstdk
+
+
+class GAShardingTestCase(TestCase):
+    """ Shards are two databases of the local Redis, which is enough to exercise the routing
+    """
+    @classmethod
+    def setUpClass(cls):
+        """
+        """
+        cls.core_controller = GACoreController(garuda_uuid='test-garuda',
+                                               redis_info=[{'host': '127.0.0.1', 'port': '6379', 'db': 6},
+                                                           {'host': '127.0.0.1', 'port': '6379', 'db': 7}],
+                                               authentication_plugins=[FakeAuthPlugin()],
+                                               permission_plugins=[GAOwnerPermissionsPlugin()])
+
+        cls.sessions_controller = cls.core_controller.sessions_controller
+        cls.push_controller = cls.core_controller.push_controller
+        cls.primary, cls.secondary = cls.core_controller.redis_shards
+
+    def setUp(self):
+        """
+        """
+        self.primary.flushdb()
+        self.secondary.flushdb()
+        self.core_controller.start()
+
+    def tearDown(self):
+        """
+        """
+        self.core_controller.stop()
+        self.primary.flushdb()
+        self.secondary.flushdb()
+
+    def _create_sessions_on_both_shards(self):
+        """
+        """
+        sessions = {}
+
+        while len(sessions) < 2:
+            session = self.sessions_controller.create_session(request='fake-request')
+            sessions.setdefault(id(self.core_controller.redis_for_key(session.redis_key)), session)
+
+        return sessions[id(self.primary)], sessions[id(self.secondary)]
+
+    def test_redis_informations(self):
+        """
+        """
+        self.assertIs(self.core_controller.redis, self.primary)
+        self.assertEquals(self.core_controller.redis_db, 6)
+        self.assertEquals(self.secondary.connection_pool.connection_kwargs['db'], 7)
+
+    def test_sessions_are_sharded(self):
+        """
+        """
+        primary_session, secondary_session = self._create_sessions_on_both_shards()
+
+        self.assertTrue(self.primary.exists(primary_session.redis_key))
+        self.assertFalse(self.primary.exists(secondary_session.redis_key))
+        self.assertTrue(self.secondary.exists(secondary_session.redis_key))
+
+        # the indexes stay on the primary redis
+        self.assertIsNotNone(self.primary.zscore(self.sessions_controller.SESSIONS_INDEX_KEY, secondary_session.redis_key))
+
+        self.sessions_controller._sessions_cache.clear()
+        self.assertEquals(self.sessions_controller.get_session(secondary_session.uuid).uuid, secondary_session.uuid)
+
+        session_uuids = [session.uuid for session in self.sessions_controller.get_all_sessions()]
+        self.assertIn(primary_session.uuid, session_uuids)
+        self.assertIn(secondary_session.uuid, session_uuids)
+
+        self.sessions_controller.delete_session(secondary_session)
+        self.assertFalse(self.secondary.exists(secondary_session.redis_key))
+
+    def test_events_are_pushed_across_shards(self):
+        """
+        """
+        primary_session, secondary_session = self._create_sessions_on_both_shards()
+        session_keys_by_user = {'user': [primary_session.redis_key, secondary_session.redis_key]}
+
+        with patch.object(self.sessions_controller, 'get_listening_session_keys_by_user', return_value=session_keys_by_user):
+            entity = tstdk.GAEnterprise(name='name', owner='user')
+            self.push_controller.push_events([GAPushEvent(action=GARequest.ACTION_CREATE, entity=entity)])
+
+        self.assertEquals(self.push_controller.get_event_queue_depths(), {})  # nobody is listening
+        self.assertEquals(self.secondary.llen('eventqueue:%s' % secondary_session.redis_key), 1)
+        self.assertFalse(self.primary.exists('eventqueue:%s' % secondary_session.redis_key))
+
+        self.assertEquals(len(self.push_controller.wait_for_events(session=primary_session, timeout=1)), 1)
+        self.assertEquals(len(self.push_controller.wait_for_events(session=secondary_session, timeout=1)), 1)
+
+    def test_reap_sharded_sessions(self):
+        """
+        """
+        primary_session, secondary_session = self._create_sessions_on_both_shards()
+
+        self.secondary.lpush('eventqueue:%s' % secondary_session.redis_key, 'event')
+        self.secondary.delete(secondary_session.redis_key)
+        self.primary.zadd(self.sessions_controller.SESSIONS_INDEX_KEY, 0, secondary_session.redis_key)
+        self.primary.zadd(self.sessions_controller.SESSIONS_INDEX_KEY, 0, primary_session.redis_key)
+
+        self.assertEquals(self.sessions_controller.reap_expired_sessions(), 1)
+        self.assertFalse(self.secondary.exists('eventqueue:%s' % secondary_session.redis_key))
+        self.assertGreater(self.primary.zscore(self.sessions_controller.SESSIONS_INDEX_KEY, primary_session.redis_key), 0)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+import time
+from mock import patch
+from unittest import TestCase
+
+from garuda.core.controllers import GACoreController
+from garuda.core.lib import GASDKLibrary
+from garuda.core.models import GARequest, GAResource
+from garuda.plugins.authentication import GASimpleAuthenticationPlugin
+
+import tests.tstdk.v1_0 as tstdk
+
+
+class GAStatelessSessionsTestCase(TestCase):
+    """
+    """
+    @classmethod
+    def setUpClass(cls):
+        """
+        """
+        GASDKLibrary().register_sdk('default', tstdk)
+
+        cls.auth_plugin = GASimpleAuthenticationPlugin(secret='secret', token_ttl=10)
+        cls.core_controller = GACoreController(garuda_uuid='test-garuda',
+                                               redis_info={'host': '127.0.0.1', 'port': '6379', 'db': 6},
+                                               authentication_plugins=[cls.auth_plugin])
+
+        cls.sessions_controller = cls.core_controller.sessions_controller
+
+    def setUp(self):
+        """
+        """
+        self.core_controller.start()
+        self.sessions_controller.redis.flushdb()
+
+    def tearDown(self):
+        """
+        """
+        self.sessions_controller.redis.flushdb()
+        self.core_controller.stop()
+
+    def _create_session(self):
+        """
+        """
+        request = GARequest(action=GARequest.ACTION_READ, resources=[GAResource('root', None)])
+        return self.sessions_controller.create_session(request=request)
+
+    def test_create_session_does_not_use_redis(self):
+        """
+        """
+        session = self._create_session()
+
+        self.assertTrue(session.stateless)
+        self.assertNotEquals(session.root_object.api_key, session.uuid)
+        self.assertFalse(self.sessions_controller.redis.exists(session.redis_key))
+        self.assertEquals(self.sessions_controller.get_all_sessions(), [])
+
+    def test_get_session_from_token(self):
+        """
+        """
+        session = self._create_session()
+        token = session.root_object.api_key
+
+        with patch.object(self.sessions_controller.redis, 'hgetall') as mock_method:
+            retrieved_session = self.sessions_controller.get_session(session_uuid=token)
+            self.assertFalse(mock_method.called)
+
+        self.assertEquals(retrieved_session.uuid, session.uuid)
+        self.assertTrue(self.sessions_controller.is_session_alive(retrieved_session))
+
+        with patch.object(self.sessions_controller.redis, 'expire') as mock_method:
+            self.sessions_controller.reset_session_ttl(retrieved_session)
+            self.assertFalse(mock_method.called)
+
+        self.assertIsNone(self.sessions_controller.get_session(session_uuid=token[:-2]))
+
+        with patch('time.time', return_value=time.time() + 11):
+            self.assertIsNone(self.sessions_controller.get_session(session_uuid=token))
+            self.assertFalse(self.sessions_controller.is_session_alive(retrieved_session))
+
+    def test_revoke_session(self):
+        """
+        """
+        session = self._create_session()
+        token = session.root_object.api_key
+        other_token = self._create_session().root_object.api_key
+
+        self.sessions_controller.delete_session(self.sessions_controller.get_session(session_uuid=token))
+
+        self.assertIsNone(self.sessions_controller.get_session(session_uuid=token))
+        self.assertIsNotNone(self.sessions_controller.get_session(session_uuid=other_token))
+
+        # revocations are shared with the other processes
+        self.sessions_controller._revoked_sessions = {}
+        self.sessions_controller._load_revoked_sessions()
+        self.assertIsNone(self.sessions_controller.get_session(session_uuid=token))
+
+        self.sessions_controller._revoked_sessions = {}
+        self.sessions_controller.redis.publish(self.sessions_controller.REVOCATIONS_CHANNEL, '%s %r' % (session.uuid, time.time() + 10))
+        time.sleep(0.3)
+        self.assertIsNone(self.sessions_controller.get_session(session_uuid=token))
@@ -94,6 +94,16 @@ class TestStorageController(TestCase):
         with patch.object(FakeStoragePlugin, 'get_all', return_value='ok'):
             self.assertEquals(self.storage_controller.get_all(user_identifier='owner_identifier', parent='parent', resource_name='test'), 'ok')
 
+    def test_get_all_stream(self):
+        """
+        """
+        with patch.object(FakeStoragePlugin, 'get_all', return_value='ok') as mock_get_all:
+            self.storage_controller.get_all(user_identifier='owner_identifier', parent='parent', resource_name='test')
+            self.assertNotIn('stream', mock_get_all.call_args[1])
+
+            self.storage_controller.get_all(user_identifier='owner_identifier', parent='parent', resource_name='test', stream=True)
+            self.assertEquals(mock_get_all.call_args[1]['stream'], True)
+
     def test_create(self):
         """
         """
@@ -0,0 +1,55 @@
+from unittest import TestCase
+
+from garuda.core.lib import GAEntityTag
+
+import tests.tstdk.v1_0 as tstdk
+
+
+class TestEntityTag(TestCase):
+    """
+    """
+
+    def test_compute(self):
+        """
+        """
+        etag = GAEntityTag.compute([('id1', 1.0), ('id2', 2.0)])
+
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertEquals(etag, GAEntityTag.compute([('id1', 1.0), ('id2', 2.0)]))
+        self.assertNotEquals(etag, GAEntityTag.compute([('id1', 1.0), ('id2', 3.0)]))
+        self.assertNotEquals(etag, GAEntityTag.compute([('id2', 2.0), ('id1', 1.0)]))
+        self.assertNotEquals(etag, GAEntityTag.compute([('id1', 1.0), ('id2', 2.0)], salt='2:0:50'))
+
+    def test_last_modified(self):
+        """
+        """
+        self.assertEquals(GAEntityTag.last_modified([('id1', 1.0), ('id2', 3.0), ('id3', None)]), 3.0)
+        self.assertEquals(GAEntityTag.last_modified([]), None)
+
+    def test_fingerprints(self):
+        """
+        """
+        enterprise = tstdk.GAEnterprise(id='id1')
+        enterprise.last_updated_date = 42.0
+
+        self.assertEquals(GAEntityTag.fingerprints([enterprise]), [('id1', 42.0)])
+
+    def test_is_not_modified_with_if_none_match(self):
+        """
+        """
+        etag = GAEntityTag.compute([('id1', 1.0)])
+
+        self.assertTrue(GAEntityTag.is_not_modified(etag=etag, last_modified=1.0, if_none_match=etag))
+        self.assertTrue(GAEntityTag.is_not_modified(etag=etag, last_modified=1.0, if_none_match='"other", %s' % etag[2:]))
+        self.assertTrue(GAEntityTag.is_not_modified(etag=etag, last_modified=1.0, if_none_match='*'))
+        self.assertFalse(GAEntityTag.is_not_modified(etag=etag, last_modified=1.0, if_none_match='"other"'))
+        self.assertFalse(GAEntityTag.is_not_modified(etag=None, last_modified=1.0, if_none_match='*'))
+        self.assertFalse(GAEntityTag.is_not_modified(etag=etag, last_modified=1.0, if_none_match='"other"', if_modified_since=10))
+
+    def test_is_not_modified_with_if_modified_since(self):
+        """
+        """
+        self.assertTrue(GAEntityTag.is_not_modified(etag='W/"x"', last_modified=10.5, if_modified_since=10))
+        self.assertFalse(GAEntityTag.is_not_modified(etag='W/"x"', last_modified=11.0, if_modified_since=10))
+        self.assertFalse(GAEntityTag.is_not_modified(etag='W/"x"', last_modified=None, if_modified_since=10))
+        self.assertFalse(GAEntityTag.is_not_modified(etag='W/"x"', last_modified=10.0))
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase
+
+from garuda.core.lib import GAConsistentHashRing
+
+
+class GAConsistentHashRingTestCase(TestCase):
+    """
+    """
+
+    def test_empty_ring(self):
+        """
+        """
+        ring = GAConsistentHashRing()
+
+        self.assertEquals(len(ring), 0)
+        self.assertIsNone(ring.get_node('key'))
+
+    def test_routing_is_stable(self):
+        """
+        """
+        ring1 = GAConsistentHashRing(nodes=[('a', 'A'), ('b', 'B'), ('c', 'C')])
+        ring2 = GAConsistentHashRing(nodes=[('c', 'C'), ('a', 'A'), ('b', 'B')])
+
+        for i in range(100):
+            self.assertEquals(ring1.get_node('key%d' % i), ring2.get_node('key%d' % i))
+
+    def test_keys_are_spread(self):
+        """
+        """
+        ring = GAConsistentHashRing(nodes=[('a', 'A'), ('b', 'B'), ('c', 'C')])
+        counts = {'A': 0, 'B': 0, 'C': 0}
+
+        for i in range(3000):
+            counts[ring.get_node('sessions:%d' % i)] += 1
+
+        for count in counts.values():
+            self.assertGreater(count, 700)
+
+    def test_removing_a_node_only_moves_its_keys(self):
+        """
+        """
+        ring = GAConsistentHashRing(nodes=[('a', 'A'), ('b', 'B'), ('c', 'C')])
+        before = dict(('key%d' % i, ring.get_node('key%d' % i)) for i in range(1000))
+
+        ring.remove_node('c')
+        ring.remove_node('unknown')
+
+        self.assertEquals(sorted(ring.nodes), ['A', 'B'])
+
+        for key, node in before.items():
+            if node != 'C':
+                self.assertEquals(ring.get_node(key), node)
+            else:
+                self.assertIn(ring.get_node(key), ['A', 'B'])
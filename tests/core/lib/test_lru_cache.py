@@ -0,0 +1,67 @@
+import time
+from unittest import TestCase
+from mock import patch
+
+from garuda.core.lib import GALRUCache
+
+
+class TestLRUCache(TestCase):
+    """
+    """
+
+    def test_get_set(self):
+        """
+        """
+        cache = GALRUCache(max_size=2)
+        cache.set('a', 1)
+
+        self.assertEquals(cache.get('a'), 1)
+        self.assertEquals(cache.get('b'), None)
+        self.assertEquals(cache.get('b', 42), 42)
+        self.assertIn('a', cache)
+        self.assertEquals(len(cache), 1)
+
+    def test_eviction(self):
+        """
+        """
+        cache = GALRUCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEquals(len(cache), 2)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+
+    def test_delete_and_clear(self):
+        """
+        """
+        cache = GALRUCache()
+        cache.set('a', 1)
+        cache.set('b', 2)
+
+        cache.delete('a')
+        cache.delete('unknown')
+        self.assertNotIn('a', cache)
+
+        cache.clear()
+        self.assertEquals(len(cache), 0)
+
+    def test_ttl(self):
+        """
+        """
+        cache = GALRUCache(ttl=10)
+        cache.set('a', 1)
+        cache.set('b', 2, ttl=-1)
+
+        self.assertEquals(cache.ttl, 10)
+        self.assertEquals(cache.get('a'), 1)
+        self.assertEquals(cache.get('b'), None)
+        self.assertNotIn('b', cache)
+        self.assertEquals(len(cache), 1)
+
+        with patch('time.time', return_value=time.time() + 11):
+            self.assertEquals(cache.get('a'), None)
+            self.assertEquals(len(cache), 0)
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from unittest import TestCase
+
+from garuda.core.lib import GAPubSubDispatcher, GARedisConnectionPool
+
+
+class GAPubSubDispatcherTestCase(TestCase):
+    """
+    """
+
+    def setUp(self):
+        """
+        """
+        self.redis = GARedisConnectionPool.redis(host='127.0.0.1', port=6379, db=6)
+        self.dispatcher = GAPubSubDispatcher(redis=self.redis, poll_interval=0.1)
+
+    def tearDown(self):
+        """
+        """
+        while self.dispatcher.running:
+            self.dispatcher.stop()
+
+    def test_shared_dispatcher(self):
+        """
+        """
+        redis1 = GARedisConnectionPool.redis(host='127.0.0.1', port='6379', db=6)
+        redis2 = GARedisConnectionPool.redis(host='127.0.0.1', port=6379, db=6)
+        redis3 = GARedisConnectionPool.redis(host='127.0.0.1', port=6379, db=7)
+
+        self.assertIs(redis1.connection_pool, redis2.connection_pool)
+        self.assertIsNot(redis1.connection_pool, redis3.connection_pool)
+        self.assertIs(GAPubSubDispatcher.shared(redis=redis1), GAPubSubDispatcher.shared(redis=redis2))
+        self.assertIsNot(GAPubSubDispatcher.shared(redis=redis1), GAPubSubDispatcher.shared(redis=redis3))
+
+    def test_dispatch_to_all_handlers_of_a_channel(self):
+        """
+        """
+        received = []
+        done = threading.Event()
+
+        def handler1(data):
+            received.append(('handler1', data))
+
+        def handler2(data):
+            received.append(('handler2', data))
+            done.set()
+
+        self.dispatcher.subscribe('test-dispatcher', handler1)
+        self.dispatcher.subscribe('test-dispatcher', handler2)
+        self.assertEquals(self.dispatcher.channels, ['test-dispatcher'])
+
+        self.dispatcher.start()
+        self.redis.publish('test-dispatcher', 'hello')
+
+        self.assertTrue(done.wait(5))
+        self.assertEquals(received, [('handler1', 'hello'), ('handler2', 'hello')])
+
+        self.dispatcher.unsubscribe('test-dispatcher', handler1)
+        self.dispatcher.unsubscribe('test-dispatcher', handler2)
+        self.assertEquals(self.dispatcher.channels, [])
+
+    def test_failing_handler_does_not_stop_dispatching(self):
+        """
+        """
+        done = threading.Event()
+
+        def failing_handler(data):
+            raise Exception('boom')
+
+        self.dispatcher.subscribe('test-dispatcher', failing_handler)
+        self.dispatcher.subscribe('test-dispatcher', lambda data: done.set())
+        self.dispatcher.start()
+        self.redis.publish('test-dispatcher', 'hello')
+
+        self.assertTrue(done.wait(5))
+
+    def test_start_stop_are_balanced(self):
+        """
+        """
+        self.dispatcher.start()
+        self.dispatcher.start()
+        self.assertTrue(self.dispatcher.running)
+
+        self.dispatcher.stop()
+        self.assertTrue(self.dispatcher.running)
+
+        self.dispatcher.stop()
+        self.assertFalse(self.dispatcher.running)
+
+        self.dispatcher.stop()
+        self.assertFalse(self.dispatcher.running)
@@ -0,0 +1,86 @@
+from unittest import TestCase
+
+from garuda.core.lib import GAShardedPipeline
+
+
+class FakePipeline(object):
+    """
+    """
+
+    def __init__(self, name, executions):
+        """
+        """
+        self.name = name
+        self.command_stack = []
+        self._executions = executions
+
+    def lpush(self, key, value):
+        """
+        """
+        self.command_stack.append(('lpush', key, value))
+
+    def publish(self, channel, message):
+        """
+        """
+        self.command_stack.append(('publish', channel, message))
+
+    def execute(self):
+        """
+        """
+        self._executions.append(self.name)
+        return [len(self.command_stack)]
+
+
+class FakeRedis(object):
+    """
+    """
+
+    def __init__(self, name, executions):
+        """
+        """
+        self.name = name
+        self._executions = executions
+
+    def pipeline(self, transaction=False):
+        """
+        """
+        return FakePipeline(name=self.name, executions=self._executions)
+
+
+class TestShardedPipeline(TestCase):
+    """
+    """
+
+    def test_primary_is_executed_last(self):
+        """
+        """
+        for i in range(10):
+            executions = []
+            primary = FakeRedis(name='primary', executions=executions)
+            shards = [FakeRedis(name='shard-%d' % index, executions=executions) for index in range(3)]
+
+            pipeline = GAShardedPipeline(redis=primary, redis_for_key=lambda key: shards[int(key)])
+            pipeline.publish('channel', 'message')
+
+            for key in ['2', '0', '1']:
+                pipeline.for_key(key).lpush('eventqueue:%s' % key, 'event')
+
+            self.assertEquals(pipeline.execute(), [1])
+            self.assertEquals(len(executions), 4)
+            self.assertEquals(executions[-1], 'primary')
+
+    def test_primary_shard_is_executed_once(self):
+        """
+        """
+        executions = []
+        primary = FakeRedis(name='primary', executions=executions)
+        shard = FakeRedis(name='shard', executions=executions)
+
+        pipeline = GAShardedPipeline(redis=primary, redis_for_key=lambda key: primary if key == 'primary' else shard)
+        pipeline.publish('channel', 'message')
+        pipeline.for_key('primary').lpush('eventqueue:primary', 'event')
+        pipeline.for_key('other').lpush('eventqueue:other', 'event')
+
+        self.assertEquals(pipeline.execute(), [2])
+        self.assertEquals(executions, ['shard', 'primary'])
+        self.assertEquals(pipeline.result('other', 0), 1)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase
+
+from garuda.core.lib import GATimings
+
+
+class TestTimings(TestCase):
+    """
+    """
+
+    def test_disabled(self):
+        """
+        """
+        timings = GATimings()
+
+        with timings.measure('storage'):
+            pass
+
+        timings.add('logic', 1.0)
+
+        self.assertFalse(timings.enabled)
+        self.assertEquals(timings.to_dict(), {})
+        self.assertEquals(timings.to_header(), '')
+        self.assertIs(timings.measure('a'), GATimings().measure('b'))
+
+    def test_measure(self):
+        """
+        """
+        timings = GATimings(enabled=True)
+
+        with timings.measure('storage'):
+            pass
+
+        with timings.measure('logic'):
+            pass
+
+        self.assertTrue(timings.enabled)
+        self.assertEquals(timings.to_dict().keys(), ['storage', 'logic'])
+        self.assertTrue(timings.to_dict()['storage'] >= 0)
+
+    def test_measure_with_exception(self):
+        """
+        """
+        timings = GATimings(enabled=True)
+
+        with self.assertRaises(ValueError):
+            with timings.measure('storage'):
+                raise ValueError()
+
+        self.assertEquals(timings.to_dict().keys(), ['storage'])
+
+    def test_add(self):
+        """
+        """
+        timings = GATimings(enabled=True)
+        timings.add('storage', 0.001)
+        timings.add('storage', 0.002)
+        timings.add('push', 0.0005)
+
+        self.assertEquals(timings.to_dict(), {'storage': 3.0, 'push': 0.5})
+        self.assertEquals(timings.to_header(), 'storage;dur=3.000, push;dur=0.500')
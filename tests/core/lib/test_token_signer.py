@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+import time
+from unittest import TestCase
+
+from garuda.core.lib import GATokenSigner
+
+
+class GATokenSignerTestCase(TestCase):
+    """
+    """
+
+    def test_secret_is_required(self):
+        """
+        """
+        with self.assertRaises(ValueError):
+            GATokenSigner(secret=None)
+
+    def test_sign_and_verify(self):
+        """
+        """
+        signer = GATokenSigner(secret='secret', ttl=10)
+        token = signer.sign({'name': 'value'})
+
+        data, expiration = signer.verify(token)
+
+        self.assertEquals(data, {'name': 'value'})
+        self.assertAlmostEqual(expiration, time.time() + 10, delta=1)
+        self.assertEquals(signer.verify(unicode(token))[0], {'name': 'value'})
+
+    def test_verify_expired_token(self):
+        """
+        """
+        signer = GATokenSigner(secret='secret')
+        token = signer.sign({'name': 'value'}, expiration=time.time() - 1)
+
+        self.assertIsNone(signer.verify(token))
+
+    def test_verify_tampered_token(self):
+        """
+        """
+        signer = GATokenSigner(secret='secret')
+        payload, signature = signer.sign({'name': 'value'}).split('.')
+        other_payload = signer.sign({'name': 'other'}).split('.')[0]
+
+        self.assertIsNone(signer.verify('%s.%s' % (other_payload, signature)))
+        self.assertIsNone(GATokenSigner(secret='other').verify('%s.%s' % (payload, signature)))
+        self.assertIsNone(signer.verify('not-a-token'))
+        self.assertIsNone(signer.verify('a.b.c'))
+        self.assertIsNone(signer.verify(None))
@@ -176,6 +176,24 @@ class TestContext(TestCase):
         self.assertEquals(response.__class__, GAResponseSuccess)
         self.assertEquals(response.content, enterprise1)
 
+    def test_make_response_with_validators(self):
+        """
+        """
+        session = GASession(garuda_uuid='xxx-xxx-xxx-xxx')
+        request = GARequest(action=GARequest.ACTION_READ, if_none_match='W/"etag"')
+        context = GAContext(session=session, request=request)
+        context.object = tstdk.GAEnterprise(name='enterprise1')
+        context.etag = 'W/"etag"'
+        context.last_modified = 42.0
+        context.not_modified = True
+
+        response = context.make_response()
+
+        self.assertEquals(response.__class__, GAResponseSuccess)
+        self.assertEquals(response.etag, 'W/"etag"')
+        self.assertEquals(response.last_modified, 42.0)
+        self.assertTrue(response.not_modified)
+
     def test_make_response_for_create(self):
         """
         """
@@ -104,14 +104,16 @@ class TestController(TestCase):
         controller = core_controller.additional_controller(identifier='the.id')
 
         controller.start_listening_to_events()
-        thread = controller._pubsub_thread
+        self.assertTrue(controller.listening)
+        self.assertTrue(controller.pubsub_dispatcher.running)
         controller.start_listening_to_events()
-        self.assertEquals(controller._pubsub_thread, thread)
+        self.assertTrue(controller.listening)
 
         controller.stop_listening_to_events()
         controller.stop_listening_to_events()
 
-        self.assertIsNone(controller._pubsub_thread)
+        self.assertFalse(controller.listening)
+        self.assertFalse(controller.pubsub_dispatcher.running)
 
     def test_offline_subscriptions(self):
         """
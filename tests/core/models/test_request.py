@@ -10,7 +10,7 @@ class TestRequest(TestCase):
         """
         """
         request = GARequest(action=GARequest.ACTION_CREATE, channel='channel', content={'hello': 'world'}, resources='resource', username='username', token='token',
-                            cookies='cookie', filter='filter', order_by='order', page=1, page_size=2, parameters={'bonjour': 'tout le monde'})
+                            cookies='cookie', filter='filter', order_by='order', page=1, page_size=2, parameters={'bonjour': 'tout le monde'}, stream=True)
 
         self.assertEquals(request.action, GARequest.ACTION_CREATE)
         self.assertEquals(request.channel, 'channel')
@@ -24,4 +24,12 @@ class TestRequest(TestCase):
         self.assertEquals(request.page, 1)
         self.assertEquals(request.page_size, 2)
         self.assertEquals(request.parameters, {'bonjour': 'tout le monde'})
+        self.assertEquals(request.stream, True)
+        self.assertFalse(request.is_conditional)
         self.assertIsNotNone(request.uuid)
+
+    def test_conditional_request(self):
+        """
+        """
+        self.assertTrue(GARequest(action=GARequest.ACTION_READ, if_none_match='W/"etag"').is_conditional)
+        self.assertTrue(GARequest(action=GARequest.ACTION_READ, if_modified_since=42).is_conditional)
@@ -90,3 +90,33 @@ class TestSimpleAuthPlugin(TestCase):
         auth_info = auth_plugin.authenticate(request=request, session=session)
 
         self.assertIsNone(auth_info)
+
+    def test_session_tokens_without_secret(self):
+        """
+        """
+        auth_plugin = GASimpleAuthenticationPlugin()
+
+        self.assertIsNone(auth_plugin.issue_session_token(session=GASession()))
+        self.assertIsNone(auth_plugin.session_from_token(token='token'))
+
+    def test_session_tokens_with_secret(self):
+        """
+        """
+        session = GASession(garuda_uuid='garuda')
+        session.root_object = tstdk.GARoot(id='root')
+
+        auth_plugin = GASimpleAuthenticationPlugin(secret='secret', token_ttl=10)
+        token = auth_plugin.issue_session_token(session=session)
+
+        self.assertTrue(session.stateless)
+
+        decoded_session = auth_plugin.session_from_token(token=token)
+
+        self.assertEquals(decoded_session.uuid, session.uuid)
+        self.assertEquals(decoded_session.garuda_uuid, 'garuda')
+        self.assertEquals(decoded_session.root_object.id, 'root')
+        self.assertEquals(decoded_session.expiration, session.expiration)
+        self.assertTrue(decoded_session.stateless)
+
+        self.assertIsNone(GASimpleAuthenticationPlugin(secret='other').session_from_token(token=token))
+        self.assertIsNone(auth_plugin.session_from_token(token=session.uuid))
@@ -1,15 +1,204 @@
 # -*- coding: utf-8 -*-
 from unittest import TestCase
+from mock import patch, PropertyMock
 
+from garuda.core.controllers import GACoreController
+from garuda.core.models import GAStoragePluginQueryResponse
 from garuda.plugins.permissions import GARedisPermissionsPlugin
+import tests.tstdk.v1_0 as tstdk
+
+
+class FakeStorageController(object):
+    """ Resolves the parents of the targets from a dictionary
+    """
+
+    def __init__(self, objects):
+        """
+        """
+        self.objects = objects
+
+    def get(self, user_identifier, resource_name, identifier=None, filter=None):
+        """
+        """
+        return GAStoragePluginQueryResponse(data=self.objects.get(identifier), count=1)
+
 
 class TestRedisPermissionsPlugin(TestCase):
     """
     """
 
+    @classmethod
+    def setUpClass(cls):
+        """
+        Model:
+
+        e1  --- u1
+            +-- u2
+        e2
+        """
+        cls.permissions_plugin = GARedisPermissionsPlugin()
+        cls.core_controller = GACoreController(garuda_uuid='test-garuda',
+                                               redis_info=[{'host': '127.0.0.1', 'port': '6379', 'db': 6},
+                                                           {'host': '127.0.0.1', 'port': '6379', 'db': 7}],
+                                               permission_plugins=[cls.permissions_plugin])
+
+        cls.e0 = tstdk.GAEnterprise(id='e0', name='e0')
+        cls.e1 = tstdk.GAEnterprise(id='e1', name='e1')
+        cls.e2 = tstdk.GAEnterprise(id='e2', name='e2')
+        cls.u1 = tstdk.GAUser(id='u1', username='u1')
+        cls.u2 = tstdk.GAUser(id='u2', username='u2')
+
+        for user in (cls.u1, cls.u2):
+            user.parent_type = 'enterprise'
+            user.parent_id = cls.e1.id
+
+        cls.storage_controller = FakeStorageController(objects={'e1': cls.e1, 'e2': cls.e2, 'u1': cls.u1, 'u2': cls.u2})
+        cls.storage_controller_patcher = patch.object(GARedisPermissionsPlugin, 'storage_controller', new_callable=PropertyMock, return_value=cls.storage_controller)
+        cls.storage_controller_patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        """
+        cls.storage_controller_patcher.stop()
+
+    def setUp(self):
+        """
+        """
+        for redis in self.core_controller.redis_shards:
+            redis.flushdb()
+
+    def tearDown(self):
+        """
+        """
+        for redis in self.core_controller.redis_shards:
+            redis.flushdb()
+
     def test_identifiers(self):
         """
         """
         auth_plugin = GARedisPermissionsPlugin()
         self.assertEquals(auth_plugin.__class__.manifest().identifier, 'garuda.controller.permissions.redis')
         self.assertEquals(auth_plugin.manifest().identifier, 'garuda.controller.permissions.redis')
+
+    def test_create_and_remove_permission(self):
+        """
+        """
+        self.assertTrue(self.permissions_plugin.is_empty())
+
+        self.permissions_plugin.create_permission(resource=self.e0, target=self.u1, permission='write')
+
+        self.assertFalse(self.permissions_plugin.is_empty())
+        self.assertTrue(self.permissions_plugin.has_permission(resource=self.e0, target=self.u1, permission='write'))
+        self.assertTrue(self.permissions_plugin.has_permission(resource=self.e0, target=self.u1, permission='read'))
+        self.assertFalse(self.permissions_plugin.has_permission(resource=self.e0, target=self.u1, permission='all'))
+        self.assertTrue(self.permissions_plugin.has_permission(resource=self.e0, target=self.e1, permission='read'))
+        self.assertFalse(self.permissions_plugin.has_permission(resource=self.e0, target=self.e1, permission='write'))
+        self.assertFalse(self.permissions_plugin.has_permission(resource=self.e0, target=self.u2, permission='read'))
+
+        self.permissions_plugin.remove_permission(resource=self.e0, target=self.u1, permission='write')
+
+        self.assertFalse(self.permissions_plugin.has_permission(resource=self.e0, target=self.u1, permission='read'))
+        self.assertFalse(self.permissions_plugin.has_permission(resource=self.e0, target=self.e1, permission='read'))
+        self.assertTrue(self.permissions_plugin.is_empty())
+
+        for redis in self.core_controller.redis_shards:
+            self.assertEquals(redis.keys(), [])
+
+    def test_permissions_propagate_to_children(self):
+        """
+        """
+        self.permissions_plugin.create_permission(resource=self.e0, target=self.e1, permission='use')
+
+        self.assertTrue(self.permissions_plugin.has_permission(resource=self.e0, target=self.u2, permission='use'))
+        self.assertFalse(self.permissions_plugin.has_permission(resource=self.e0, target=self.u2, permission='write'))
+
+        self.permissions_plugin.create_permission(resource=self.e0, target=self.u1, permission='read')
+
+        self.assertTrue(self.permissions_plugin.has_permission(resource=self.e0, target=self.e1, permission='read', explicit_only=True))
+        self.assertFalse(self.permissions_plugin.has_permission(resource=self.e0, target=self.e2, permission='read', explicit_only=True))
+
+    def test_has_permission_does_not_scan(self):
+        """
+        """
+        self.permissions_plugin.create_permission(resource=self.e0, target=self.u1, permission='read')
+
+        with patch('redis.StrictRedis.scan_iter', side_effect=AssertionError('permissions must not scan the keyspace')), \
+                patch('redis.StrictRedis.keys', side_effect=AssertionError('permissions must not scan the keyspace')):
+            self.assertTrue(self.permissions_plugin.has_permission(resource=self.e0, target=self.u1, permission='read'))
+            self.assertEquals(self.permissions_plugin.child_ids_with_permission(resource=self.e0, parent=self.e1, children_type='user'), {'u1'})
+            self.assertFalse(self.permissions_plugin.is_empty())
+            self.permissions_plugin.remove_permission(resource=self.e0, target=self.u1, permission='read')
+            self.assertTrue(self.permissions_plugin.is_empty())
+
+    def test_child_ids_with_permission(self):
+        """
+        """
+        self.permissions_plugin.create_permission(resource=self.e0, target=self.u1, permission='read')
+        self.permissions_plugin.create_permission(resource=self.e0, target=self.u2, permission='write')
+
+        self.assertEquals(self.permissions_plugin.child_ids_with_permission(resource=self.e0, parent=self.e1, children_type='user', permission='read'), {'u1', 'u2'})
+        self.assertEquals(self.permissions_plugin.child_ids_with_permission(resource=self.e0, parent=self.e1, children_type='user', permission='write'), {'u2'})
+        self.assertEquals(self.permissions_plugin.child_ids_with_permission(resource=self.e0, parent=None, children_type='enterprise'), {'e1'})
+        self.assertEquals(self.permissions_plugin.child_ids_with_permission(resource=self.e0, parent=self.e2, children_type='user'), set())
+
+    def test_remove_all_permissions_of_resource(self):
+        """
+        """
+        self.permissions_plugin.create_permission(resource=self.e0, target=self.u1, permission='read')
+        self.permissions_plugin.create_permission(resource=self.e0, target=self.e2, permission='write')
+        self.permissions_plugin.create_permission(resource=self.e2, target=self.u2, permission='read')
+
+        self.permissions_plugin.remove_all_permissions_of_resource(resource=self.e0)
+
+        self.assertFalse(self.permissions_plugin.has_permission(resource=self.e0, target=self.u1, permission='read'))
+        self.assertFalse(self.permissions_plugin.has_permission(resource=self.e0, target=self.e2, permission='read'))
+        self.assertTrue(self.permissions_plugin.has_permission(resource=self.e2, target=self.u2, permission='read'))
+
+        self.permissions_plugin.remove_all_permissions_of_resource(resource=self.e2)
+
+        self.assertTrue(self.permissions_plugin.is_empty())
+
+    def test_remove_all_permissions_for_target_ids(self):
+        """
+        """
+        resources = ['resource-%d' % index for index in range(10)]
+
+        for resource in resources:
+            self.permissions_plugin.create_permission(resource=resource, target=self.u1, permission='read')
+            self.permissions_plugin.create_permission(resource=resource, target=self.e2, permission='write')
+
+        self.assertTrue(all(len(redis.keys('permissions:*')) for redis in self.core_controller.redis_shards))
+
+        self.permissions_plugin.remove_all_permissions_for_target_ids(target_ids=['u1'])
+
+        for resource in resources:
+            self.assertFalse(self.permissions_plugin.has_permission(resource=resource, target=self.u1, permission='read'))
+            self.assertFalse(self.permissions_plugin.has_permission(resource=resource, target=self.e1, permission='read'))
+            self.assertTrue(self.permissions_plugin.has_permission(resource=resource, target=self.e2, permission='write'))
+
+        self.permissions_plugin.remove_all_permissions_for_target_ids(target_ids=['e2'])
+
+        self.assertTrue(self.permissions_plugin.is_empty())
+
+    def test_migrate_legacy_permissions(self):
+        """
+        """
+        redis = self.permissions_plugin._redis_for_resource('e0')
+        redis.set(self.permissions_plugin._compute_permission_redis_key(permission_id='p1', parent_permission_id='None', resource_id='e0', target_type='user',
+                                                                        target_id='u1', target_parent_type='enterprise', target_parent_id='e1', scope='E'), 3)
+        redis.set(self.permissions_plugin._compute_permission_redis_key(permission_id='p2', parent_permission_id='p1', resource_id='e0', target_type='enterprise',
+                                                                        target_id='e1', target_parent_type='none', target_parent_id='none', scope='I'), 0)
+
+        self.assertEquals(self.permissions_plugin.migrate_legacy_permissions(batch_size=1), 2)
+        self.assertEquals(redis.keys('permission:*'), [])
+
+        self.assertTrue(self.permissions_plugin.has_permission(resource=self.e0, target=self.u1, permission='write'))
+        self.assertTrue(self.permissions_plugin.has_permission(resource=self.e0, target=self.e1, permission='read'))
+        self.assertEquals(self.permissions_plugin.child_ids_with_permission(resource=self.e0, parent=self.e1, children_type='user', permission='write'), {'u1'})
+
+        self.assertEquals(self.permissions_plugin.migrate_legacy_permissions(), 0)
+
+        self.permissions_plugin.remove_permission(resource=self.e0, target=self.u1, permission='write')
+
+        self.assertTrue(self.permissions_plugin.is_empty())
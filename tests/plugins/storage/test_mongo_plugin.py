@@ -186,6 +186,51 @@ class TestMongoPlugin(TestCase):
         self.assertEquals(ret.data[2].name, enterprise3.name)
         self.assertEquals(ret.data[2].description, enterprise3.description)
 
+    def test_get_all_enterprises_streamed(self):
+        """
+        """
+        enterprise1 = tstdk.GAEnterprise(name='enterprise 1', description='the enterprise 1')
+        enterprise2 = tstdk.GAEnterprise(name='enterprise 2', description='the enterprise 2')
+
+        self.storage_controller.create(user_identifier='owner_identifier', resource=enterprise1, parent=None)
+        self.storage_controller.create(user_identifier='owner_identifier', resource=enterprise2, parent=None)
+
+        ret = self.storage_controller.get_all(user_identifier='owner_identifier', resource_name=tstdk.GAEnterprise.rest_name, parent=None, stream=True)
+        self.assertEquals(ret.count, 2)
+        self.assertFalse(isinstance(ret.data, list))
+
+        objects = list(ret.data)
+        self.assertEquals(len(objects), 2)
+        self.assertEquals(objects[0].id, enterprise1.id)
+        self.assertEquals(objects[1].id, enterprise2.id)
+
+    def test_get_all_non_existing_objects_streamed(self):
+        """
+        """
+        ret = self.storage_controller.get_all(user_identifier='owner_identifier', resource_name=tstdk.GAEnterprise.rest_name, parent=None, stream=True)
+        self.assertEquals(ret.count, 0)
+        self.assertEquals(list(ret.data), [])
+
+    def test_get_last_updated_dates(self):
+        """
+        """
+        enterprise1 = tstdk.GAEnterprise(name='enterprise 1', description='the enterprise 1')
+        enterprise2 = tstdk.GAEnterprise(name='enterprise 2', description='the enterprise 2')
+
+        self.storage_controller.create(user_identifier='owner_identifier', resource=enterprise1, parent=None)
+        self.storage_controller.create(user_identifier='owner_identifier', resource=enterprise2, parent=None)
+
+        ret = self.storage_controller.get_last_updated_dates(user_identifier='owner_identifier', resource_name=tstdk.GAEnterprise.rest_name, identifier=enterprise1.id)
+        self.assertEquals(ret.count, 1)
+        self.assertEquals(ret.data, [(enterprise1.id, enterprise1.last_updated_date)])
+
+        ret = self.storage_controller.get_last_updated_dates(user_identifier='owner_identifier', resource_name=tstdk.GAEnterprise.rest_name)
+        self.assertEquals(ret.count, 2)
+        self.assertEquals(ret.data, [(enterprise1.id, enterprise1.last_updated_date), (enterprise2.id, enterprise2.last_updated_date)])
+
+        ret = self.storage_controller.get_last_updated_dates(user_identifier='owner_identifier', resource_name=tstdk.GAEnterprise.rest_name, identifier='nope')
+        self.assertEquals(ret.errors[0].type, GAError.TYPE_NOTFOUND)
+
     def test_get_all_enterprises_with_filter(self):
         """
         """